@@ -0,0 +1,153 @@
+"""
+Conversion of annotated texts to html: the boundary sweep of
+`annotated_text_to_html` against the previous char by char scan.
+
+    python benchmarks/annotated_text_to_html.py --chars 5000 --annotations 50
+
+Both implementations are first checked to return the same html and rebuild on
+random texts.
+"""
+import argparse
+import random
+import time
+from itertools import groupby
+from typing import Dict, List, Optional, Set, Tuple
+from lxml import etree
+from translation_tower.annotation import Annotation
+from translation_tower.annotated_text_to_html import annotated_text_to_html
+
+WORDS = ["Madrid", "Ana", "la", "de", "Pangeanic", "New", "York", "<b>", "&", "x"]
+SPACES = [" ", " ", " ", "  ", "\n", "\t", " "]
+
+
+def reference_annotated_text_to_html(
+    text: str,
+    annotations: List[Annotation],
+) -> Tuple[str, Tuple[Dict[str, Set[int]], Dict[int, str]]]:
+    """
+    Previous implementation: scan every annotation for every char
+    """
+    chars: List[Tuple[int, str, Optional[Set[int]]]] = list()
+    for i, c in enumerate(text):
+        if not c.isspace():
+            annotations_set = set()
+            for annotation_id, annotation in enumerate(annotations):
+                if annotation.start <= i < annotation.stop:
+                    annotations_set.add(annotation_id)
+            if annotations_set:
+                chars.append((i, c, annotations_set))
+            else:
+                chars.append((i, c, None))
+        else:
+            chars.append((i, c, None))
+
+    tag_id = 0
+    root = etree.Element("p")
+    tag_id_to_annotations_set = dict()
+    for set_of_annotations, chars in groupby(chars, key=lambda ch: ch[2]):
+        chars = list(chars)
+        text_part = text[chars[0][0] : chars[-1][0] + 1]
+        if set_of_annotations:
+            tag = etree.Element("b")
+            tag.set("id", str(tag_id))
+            tag.text = text_part
+            root.append(tag)
+            tag_id_to_annotations_set[str(tag_id)] = set_of_annotations
+            tag_id += 1
+        else:
+            if len(root):
+                root[-1].tail = text_part
+            else:
+                root.text = text_part
+
+    annotation_id_to_label = dict(
+        [(i, annotation.label) for i, annotation in enumerate(annotations)]
+    )
+
+    return (
+        str(etree.tostring(root, encoding="unicode")),
+        (
+            tag_id_to_annotations_set,
+            annotation_id_to_label,
+        ),
+    )
+
+
+def random_text(rng: random.Random, chars: int) -> str:
+    parts = list()
+    length = 0
+    while length < chars:
+        part = rng.choice(WORDS) + rng.choice(SPACES)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:chars]
+
+
+def random_annotations(
+    rng: random.Random, text: str, count: int, max_length: int
+) -> List[Annotation]:
+    annotations = list()
+    for i in range(count):
+        start = rng.randrange(-2, len(text) + 2)
+        stop = start + rng.randrange(0, max_length)
+        annotations.append(Annotation(label=f"LABEL{i % 5}", start=start, stop=stop))
+    return annotations
+
+
+def check(rng: random.Random, cases: int):
+    for _ in range(cases):
+        text = random_text(rng, rng.randrange(0, 300))
+        annotations = random_annotations(rng, text, rng.randrange(0, 30), 40)
+        expected = reference_annotated_text_to_html(text, annotations)
+        html, (tag_id_to_annotations_ids, labels) = annotated_text_to_html(
+            text, annotations
+        )
+        assert html == expected[0], (text, annotations)
+        assert labels == expected[1][1], (text, annotations)
+        assert tag_id_to_annotations_ids.keys() == expected[1][0].keys()
+        for tag_id, annotations_ids in tag_id_to_annotations_ids.items():
+            # Same set, iterated in the same order
+            assert list(set(annotations_ids)) == list(expected[1][0][tag_id])
+
+
+def measure(function, text: str, annotations: List[Annotation], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(text, annotations)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chars", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--annotations", type=int, nargs="+", default=[5, 50])
+    parser.add_argument("--max-length", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--check-cases", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    check(rng, args.check_cases)
+    print(f"Same output on {args.check_cases} random texts")
+
+    print(
+        f"{'chars':>8} {'annotations':>12} {'reference':>12} {'sweep':>12}"
+        f" {'speedup':>8}"
+    )
+    for chars in args.chars:
+        for count in args.annotations:
+            text = random_text(rng, chars)
+            annotations = random_annotations(rng, text, count, args.max_length)
+            reference = measure(
+                reference_annotated_text_to_html, text, annotations, args.repeat
+            )
+            sweep = measure(annotated_text_to_html, text, annotations, args.repeat)
+            print(
+                f"{chars:>8} {count:>12} {reference * 1000:>10.3f}ms"
+                f" {sweep * 1000:>10.3f}ms {reference / sweep:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Latency of a large annotated request, and the event loop lag that it causes to
+the other requests, with the annotation conversions inline or in a process pool.
+
+    python benchmarks/annotation_offload.py --processes 0 2 4
+
+The annotated request converts its texts to html and back, like a translation
+whose translator returns the html unchanged. Meanwhile, a ticker standing for the
+unrelated requests sleeps `--interval` seconds in a loop and records how late it
+wakes up. 0 processes is the inline conversion.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import List, Tuple
+from translation_tower.annotation import Annotation
+from translation_tower.annotation_converter import AnnotationConverter
+from translation_tower.metrics import Metrics
+
+WORDS = ["Madrid", "Ana", "la", "de", "Pangeanic", "New", "York", "&", "é"]
+
+
+def random_texts(
+    rng: random.Random, texts: int, chars: int, annotations: int
+) -> List[Tuple[str, List[Annotation]]]:
+    annotated_texts = list()
+    for _ in range(texts):
+        words = list()
+        length = 0
+        while length < chars:
+            words.append(rng.choice(WORDS))
+            length += len(words[-1]) + 1
+        text = " ".join(words)[:chars]
+        text_annotations = list()
+        for i in range(annotations):
+            start = rng.randrange(0, len(text) - 1)
+            stop = min(len(text), start + rng.randrange(1, 20))
+            text_annotations.append(Annotation(f"LABEL{i % 5}", start, stop))
+        annotated_texts.append((text, text_annotations))
+    return annotated_texts
+
+
+async def annotated_request(
+    converter: AnnotationConverter, texts: List[Tuple[str, List[Annotation]]]
+):
+    htmls = await converter.to_html(texts)
+    return await converter.from_html(htmls)
+
+
+async def measure(
+    converter: AnnotationConverter,
+    texts: List[Tuple[str, List[Annotation]]],
+    interval: float,
+):
+    lags = list()
+    running = True
+
+    async def tick():
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - start - interval)
+
+    ticker = asyncio.ensure_future(tick())
+    await asyncio.sleep(interval * 2)
+    start = time.perf_counter()
+    annotated_texts = await annotated_request(converter, texts)
+    latency = time.perf_counter() - start
+    running = False
+    await ticker
+    return annotated_texts, latency, lags
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    texts = random_texts(rng, args.texts, args.chars, args.annotations)
+    print(
+        f"{args.texts} texts of {args.chars} chars with {args.annotations}"
+        f" annotations"
+    )
+    print(
+        f"{'processes':>10} {'latency':>10} {'lag p50':>10} {'lag p99':>10}"
+        f" {'lag max':>10}"
+    )
+
+    expected = None
+    for processes in args.processes:
+        converter = AnnotationConverter(
+            processes=processes,
+            offload_chars=args.offload_chars,
+            chunk_size=args.chunk_size,
+            metrics=Metrics(),
+        )
+        converter.start()
+        try:
+            # Start the pool processes
+            await annotated_request(converter, texts[: args.chunk_size * processes])
+
+            annotated_texts, latency, lags = await measure(
+                converter, texts, args.interval
+            )
+        finally:
+            converter.stop()
+
+        if expected is None:
+            expected = annotated_texts
+        assert annotated_texts == expected
+        print(
+            f"{processes:>10} {latency * 1000:>8.1f}ms"
+            f" {statistics.median(lags) * 1000:>8.1f}ms"
+            f" {percentile(lags, 99) * 1000:>8.1f}ms {max(lags) * 1000:>8.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--chars", type=int, default=2000)
+    parser.add_argument("--annotations", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=50)
+    parser.add_argument("--offload-chars", type=int, default=20000)
+    parser.add_argument("--interval", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
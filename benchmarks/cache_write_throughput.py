@@ -0,0 +1,104 @@
+"""
+Write throughput of the cache backends under concurrent writer processes.
+
+    python benchmarks/cache_write_throughput.py --processes 1 2 4 8
+
+Each process writes `--writes` translations through a backend, in bulk writes of
+`--batch-size` entries, like the translation batches do. Only the writes that the
+backend reports as written are counted: dropped writes don't add throughput.
+"""
+import argparse
+import multiprocessing
+import shutil
+import tempfile
+import time
+from translation_tower.translation_cache import TranslationCache
+from translation_tower.translation_cache_config import TranslationCacheConfig
+from translation_tower.cached_translation import (
+    CachedTranslation,
+    encode_cached_translation,
+)
+from translation_tower.cache_backend.create_cache_backend import create_cache_backend
+
+
+def write(
+    config: TranslationCacheConfig,
+    process: int,
+    writes: int,
+    batch_size: int,
+    written: multiprocessing.Queue,
+):
+    backend = create_cache_backend(config)
+    count = 0
+    try:
+        for start in range(0, writes, batch_size):
+            entries = dict()
+            for i in range(start, min(writes, start + batch_size)):
+                cached_translation = CachedTranslation(
+                    text=f"Text {process}.{i} to translate, long enough to be real.",
+                    translation=f"Texto {process}.{i} a traducir, bastante largo.",
+                    source_language="en",
+                    target_language="es",
+                    translator_name="deepl",
+                    translator_html_mode=False,
+                    translator_fake_mode=False,
+                )
+                key = TranslationCache.key_of(cached_translation)
+                entries[key] = encode_cached_translation(cached_translation)
+            count += backend.set_many(entries)
+    finally:
+        backend.close()
+        written.put(count)
+
+
+def run(backend: str, processes: int, writes: int, batch_size: int, shards: int):
+    path = tempfile.mkdtemp(prefix="translation_cache_benchmark")
+    try:
+        config = TranslationCacheConfig(
+            path=path, size_limit=2 ** 40, backend=backend, shards=shards
+        )
+        # Create the store before the writers
+        create_cache_backend(config).close()
+
+        context = multiprocessing.get_context("fork")
+        written = context.Queue()
+        workers = [
+            context.Process(
+                target=write, args=(config, p, writes, batch_size, written)
+            )
+            for p in range(processes)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        total = sum(written.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        dropped = processes * writes - total
+        print(
+            f"{backend:>7} {processes:>3} process(es): "
+            f"{total} writes in {elapsed:.2f}s, {total / elapsed:,.0f} writes/s, "
+            f"{dropped} dropped"
+        )
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=["disk", "fanout"])
+    parser.add_argument("--processes", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--writes", type=int, default=20000, help="by process")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--shards", type=int, default=8)
+    args = parser.parse_args()
+
+    for processes in args.processes:
+        for backend in args.backends:
+            run(backend, processes, args.writes, args.batch_size, args.shards)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Conversion of translated html to annotated texts: the tokenizer of
+`html_to_annotated_text` against the previous html5 parser implementation.
+
+    python benchmarks/html_to_annotated_text.py --chars 5000 --annotations 50
+
+The html is the one of `annotated_text_to_html`, as a translator returns it.
+Both implementations are first checked to return the same text and annotations,
+on this html and on html that only the html5 parser reads.
+"""
+import argparse
+import functools
+import operator
+import random
+import time
+from itertools import groupby
+from typing import Dict, List, Set, Tuple
+from lxml.html import html5parser
+from translation_tower.annotation import Annotation
+from translation_tower.annotated_text_to_html import (
+    annotated_text_to_html,
+    html_to_annotated_text,
+    _get_ancestors_ids,
+)
+
+WORDS = ["Madrid", "Ana", "la", "de", "Pangeanic", "New", "York", "<b>", "&", "é"]
+SPACES = [" ", " ", " ", "  ", "\n", "\t", " "]
+# Markup that a translator may return instead
+CHANGES = [
+    ('<b id="', '<B  ID = "'),
+    ("</b>", "</b ><i></i>"),
+    ("&amp;", "&"),
+    ("<p>", "<p> "),
+    ("</p>", ""),
+]
+
+
+def reference_html_to_annotated_text(
+    html: str, rebuild: Tuple[Dict[str, Set[int]], Dict[int, str]]
+) -> Tuple[str, List[Annotation]]:
+    """
+    Previous implementation: html5 parser, and a scan of the chars by annotation
+    """
+    element_id_to_annotation_set, annotation_id_to_label = rebuild
+
+    chars = list()
+    char_index = 0
+    all_annotations_ids = set()
+
+    root = html5parser.fragment_fromstring(html, create_parent=True)
+    for element in root.iter():
+        for text, is_text in [(element.text, True), (element.tail, False)]:
+            if text:
+                element_ids = _get_ancestors_ids(element, include_element=is_text)
+                annotations_ids = set()
+                for element_id in element_ids:
+                    if element_id in element_id_to_annotation_set:
+                        annotations_ids = annotations_ids.union(
+                            element_id_to_annotation_set[element_id]
+                        )
+                all_annotations_ids = all_annotations_ids.union(annotations_ids)
+                for char in text:
+                    if char.isspace():
+                        chars.append((char_index, char, set()))
+                    else:
+                        chars.append((char_index, char, annotations_ids))
+                    char_index += 1
+
+    text = functools.reduce(operator.add, map(lambda c: c[1], chars))
+
+    annotations = list()
+    non_space_chars = list(filter(lambda c: not c[1].isspace(), chars))
+    for index in all_annotations_ids:
+        for is_char_involved_in_annotation, chars in groupby(
+            non_space_chars, key=lambda c: True if index in c[2] else False
+        ):
+            if is_char_involved_in_annotation:
+                chars = list(chars)
+                annotations.append(
+                    Annotation(
+                        label=annotation_id_to_label[index],
+                        start=chars[0][0],
+                        stop=chars[-1][0] + 1,
+                        origin=index,
+                    )
+                )
+
+    return text, annotations
+
+
+def random_text(rng: random.Random, chars: int) -> str:
+    parts = list()
+    length = 0
+    while length < chars:
+        part = rng.choice(WORDS) + rng.choice(SPACES)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:chars]
+
+
+def random_annotations(
+    rng: random.Random, text: str, count: int, max_length: int
+) -> List[Annotation]:
+    annotations = list()
+    for i in range(count):
+        start = rng.randrange(0, len(text))
+        stop = start + rng.randrange(1, max_length)
+        annotations.append(Annotation(label=f"LABEL{i % 5}", start=start, stop=stop))
+    return annotations
+
+
+def check(rng: random.Random, cases: int):
+    for _ in range(cases):
+        text = random_text(rng, rng.randrange(1, 300))
+        annotations = random_annotations(rng, text, rng.randrange(1, 30), 40)
+        html, rebuild = annotated_text_to_html(text, annotations)
+        # The previous rebuild held sets
+        tag_id_to_annotations_ids, labels = rebuild
+        reference_rebuild = (
+            {tag_id: set(ids) for tag_id, ids in tag_id_to_annotations_ids.items()},
+            labels,
+        )
+        for old, new in [("", "")] + rng.sample(CHANGES, 2):
+            changed_html = html.replace(old, new)
+            expected = reference_html_to_annotated_text(
+                changed_html, reference_rebuild
+            )
+            text, annotations = html_to_annotated_text(changed_html, rebuild)
+            assert text == expected[0], changed_html
+            assert annotations == expected[1], changed_html
+            assert [a.origin for a in annotations] == [a.origin for a in expected[1]]
+
+
+def measure(function, html: str, rebuild, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(html, rebuild)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chars", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--annotations", type=int, nargs="+", default=[5, 50])
+    parser.add_argument("--max-length", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--check-cases", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    check(rng, args.check_cases)
+    print(f"Same output on {args.check_cases} random texts")
+
+    print(
+        f"{'chars':>8} {'annotations':>12} {'reference':>12} {'tokenizer':>12}"
+        f" {'speedup':>8}"
+    )
+    for chars in args.chars:
+        for count in args.annotations:
+            text = random_text(rng, chars)
+            annotations = random_annotations(rng, text, count, args.max_length)
+            html, rebuild = annotated_text_to_html(text, annotations)
+            reference_rebuild = (
+                {tag_id: set(ids) for tag_id, ids in rebuild[0].items()},
+                rebuild[1],
+            )
+            reference = measure(
+                reference_html_to_annotated_text, html, reference_rebuild, args.repeat
+            )
+            tokenizer = measure(html_to_annotated_text, html, rebuild, args.repeat)
+            print(
+                f"{chars:>8} {count:>12} {reference * 1000:>10.3f}ms"
+                f" {tokenizer * 1000:>10.3f}ms {reference / tokenizer:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+from pathlib import Path
+import pytest
+import yaml
+from translation_tower.translation_app import TranslationApp
+
+CONFIG_DIR = Path(__file__).parent.parent / "data" / "config"
+
+
+@pytest.fixture
+def create_app(tmp_path):
+    """
+    Create translation apps with the sample configuration, a cache in a temporary
+    directory and the given translation app settings
+    """
+
+    def create(**translation_app_config) -> TranslationApp:
+        cache_config = dict(
+            path=str(tmp_path / "translation_cache"),
+            size_limit=10 ** 9,
+            backend="memory",
+        )
+        with (CONFIG_DIR / "translation_app.yaml").open(encoding="utf-8") as f:
+            app_config = yaml.load(f, Loader=yaml.FullLoader)
+        app_config.update(annotation_processes=0)
+        app_config.update(translation_app_config)
+
+        for name, config in [("cache", cache_config), ("app", app_config)]:
+            with (tmp_path / f"{name}.yaml").open("w", encoding="utf-8") as f:
+                yaml.dump(config, f)
+
+        return TranslationApp(
+            tmp_path / "cache.yaml",
+            tmp_path / "app.yaml",
+            CONFIG_DIR / "languages.csv",
+            CONFIG_DIR / "secret_sample.yaml",
+        )
+
+    return create
@@ -0,0 +1,83 @@
+import asyncio
+import json
+from translation_tower.bulk_translation import bulk_translate
+
+LINES = 10
+
+
+def write_input(path):
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(LINES):
+            f.write(json.dumps(dict(text=f"Hello {i}")) + "\n")
+
+
+def bulk(app, input_path, output_path, ordered, offset):
+    async def run():
+        await app.start()
+        try:
+            return await bulk_translate(
+                app,
+                input_path,
+                output_path,
+                ordered=ordered,
+                offset=offset,
+                defaults=dict(
+                    source_lang="en",
+                    target_lang="es",
+                    translator="bing",
+                    translator_fake_mode=True,
+                    use_cache=False,
+                ),
+            )
+        finally:
+            await app.stop()
+
+    return asyncio.run(run())
+
+
+def translate(monkeypatch, app):
+    async def call_translator(jobs, batch_id, limiter):
+        return [f"Hola {job.to_translator}" for job in jobs]
+
+    monkeypatch.setattr(app, "call_translator", call_translator)
+
+
+def read_lines(path):
+    with path.open(encoding="utf-8") as f:
+        return [json.loads(line)["line"] for line in f]
+
+
+def test_resume_unordered_run(create_app, monkeypatch, tmp_path):
+    input_path = tmp_path / "input.jsonl"
+    output_path = tmp_path / "output.jsonl"
+    write_input(input_path)
+    # Interrupted run: lines 0-3, 5 and 7 written, and a cut line
+    with output_path.open("w", encoding="utf-8") as f:
+        for line in [0, 1, 2, 3, 5, 7]:
+            f.write(json.dumps(dict(text=f"Hola Hello {line}", line=line)) + "\n")
+        f.write('{"text": "Hola')
+
+    app = create_app()
+    translate(monkeypatch, app)
+    stats = bulk(app, input_path, output_path, ordered=False, offset=4)
+
+    assert sorted(read_lines(output_path)) == list(range(LINES))
+    assert stats.texts == 4
+    assert stats.next_offset == LINES
+
+
+def test_resume_ordered_run(create_app, monkeypatch, tmp_path):
+    input_path = tmp_path / "input.jsonl"
+    output_path = tmp_path / "output.jsonl"
+    write_input(input_path)
+    with output_path.open("w", encoding="utf-8") as f:
+        for line in range(3):
+            f.write(json.dumps(dict(text=f"Hola Hello {line}", line=line)) + "\n")
+
+    app = create_app()
+    translate(monkeypatch, app)
+    stats = bulk(app, input_path, output_path, ordered=True, offset=3)
+
+    assert read_lines(output_path) == list(range(LINES))
+    assert stats.texts == LINES - 3
+    assert stats.next_offset == LINES
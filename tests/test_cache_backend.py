@@ -0,0 +1,41 @@
+import pytest
+from diskcache import Cache
+from translation_tower.cache_backend.create_cache_backend import create_cache_backend
+from translation_tower.translation_cache_config import TranslationCacheConfig
+
+
+@pytest.mark.parametrize("backend", ["disk", "fanout", "memory"])
+def test_set_many(tmp_path, backend):
+    cache = create_cache_backend(
+        TranslationCacheConfig(
+            path=str(tmp_path / "translation_cache"),
+            size_limit=10 ** 9,
+            backend=backend,
+            shards=4,
+        )
+    )
+    try:
+        entries = {f"key {i}": f"value {i}".encode() for i in range(100)}
+        assert cache.set_many(entries) == 100
+        assert cache.get_many(list(entries) + ["missing"]) == entries
+        assert cache.incr("generation") == 1
+        assert cache.incr("generation") == 2
+    finally:
+        cache.close()
+
+
+def test_disk_get_many_during_a_write(tmp_path):
+    config = TranslationCacheConfig(
+        path=str(tmp_path / "translation_cache"), size_limit=10 ** 9, backend="disk"
+    )
+    cache = create_cache_backend(config)
+    writer = Cache(config.path, timeout=1)
+    try:
+        cache.set("key", b"value")
+        # Another worker holds the write lock
+        with writer.transact():
+            writer.set("other key", b"other value")
+            assert cache.get_many(["key", "missing"]) == {"key": b"value"}
+    finally:
+        writer.close()
+        cache.close()
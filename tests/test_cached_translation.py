@@ -0,0 +1,80 @@
+import pickle
+import pytest
+from translation_tower.cached_translation import (
+    CachedTranslation,
+    decode_cached_translation,
+    encode_cached_translation,
+    zstandard,
+)
+
+CACHED_TRANSLATION = CachedTranslation(
+    text="<p>Héllo wörld</p>" * 20,
+    translation="<p>Hola mundo ✓</p>" * 20,
+    source_language="EN",
+    target_language="ES",
+    translator_name="deepl",
+    translator_html_mode=True,
+    translator_fake_mode=False,
+)
+
+
+@pytest.mark.parametrize(
+    "compression",
+    [
+        "none",
+        "zlib",
+        pytest.param(
+            "zstd",
+            marks=pytest.mark.skipif(zstandard is None, reason="zstandard missing"),
+        ),
+    ],
+)
+def test_round_trip(compression):
+    value = encode_cached_translation(CACHED_TRANSLATION, compression=compression)
+
+    assert decode_cached_translation(value) == CACHED_TRANSLATION
+    if compression != "none":
+        assert len(value) < len(
+            encode_cached_translation(CACHED_TRANSLATION, compression="none")
+        )
+
+
+def test_round_trip_below_threshold():
+    short = CACHED_TRANSLATION._replace(text="Hi", translation="Hola")
+
+    value = encode_cached_translation(short, compression="zlib")
+
+    assert decode_cached_translation(value) == short
+    # Not worth compressing
+    assert b"Hola" in value
+
+
+def test_round_trip_without_source():
+    value = encode_cached_translation(CACHED_TRANSLATION, store_source=False)
+
+    decoded = decode_cached_translation(value)
+    assert decoded.translation == CACHED_TRANSLATION.translation
+    assert decoded.text is None
+    assert decoded.translator_name is None
+
+
+def test_round_trip_without_translation():
+    failed = CACHED_TRANSLATION._replace(translation=None)
+
+    assert decode_cached_translation(encode_cached_translation(failed)) == failed
+
+
+def test_decode_legacy_values():
+    # The previous versions let the cache pickle the named tuple
+    legacy = pickle.loads(pickle.dumps(CACHED_TRANSLATION))
+
+    assert decode_cached_translation(legacy) == CACHED_TRANSLATION
+    assert decode_cached_translation(tuple(CACHED_TRANSLATION)) == CACHED_TRANSLATION
+    assert decode_cached_translation(None) is None
+
+
+def test_decode_invalid_version():
+    value = encode_cached_translation(CACHED_TRANSLATION)
+
+    with pytest.raises(ValueError):
+        decode_cached_translation(b"\xff" + value[1:])
@@ -0,0 +1,70 @@
+import asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+from translation_tower.translate import fake_translate
+from translation_tower.translate.error import TranslatorError
+from translation_tower.translation_job import TranslationJob
+
+
+async def call_translator(app, monkeypatch, statuses):
+    """
+    Call the fake translator of the app, whose attempts get the given statuses
+    from a local server
+    :return: the translations and the statuses of the requests received
+    """
+    requests = list()
+
+    async def status(request: web.Request) -> web.Response:
+        requests.append(request.match_info["status"])
+        return web.Response(status=int(request.match_info["status"]))
+
+    server_app = web.Application()
+    server_app.router.add_get("/{status}", status)
+    async with TestServer(server_app) as server:
+        monkeypatch.setattr(
+            fake_translate,
+            "get_random_urls",
+            lambda: [str(server.make_url(f"/{s}")) for s in statuses],
+        )
+
+        job = TranslationJob("1", 0)
+        job.source.language = "en"
+        job.target.language = "es"
+        job.translator.name = "bing"
+        job.translator.fake_mode = True
+        job.to_translator = "Hello"
+
+        await app.start()
+        try:
+            translations = await app.call_translator(
+                [job], "1", app._limiters["bing"]
+            )
+        finally:
+            await app.stop()
+        return translations, requests
+
+
+def test_call_translator(create_app, monkeypatch):
+    app = create_app()
+    translations, requests = asyncio.run(
+        call_translator(app, monkeypatch, ["200"])
+    )
+    assert translations == ["[Fake en->es] Hello"]
+    assert requests == ["200"]
+
+
+def test_call_translator_retries_throttled_requests(create_app, monkeypatch):
+    app = create_app()
+    translations, requests = asyncio.run(
+        call_translator(app, monkeypatch, ["429", "200"])
+    )
+    assert translations == ["[Fake en->es] Hello"]
+    assert requests == ["429", "200"]
+
+
+def test_call_translator_error(create_app, monkeypatch):
+    app = create_app()
+    with pytest.raises(TranslatorError) as error:
+        asyncio.run(call_translator(app, monkeypatch, ["400"]))
+    assert error.value.status == 400
@@ -0,0 +1,103 @@
+import asyncio
+from asyncio import Event
+from translation_tower.translation_inflight import TranslationInflight
+from translation_tower.translation_job import TranslationJob
+
+
+def counting_translator(sent):
+    async def call_translator(jobs, batch_id, limiter):
+        sent.extend(job.to_translator for job in jobs)
+        await asyncio.sleep(0.05)
+        return [f"Hola {job.to_translator}" for job in jobs]
+
+    return call_translator
+
+
+def create_jobs(app, texts):
+    return app.create_jobs_from_json(
+        [
+            dict(
+                text=text,
+                source_lang="en",
+                target_lang="es",
+                translator="bing",
+                use_cache=True,
+            )
+            for text in texts
+        ],
+        app.create_request_id(),
+    )
+
+
+def test_duplicates_of_a_request(create_app, monkeypatch):
+    app = create_app()
+    sent = list()
+    monkeypatch.setattr(app, "call_translator", counting_translator(sent))
+
+    async def run():
+        await app.start()
+        try:
+            jobs = create_jobs(app, ["Hello", "Bye", "Hello", "Hello"])
+            await app.translate_jobs(jobs)
+            return jobs
+        finally:
+            await app.stop()
+
+    jobs = asyncio.run(run())
+
+    assert sorted(sent) == ["Bye", "Hello"]
+    assert [job.target.text for job in jobs] == [
+        "Hola Hello",
+        "Hola Bye",
+        "Hola Hello",
+        "Hola Hello",
+    ]
+
+
+def test_requests_coalesced_in_flight(create_app, monkeypatch):
+    app = create_app()
+    sent = list()
+    monkeypatch.setattr(app, "call_translator", counting_translator(sent))
+
+    async def run():
+        await app.start()
+        try:
+            requests = [
+                create_jobs(app, ["Hello", "Bye"]),
+                create_jobs(app, ["Bye", "Hello", "Hello"]),
+            ]
+            await asyncio.gather(*[app.translate_jobs(jobs) for jobs in requests])
+            return requests, len(app._inflight)
+        finally:
+            await app.stop()
+
+    (first, second), inflight = asyncio.run(run())
+
+    assert sorted(sent) == ["Bye", "Hello"]
+    assert [job.target.text for job in first] == ["Hola Hello", "Hola Bye"]
+    assert [job.target.text for job in second] == [
+        "Hola Bye",
+        "Hola Hello",
+        "Hola Hello",
+    ]
+    assert inflight == 0
+
+
+def test_inflight_resolve():
+    inflight = TranslationInflight()
+    leader, follower, duplicate = [TranslationJob(str(i), 0) for i in range(3)]
+    for job in [leader, follower, duplicate]:
+        job.done = Event()
+
+    assert not inflight.attach("key", follower)
+    inflight.register("key", leader)
+    assert inflight.attach("key", follower)
+    # Duplicate of the follower in its own request
+    follower.followers.append(duplicate)
+
+    leader.from_translator = "Hola"
+    inflight.resolve(leader)
+
+    assert len(inflight) == 0
+    assert follower.done.is_set() and duplicate.done.is_set()
+    assert follower.from_translator == duplicate.from_translator == "Hola"
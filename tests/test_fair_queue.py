@@ -0,0 +1,93 @@
+import asyncio
+from translation_tower.fair_queue import FairQueue
+from translation_tower.translation_job import TranslationJob
+
+
+def create_job(request_id: str, index: int, chars: int = 10, priority: int = 1):
+    job = TranslationJob(request_id, index)
+    job.to_translator = "x" * chars
+    job.priority = priority
+    return job
+
+
+def drain(queue: FairQueue):
+    jobs = list()
+    while not queue.empty():
+        jobs.append(queue.get_nowait())
+    return [(job.request_id, job.index) for job in jobs]
+
+
+def test_deficit_round_robin():
+    queue = FairQueue(maxsize=100, quantum=20)
+    for i in range(6):
+        queue.put_nowait(create_job("big", i))
+    queue.put_nowait(create_job("small", 0))
+
+    # 2 jobs of 10 chars by quantum: the small request waits 1 quantum
+    assert drain(queue) == [
+        ("big", 0),
+        ("big", 1),
+        ("small", 0),
+        ("big", 2),
+        ("big", 3),
+        ("big", 4),
+        ("big", 5),
+    ]
+
+
+def test_priority_weights_quantum():
+    queue = FairQueue(maxsize=100, quantum=10)
+    for i in range(4):
+        queue.put_nowait(create_job("low", i))
+        queue.put_nowait(create_job("high", i, priority=2))
+
+    assert drain(queue) == [
+        ("low", 0),
+        ("high", 0),
+        ("high", 1),
+        ("low", 1),
+        ("high", 2),
+        ("high", 3),
+        ("low", 2),
+        ("low", 3),
+    ]
+
+
+def test_maxsize_by_request():
+    async def run():
+        queue = FairQueue(maxsize=2)
+        for i in range(2):
+            await queue.put(create_job("big", i))
+
+        # The big request is blocked, the others are not
+        blocked = asyncio.ensure_future(queue.put(create_job("big", 2)))
+        await asyncio.wait_for(queue.put(create_job("small", 0)), 1)
+        await asyncio.sleep(0)
+        assert not blocked.done()
+
+        first = queue.get_nowait()
+        await asyncio.wait_for(blocked, 1)
+        return first, queue.qsize()
+
+    first, size = asyncio.run(run())
+    assert (first.request_id, first.index) == ("big", 0)
+    assert size == 3
+
+
+def test_remove_unwanted_jobs():
+    async def run():
+        queue = FairQueue(maxsize=2)
+        jobs = [create_job("1", i) for i in range(2)]
+        for job in jobs:
+            await queue.put(job)
+        blocked = asyncio.ensure_future(queue.put(create_job("1", 2)))
+        await asyncio.sleep(0)
+
+        jobs[0].cancelled = True
+        removed = queue.remove("1")
+        await asyncio.wait_for(blocked, 1)
+        return removed, drain(queue)
+
+    removed, remaining = asyncio.run(run())
+    assert [job.index for job in removed] == [0]
+    assert remaining == [("1", 1), ("1", 2)]
@@ -0,0 +1,84 @@
+import asyncio
+import re
+from translation_tower.annotation import Annotation
+
+
+def uppercase_translator(sent):
+    """
+    Translator that uppercases the text between the tags
+    """
+
+    async def call_translator(jobs, batch_id, limiter):
+        sent.extend(job.to_translator for job in jobs)
+        return [
+            re.sub(r"(^|>)([^<]*)", lambda m: m.group(1) + m.group(2).upper(), t)
+            for t in (job.to_translator for job in jobs)
+        ]
+
+    return call_translator
+
+
+def translate(app, text, annotations):
+    async def run():
+        await app.start()
+        try:
+            jobs = app.create_jobs_from_json(
+                [
+                    dict(
+                        text=text,
+                        source_lang="en",
+                        target_lang="es",
+                        translator="bing",
+                        use_cache=False,
+                        annotations=annotations,
+                    )
+                ],
+                app.create_request_id(),
+            )
+            await app.translate_jobs(jobs)
+            return jobs[0]
+        finally:
+            await app.stop()
+
+    return asyncio.run(run())
+
+
+TEXT = "Ana lives in Madrid.  It is nice. Paris is nice too."
+ANNOTATIONS = [
+    dict(label="PER", start=0, stop=3),
+    dict(label="LOC", start=13, stop=19),
+    dict(label="LOC", start=34, stop=39),
+]
+
+
+def test_split_annotated_text(create_app, monkeypatch):
+    app = create_app(bing_limit_chars_per_text=40)
+    sent = list()
+    monkeypatch.setattr(app, "call_translator", uppercase_translator(sent))
+
+    job = translate(app, TEXT, ANNOTATIONS)
+
+    assert len(sent) > 1
+    assert not job.error
+    assert job.target.text == TEXT.upper()
+    assert job.target.annotations == [
+        Annotation(label="PER", start=0, stop=3, origin=0),
+        Annotation(label="LOC", start=13, stop=19, origin=1),
+        Annotation(label="LOC", start=34, stop=39, origin=2),
+    ]
+
+
+def test_unsplit_annotated_text(create_app, monkeypatch):
+    app = create_app()
+    sent = list()
+    monkeypatch.setattr(app, "call_translator", uppercase_translator(sent))
+
+    job = translate(app, TEXT, ANNOTATIONS)
+
+    assert len(sent) == 1
+    assert job.target.text == TEXT.upper()
+    assert [(a.start, a.stop) for a in job.target.annotations] == [
+        (0, 3),
+        (13, 19),
+        (34, 39),
+    ]
@@ -0,0 +1,81 @@
+from translation_tower.split_text import SENTENCE, split_text
+
+
+def join(pieces):
+    return "".join(segment + separator for segment, separator in pieces)
+
+
+def test_short_text_is_not_split():
+    assert split_text("Short text", 10) == [("Short text", "")]
+
+
+def test_split_prefers_paragraphs_then_sentences():
+    text = "One two. Three four five\nSix seven. Eight nine ten."
+    pieces = split_text(text, 30)
+    assert pieces == [
+        ("One two. Three four five", "\n"),
+        ("Six seven. Eight nine ten.", ""),
+    ]
+    pieces = split_text("One two three. Four five six seven eight.", 30)
+    assert pieces == [
+        ("One two three.", " "),
+        ("Four five six seven eight.", ""),
+    ]
+
+
+def test_split_between_words():
+    text = "one two three four five six"
+    pieces = split_text(text, 10)
+    assert pieces == [("one two", " "), ("three four", " "), ("five six", "")]
+    assert all(len(segment) <= 10 for segment, _ in pieces)
+    assert join(pieces) == text
+
+
+def test_hard_cut_without_boundary():
+    text = "abcdefghijklmnopqrstuvwxyz"
+    assert split_text(text, 10) == [
+        ("abcdefghij", ""),
+        ("klmnopqrst", ""),
+        ("uvwxyz", ""),
+    ]
+
+
+def test_split_at_every_sentence():
+    text = "One. Two three four five. Six"
+    assert split_text(text, 0, level=SENTENCE) == [
+        ("One.", " "),
+        ("Two three four five.", " "),
+        ("Six", ""),
+    ]
+
+
+def test_html_mode_splits_outside_elements():
+    text = "<p>one two</p> three four <b>five six seven eight nine</b>"
+    pieces = split_text(text, 10, html_mode=True)
+    # The last element is longer than the limit, but can't be cut
+    assert pieces == [
+        ("<p>one two</p>", " "),
+        ("three four", " "),
+        ("<b>five six seven eight nine</b>", ""),
+    ]
+    assert join(pieces) == text
+
+
+def test_split_full_width_sentences():
+    text = "今日は晴れです。明日は雨でしょう！「本当？」そうです。"
+    pieces = split_text(text, 0, level=SENTENCE)
+    assert pieces == [
+        ("今日は晴れです。", ""),
+        ("明日は雨でしょう！", ""),
+        ("「本当？」", ""),
+        ("そうです。", ""),
+    ]
+    assert join(pieces) == text
+
+
+def test_split_full_width_sentences_at_limit():
+    text = "今日は晴れです。明日は雨でしょう！そうです。"
+    pieces = split_text(text, 12)
+    # At sentence ends, not hard cut at the limit
+    assert pieces == [("今日は晴れです。", ""), ("明日は雨でしょう！", ""), ("そうです。", "")]
+    assert join(pieces) == text
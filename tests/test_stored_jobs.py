@@ -0,0 +1,55 @@
+import asyncio
+from translation_tower.translation_job_store import DONE
+
+TEXTS = 120
+
+
+def test_run_stored_job(create_app, monkeypatch):
+    app = create_app(bing_limit_texts_per_request=10)
+    writes = list()
+    add_results = app.job_store.add_results
+
+    def record_add_results(job_id, translations):
+        writes.append(len(translations))
+        return add_results(job_id, translations)
+
+    monkeypatch.setattr(app.job_store, "add_results", record_add_results)
+
+    async def call_translator(jobs, batch_id, limiter):
+        await asyncio.sleep(0.01)
+        return [f"Hola {job.to_translator}" for job in jobs]
+
+    monkeypatch.setattr(app, "call_translator", call_translator)
+
+    async def run():
+        await app.start()
+        try:
+            job_id = app.create_stored_job(
+                [
+                    dict(
+                        text=f"Hello {i}",
+                        source_lang="en",
+                        target_lang="es",
+                        translator="bing",
+                        use_cache=False,
+                    )
+                    for i in range(TEXTS)
+                ]
+            )
+            await app._stored_jobs[job_id]
+            return (
+                app.job_store.get_state(job_id),
+                app.job_store.get_results(job_id, 0, TEXTS),
+            )
+        finally:
+            await app.stop()
+
+    state, results = asyncio.run(run())
+
+    assert state["status"] == DONE
+    assert state["completed"] == TEXTS
+    assert [r["index"] for r in results] == list(range(TEXTS))
+    assert results[5]["translation"] == "Hola Hello 5"
+    # Several translations by transaction
+    assert sum(writes) == TEXTS
+    assert len(writes) < TEXTS
@@ -0,0 +1,130 @@
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+from translation_tower.server_handler.translate import _stream_translations
+
+TEXTS = 200
+
+
+def create_jobs(app):
+    return app.create_jobs_from_json(
+        [
+            dict(
+                text=f"Hello {i}",
+                source_lang="en",
+                target_lang="es",
+                translator="bing",
+                use_cache=False,
+            )
+            for i in range(TEXTS)
+        ],
+        app.create_request_id(),
+    )
+
+
+def slow_translator(sent):
+    async def call_translator(jobs, batch_id, limiter):
+        sent.extend(jobs)
+        await asyncio.sleep(0.05)
+        return [f"Hola {job.to_translator}" for job in jobs]
+
+    return call_translator
+
+
+async def disconnect_mid_stream(app):
+    """
+    Stream the translations of a request, and disconnect after the first one
+    :return: the first line received, and the counters before the app stops
+    """
+    server_app = web.Application()
+    server_app.router.add_post(
+        "/translate", lambda request: _stream_translations(request, app, jobs)
+    )
+    jobs = create_jobs(app)
+
+    # Like the app server, and unlike the test server, the handler isn't cancelled
+    # on disconnection: its next write fails
+    runner = web.AppRunner(server_app, handler_cancellation=False)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+
+    await app.start()
+    try:
+        async with aiohttp.ClientSession() as client:
+            response = await client.post(f"http://{host}:{port}/translate")
+            line = await response.content.readline()
+            response.close()
+            await asyncio.sleep(0.5)
+            counters = app._metrics.to_dict()["counters"]
+    finally:
+        await app.stop()
+        await runner.cleanup()
+    return line, counters
+
+
+def test_disconnect_cancels_queued_jobs(create_app, monkeypatch):
+    app = create_app(bing_limit_texts_per_request=5, bing_limit_concurrent_request=1)
+    sent = list()
+    monkeypatch.setattr(app, "call_translator", slow_translator(sent))
+
+    line, counters = asyncio.run(disconnect_mid_stream(app))
+
+    assert line.startswith(b"{")
+    assert counters.get("cancelled_texts/bing", 0) > 0
+    assert len(sent) < TEXTS
+
+
+def test_close_cancels_queued_jobs(create_app, monkeypatch):
+    app = create_app(bing_limit_texts_per_request=5, bing_limit_concurrent_request=1)
+    sent = list()
+    monkeypatch.setattr(app, "call_translator", slow_translator(sent))
+
+    async def translate_first():
+        await app.start()
+        try:
+            translations = app.translate_jobs_as_completed(create_jobs(app))
+            job = await translations.__anext__()
+            await translations.aclose()
+            await asyncio.sleep(0.2)
+            return job, app._metrics.to_dict()["counters"]
+        finally:
+            await app.stop()
+
+    job, counters = asyncio.run(translate_first())
+
+    assert job.target.text.startswith("Hola")
+    assert counters.get("cancelled_texts/bing", 0) > 0
+    assert len(sent) < TEXTS
+
+
+def test_submit_error_after_first_translation(create_app, monkeypatch):
+    app = create_app(bing_limit_texts_per_request=5, bing_limit_concurrent_request=1)
+    monkeypatch.setattr(app, "call_translator", slow_translator(list()))
+    submit_jobs = app.submit_jobs
+
+    async def fail_after_first_job(jobs, submitted=None):
+        await submit_jobs(jobs[:1], submitted)
+        await asyncio.sleep(0.2)
+        raise RuntimeError("Cache unavailable")
+
+    monkeypatch.setattr(app, "submit_jobs", fail_after_first_job)
+
+    async def translate_all():
+        await app.start()
+        try:
+            translations = list()
+            with pytest.raises(RuntimeError):
+                async for job in app.translate_jobs_as_completed(create_jobs(app)):
+                    translations.append(job)
+                    # Submission fails meanwhile
+                    await asyncio.sleep(0.4)
+            return translations
+        finally:
+            await app.stop()
+
+    translations = asyncio.run(asyncio.wait_for(translate_all(), 5))
+
+    assert len(translations) == 1
@@ -0,0 +1,88 @@
+import asyncio
+from translation_tower.translate.error import TranslatorError
+
+TEXTS = 8
+
+
+def rejecting_translator(calls, reject):
+    """
+    Translator that rejects the batches for which `reject` returns an error
+    message
+    """
+
+    async def call_translator(jobs, batch_id, limiter):
+        texts = [job.to_translator for job in jobs]
+        calls.append((batch_id, len(texts), limiter.in_flight))
+        message = reject(texts)
+        if message is not None:
+            raise TranslatorError(message, 400)
+        return [f"Hola {text}" for text in texts]
+
+    return call_translator
+
+
+def translate(app):
+    async def run():
+        await app.start()
+        try:
+            jobs = app.create_jobs_from_json(
+                [
+                    dict(
+                        text=f"Hello {i}",
+                        source_lang="en",
+                        target_lang="es",
+                        translator="bing",
+                        use_cache=False,
+                    )
+                    for i in range(TEXTS)
+                ],
+                app.create_request_id(),
+            )
+            await app.translate_jobs(jobs)
+            return jobs, app._limiters["bing"].in_flight
+        finally:
+            await app.stop()
+
+    return asyncio.run(run())
+
+
+def test_bisect_offending_text(create_app, monkeypatch):
+    app = create_app(
+        bing_limit_texts_per_request=TEXTS, bing_limit_concurrent_request=1
+    )
+    calls = list()
+    monkeypatch.setattr(
+        app,
+        "call_translator",
+        rejecting_translator(
+            calls, lambda texts: "Invalid text" if "Hello 5" in texts else None
+        ),
+    )
+
+    jobs, in_flight = translate(app)
+
+    assert [job.error for job in jobs] == [i == 5 for i in range(TEXTS)]
+    assert jobs[0].target.text == "Hola Hello 0"
+    # 8, then 4 + 4, 2 + 2, 1 + 1: each call acquires the limiter
+    assert [size for _, size, _ in calls] == [8, 4, 4, 2, 2, 1, 1]
+    assert all(in_flight == 1 for _, _, in_flight in calls)
+    assert in_flight == 0
+
+
+def test_no_bisection_when_halves_fail_alike(create_app, monkeypatch):
+    app = create_app(
+        bing_limit_texts_per_request=TEXTS, bing_limit_concurrent_request=1
+    )
+    calls = list()
+    monkeypatch.setattr(
+        app,
+        "call_translator",
+        rejecting_translator(calls, lambda texts: "Unsupported target language"),
+    )
+
+    jobs, in_flight = translate(app)
+
+    assert all(job.error for job in jobs)
+    assert jobs[0].error_message == "Unsupported target language"
+    assert [size for _, size, _ in calls] == [8, 4, 4]
+    assert in_flight == 0
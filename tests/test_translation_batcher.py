@@ -0,0 +1,70 @@
+import asyncio
+from translation_tower.fair_queue import FairQueue
+from translation_tower.translation_batcher import TranslationBatcher
+from translation_tower.translation_job import TranslationJob
+
+
+async def batch(jobs, delay: float, max_linger: float):
+    """
+    Put jobs in a queue every `delay` seconds, and batch them
+    :return: the batches sent
+    """
+    queue = FairQueue()
+    batches = list()
+
+    async def send(batch_jobs, fill_ratio):
+        batches.append(batch_jobs)
+
+    batcher = TranslationBatcher(
+        queue=queue,
+        limit_texts_per_request=50,
+        limit_chars_per_request=5000,
+        max_linger=max_linger,
+        send=send,
+        idle_timeout=0.2,
+        drop=lambda dropped: None,
+    )
+    run = asyncio.ensure_future(batcher.run())
+    for job in jobs:
+        await queue.put(job)
+        await asyncio.sleep(delay)
+    await run
+    return batches
+
+
+def create_jobs(count: int, queued_at: float):
+    jobs = list()
+    for i in range(count):
+        job = TranslationJob("1", i)
+        job.to_translator = f"Text {i}"
+        job.queued_at = queued_at
+        jobs.append(job)
+    return jobs
+
+
+def test_batcher_lingers_for_more_jobs():
+    async def run():
+        jobs = create_jobs(10, asyncio.get_running_loop().time())
+        return jobs, await batch(jobs, delay=0.005, max_linger=0.5)
+
+    jobs, batches = asyncio.run(run())
+    assert batches == [jobs]
+
+
+def test_batcher_linger_ignores_time_spent_in_queue():
+    async def run():
+        # Jobs that waited in the queue longer than the linger
+        jobs = create_jobs(10, asyncio.get_running_loop().time() - 10)
+        return jobs, await batch(jobs, delay=0.005, max_linger=0.5)
+
+    jobs, batches = asyncio.run(run())
+    assert batches == [jobs]
+
+
+def test_batcher_sends_at_linger_deadline():
+    async def run():
+        jobs = create_jobs(3, asyncio.get_running_loop().time())
+        return jobs, await batch(jobs, delay=0.1, max_linger=0.01)
+
+    jobs, batches = asyncio.run(run())
+    assert batches == [[job] for job in jobs]
@@ -0,0 +1,39 @@
+import asyncio
+from translation_tower.cached_translation import CachedTranslation
+from translation_tower.translation_cache import CULL_INTERVAL, TranslationCache
+from translation_tower.translation_cache_config import TranslationCacheConfig
+
+
+def test_set_many_culls_every_interval(tmp_path):
+    cache = TranslationCache(
+        TranslationCacheConfig(
+            path=str(tmp_path / "translation_cache"),
+            size_limit=10 ** 9,
+            backend="memory",
+            threads=8,
+        )
+    )
+    culls = list()
+    cache._cache.cull = lambda: culls.append(1) or 1
+
+    async def set_many():
+        for i in range(CULL_INTERVAL * 10):
+            cache.set_many(
+                [
+                    CachedTranslation(
+                        text=f"Hello {i}",
+                        translation=f"Hola {i}",
+                        source_language="en",
+                        target_language="es",
+                        translator_name="bing",
+                        translator_html_mode=False,
+                        translator_fake_mode=False,
+                    )
+                ]
+            )
+        await cache.close()
+
+    asyncio.run(set_many())
+
+    assert len(culls) == 10
+    assert cache._metrics.to_dict()["counters"]["cache/disk/evictions"] == 10
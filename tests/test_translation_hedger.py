@@ -0,0 +1,52 @@
+import asyncio
+from translation_tower.metrics import Metrics
+from translation_tower.translation_hedger import TranslationHedger
+from translation_tower.translation_limiter import TranslationLimiter
+
+
+async def hedge_slow_call(max_concurrent_requests):
+    """
+    Call a translator whose first request is slow, once the hedger knows the
+    latency of a fast request
+    :return: the translations, the hedged calls, the requests in flight after
+    the call and the metrics
+    """
+    metrics = Metrics()
+    limiter = TranslationLimiter("fake", max_concurrent_requests, 0, 0, 5000, metrics)
+    hedger = TranslationHedger(percentile=50, budget=1, metrics=metrics, min_samples=1)
+    hedges = list()
+    primaries = list()
+
+    async def call(hedge):
+        if hedge:
+            hedges.append(limiter.in_flight)
+        else:
+            primaries.append(limiter.in_flight)
+            await asyncio.sleep(0.01 if len(primaries) == 1 else 0.3)
+        return ["Hola"]
+
+    for _ in range(2):
+        await limiter.acquire(4)
+        translations = await hedger.call("fake", 4, call, limiter)
+        in_flight = limiter.in_flight
+        await limiter.release(True)
+    return translations, hedges, in_flight, metrics.to_dict()["counters"]
+
+
+def test_hedge_acquires_limiter():
+    translations, hedges, in_flight, counters = asyncio.run(hedge_slow_call(2))
+    assert translations == ["Hola"]
+    # Sent with the primary call in flight, and released
+    assert hedges == [2]
+    assert in_flight == 1
+    assert counters["hedges_fired/fake"] == 1
+    assert counters["hedges_won/fake"] == 1
+
+
+def test_hedge_skipped_when_limiter_is_full():
+    translations, hedges, in_flight, counters = asyncio.run(hedge_slow_call(1))
+    assert translations == ["Hola"]
+    assert hedges == []
+    assert in_flight == 1
+    assert counters["hedges_limited/fake"] == 1
+    assert "hedges_fired/fake" not in counters
@@ -0,0 +1,59 @@
+import time
+from translation_tower.translation_job_store import (
+    DONE,
+    FAILED,
+    RUNNING,
+    TranslationJobStore,
+)
+
+
+def test_unfinished(tmp_path):
+    store = TranslationJobStore(str(tmp_path), retention=0)
+    pending, running, done, failed, deleted = [
+        store.create([dict(text="Hello")], 1) for _ in range(5)
+    ]
+    store.set_status(running, RUNNING)
+    store.set_status(done, DONE)
+    store.set_status(failed, FAILED, detail="Translator unavailable")
+    store.delete(deleted)
+
+    assert store.unfinished() == sorted([pending, running])
+    store.close()
+
+    # Kept on disk
+    store = TranslationJobStore(str(tmp_path), retention=0)
+    assert store.unfinished() == sorted([pending, running])
+    store.close()
+
+
+def test_finished_jobs_expire(tmp_path):
+    store = TranslationJobStore(str(tmp_path), retention=0.1)
+    done, running = [store.create([dict(text="Hello")], 1) for _ in range(2)]
+    for job_id in [done, running]:
+        store.set_status(job_id, RUNNING)
+        store.add_results(job_id, {0: dict(text="Hola")})
+    store.set_status(done, DONE)
+
+    time.sleep(0.2)
+
+    assert store.unfinished() == [running]
+    assert store.get_state(done) is None
+    assert store.get_results(done, 0, 1) == []
+    assert store.get_state(running)["completed"] == 1
+    assert store.get_results(running, 0, 1) == [dict(text="Hola", index=0)]
+    store.close()
+
+
+def test_add_results(tmp_path):
+    store = TranslationJobStore(str(tmp_path), retention=0)
+    job_id = store.create([dict(text=f"Hello {i}") for i in range(3)], 1)
+
+    assert store.add_results(job_id, {0: dict(text="Hola 0"), 2: dict(error="x")})
+    assert store.add_results(job_id, {2: dict(text="Hola 2")})
+
+    assert store.get_state(job_id)["completed"] == 2
+    assert store.get_state(job_id)["errors"] == 1
+    assert store.completed_indexes(job_id, 3) == [0, 2]
+    store.delete(job_id)
+    assert not store.add_results(job_id, {1: dict(text="Hola 1")})
+    store.close()
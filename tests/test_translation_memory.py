@@ -0,0 +1,78 @@
+import asyncio
+from translation_tower.translation_cache import GENERATION_KEY, TranslationCache
+from translation_tower.translation_cache_config import TranslationCacheConfig
+from translation_tower.translation_memory import (
+    cached_translation_from_dict,
+    create_cached_translation,
+    export_translations,
+    import_translations,
+    read_jsonl,
+    read_tmx,
+)
+from translation_tower.translator import Translator
+
+TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<tmx version="1.4">
+  <header srclang="en-GB" datatype="plaintext"/>
+  <body>
+    <tu>
+      <tuv xml:lang="en-GB"><seg>Hello <hi>world</hi><ph>&lt;br/&gt;</ph>!</seg></tuv>
+      <tuv xml:lang="es-ES"><seg>Hola <hi>mundo</hi><ph>&lt;br/&gt;</ph>!</seg></tuv>
+    </tu>
+    <tu>
+      <tuv xml:lang="en"><seg>Only English</seg></tuv>
+      <tuv xml:lang="fr"><seg>Seulement en français</seg></tuv>
+    </tu>
+    <tu>
+      <tuv lang="EN"><seg>Goodbye</seg></tuv>
+      <tuv lang="es"><seg>Adiós</seg></tuv>
+    </tu>
+  </body>
+</tmx>
+"""
+
+
+def create_cache(tmp_path) -> TranslationCache:
+    return TranslationCache(
+        TranslationCacheConfig(
+            path=str(tmp_path / "translation_cache"),
+            size_limit=10 ** 9,
+            backend="memory",
+        )
+    )
+
+
+def test_read_tmx(tmp_path):
+    path = tmp_path / "memory.tmx"
+    path.write_text(TMX, encoding="utf-8")
+
+    assert list(read_tmx(path, "en", "es")) == [
+        ("Hello world!", "Hola mundo!"),
+        ("Goodbye", "Adiós"),
+    ]
+    assert list(read_tmx(path, "en-gb", "es-ES")) == [("Hello world!", "Hola mundo!")]
+
+
+def test_import_and_export(tmp_path):
+    translator = Translator(name="deepl", html_mode=False, fake_mode=False)
+    translations = [
+        create_cached_translation(f"Hello {i}", f"Hola {i}", "EN", "ES", translator)
+        for i in range(5)
+    ]
+
+    cache = create_cache(tmp_path)
+    try:
+        assert import_translations(cache, translations, batch_size=2) == 5
+        # The memory tiers of the workers are invalidated
+        assert cache._cache.get(GENERATION_KEY) == 1
+        assert (
+            cache.get("Hello 3", "EN", "ES", translator).translation == "Hola 3"
+        )
+
+        path = tmp_path / "export.jsonl"
+        assert export_translations(cache, path) == 5
+        exported = [cached_translation_from_dict(d) for d in read_jsonl(path)]
+    finally:
+        asyncio.run(cache.close())
+
+    assert sorted(exported) == sorted(translations)
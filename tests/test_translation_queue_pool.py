@@ -0,0 +1,39 @@
+import asyncio
+from translation_tower.metrics import Metrics
+from translation_tower.translation_batcher import TranslationBatcher
+from translation_tower.translation_job import TranslationJob
+from translation_tower.translation_queue_pool import TranslationQueuePool
+
+
+def test_get_reaps_queue_idle_before_its_timeout():
+    sent = list()
+
+    async def send(jobs, fill_ratio):
+        sent.extend(jobs)
+
+    def create_batcher(queue, translator):
+        return TranslationBatcher(
+            queue=queue,
+            limit_texts_per_request=50,
+            limit_chars_per_request=5000,
+            max_linger=0.01,
+            send=send,
+            idle_timeout=60,
+            drop=lambda dropped: None,
+        )
+
+    async def run():
+        pool = TranslationQueuePool(create_batcher, max_queues=1, metrics=Metrics())
+        try:
+            job = TranslationJob("1", 0)
+            job.to_translator = "Hello"
+            await (await pool.get("en-es", None)).put(job)
+
+            # Waits until the job is sent, not until the reader times out
+            await asyncio.wait_for(pool.get("en-fr", None), 2)
+            return list(pool._queues)
+        finally:
+            await pool.stop()
+
+    assert asyncio.run(run()) == ["en-fr"]
+    assert len(sent) == 1
@@ -0,0 +1,12 @@
+import pytest
+from translation_tower.translate.error import TranslatorError
+
+
+@pytest.mark.parametrize("status", [400, 413, 422])
+def test_may_be_caused_by_texts(status):
+    assert TranslatorError("Rejected", status).may_be_caused_by_texts
+
+
+@pytest.mark.parametrize("status", [None, 401, 403, 429, 456, 500, 502, 503, 504])
+def test_not_caused_by_texts(status):
+    assert not TranslatorError("Failed", status).may_be_caused_by_texts
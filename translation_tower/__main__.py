@@ -0,0 +1,399 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+from pathlib import Path
+from typing import Dict, Optional
+from translation_tower.translation_app import TranslationApp
+from translation_tower.translation_limiter import (
+    SharedLimiterState,
+    create_shared_limiter_state,
+)
+from translation_tower.bulk_translation import bulk_translate
+from translation_tower.translation_cache import TranslationCache
+from translation_tower.translation_cache_config import TranslationCacheConfig
+from translation_tower.translator import Translator
+from translation_tower.language import Language
+from translation_tower.translation_memory import (
+    read_tmx,
+    read_jsonl,
+    import_translations,
+    export_translations,
+    cached_translation_from_dict,
+    create_cached_translation,
+)
+from translation_tower.server import Server
+from translation_tower.server_config import ServerConfig
+from translation_tower.logger import logger, logger_default_policy
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+def create_app(
+    args,
+    shared_limiter_states: Optional[Dict[str, SharedLimiterState]] = None,
+    resume_stored_jobs: bool = True,
+) -> TranslationApp:
+    config = Path(args.config)
+    return TranslationApp(
+        cache_config=config / "cache.yaml",
+        translation_app_config=config / "translation_app.yaml",
+        language_config=config / "languages.csv",
+        secret_config=config / "secret.yaml",
+        shared_limiter_states=shared_limiter_states,
+        resume_stored_jobs=resume_stored_jobs,
+    )
+
+
+def serve(args):
+    config = ServerConfig.load(Path(args.config) / "server.yaml")
+    if args.workers <= 1:
+        asyncio.run(run_server(args, config))
+        return
+
+    # Workers listen on the same port and share the limits of the translators
+    shared_limiter_states = {
+        translator: create_shared_limiter_state() for translator in ("bing", "deepl")
+    }
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(
+            target=run_worker,
+            args=(args, config, shared_limiter_states, index),
+            name=f"translation_tower-worker-{index}",
+        )
+        for index in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def stop_workers(*_):
+        for w in workers:
+            if w.is_alive():
+                w.terminate()
+
+    signal.signal(signal.SIGTERM, stop_workers)
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        # Workers received the SIGINT too
+        for worker in workers:
+            worker.join()
+
+
+def run_worker(
+    args,
+    config: ServerConfig,
+    shared_limiter_states: Dict[str, SharedLimiterState],
+    index: int,
+):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        asyncio.run(run_server(args, config, shared_limiter_states, index))
+    except KeyboardInterrupt:
+        pass
+
+
+async def run_server(
+    args,
+    config: ServerConfig,
+    shared_limiter_states: Optional[Dict[str, SharedLimiterState]] = None,
+    index: int = 0,
+):
+    """
+    Run a server until SIGINT or SIGTERM
+    :param args:
+    :param config:
+    :param shared_limiter_states: None when the server runs in a single process
+    :param index: index of the worker, the first one resumes the stored jobs
+    :return:
+    """
+    app = create_app(args, shared_limiter_states, resume_stored_jobs=index == 0)
+    server = await Server.create(
+        config, app, reuse_port=shared_limiter_states is not None
+    )
+    await server.site.start()
+    logger.info(f"Worker {index} listening on {config.host}:{config.port}")
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stopped.set)
+    try:
+        await stopped.wait()
+    finally:
+        logger.info(f"Stop worker {index}")
+        await server.stop()
+
+
+def bulk(args):
+    asyncio.run(run_bulk(args))
+
+
+async def run_bulk(args):
+    app = create_app(args)
+    await app.start()
+    try:
+        defaults = dict()
+        for field in ("source_lang", "target_lang", "translator"):
+            if getattr(args, field) is not None:
+                defaults[field] = getattr(args, field)
+        if args.fake:
+            defaults["translator_fake_mode"] = True
+
+        stats = await bulk_translate(
+            app,
+            Path(args.input),
+            Path(args.output),
+            ordered=not args.unordered,
+            max_in_flight=args.max_in_flight,
+            offset=args.offset,
+            priority=args.priority,
+            defaults=defaults,
+            report_interval=args.report_interval,
+        )
+        print(stats)
+
+    finally:
+        await app.stop()
+
+
+def create_cache(args) -> TranslationCache:
+    return TranslationCache(
+        TranslationCacheConfig.load(Path(args.config) / "cache.yaml")
+    )
+
+
+def cache_import(args):
+    asyncio.run(run_cache_import(args))
+
+
+async def run_cache_import(args):
+    cache = create_cache(args)
+    try:
+        path = Path(args.input)
+        file_format = args.format or path.suffix.lstrip(".").lower()
+        translator = Translator(name=args.translator, html_mode=args.html_mode)
+        language = Language(Path(args.config) / "languages.csv")
+
+        def translator_languages(source_lang, target_lang):
+            if translator.name is None:
+                raise ValueError("--translator is required to import this file")
+            return (
+                language.get(source_lang, translator.name),
+                language.get(target_lang, translator.name, for_translation=True),
+            )
+
+        if file_format == "tmx":
+            source_language, target_language = translator_languages(
+                args.source_lang, args.target_lang
+            )
+            translations = (
+                create_cached_translation(
+                    text, translation, source_language, target_language, translator
+                )
+                for text, translation in read_tmx(
+                    path, args.source_lang, args.target_lang
+                )
+            )
+
+        elif file_format == "jsonl":
+
+            def from_dict(d):
+                # Exported cache
+                if "translator_name" in d:
+                    return cached_translation_from_dict(d)
+                # Translation memory
+                source_language, target_language = translator_languages(
+                    d.get("source_lang", args.source_lang),
+                    d.get("target_lang", args.target_lang),
+                )
+                return create_cached_translation(
+                    d["text"],
+                    d["translation"],
+                    source_language,
+                    target_language,
+                    translator,
+                )
+
+            translations = map(from_dict, read_jsonl(path))
+
+        else:
+            raise ValueError(f"Invalid translation memory format {file_format}")
+
+        count = import_translations(cache, translations, args.batch_size)
+        print(f"{count} translations imported")
+
+    finally:
+        await cache.close()
+
+
+def cache_export(args):
+    asyncio.run(run_cache_export(args))
+
+
+async def run_cache_export(args):
+    cache = create_cache(args)
+    try:
+        count = export_translations(cache, Path(args.output))
+        print(f"{count} translations exported")
+    finally:
+        await cache.close()
+
+
+def cache_compact(args):
+    asyncio.run(run_cache_compact(args))
+
+
+async def run_cache_compact(args):
+    cache = create_cache(args)
+    try:
+        rewritten, size_before, size_after = cache.compact(args.batch_size)
+        print(
+            f"{rewritten} cached translations rewritten, values use "
+            f"{size_after} bytes instead of {size_before} "
+            f"({size_before - size_after} bytes saved)"
+        )
+        if not args.no_vacuum:
+            volume_before, volume_after = cache.vacuum()
+            print(
+                f"Vacuum: the cache uses {volume_after} bytes instead of "
+                f"{volume_before} ({volume_before - volume_after} bytes saved)"
+            )
+    finally:
+        await cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m translation_tower")
+    parser.add_argument(
+        "--config", default="data/config", help="directory of the config files"
+    )
+    parser.add_argument("--log", default="data/log.log", help="log file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Serve
+    serve_parser = commands.add_parser("serve", help="run the translation server")
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes listening on the port (SO_REUSEPORT)",
+    )
+    serve_parser.add_argument(
+        "--uvloop", action="store_true", help="run the event loop with uvloop"
+    )
+    serve_parser.set_defaults(run=serve)
+
+    # Bulk
+    bulk_parser = commands.add_parser(
+        "bulk", help="translate a JSONL file of text items to a JSONL file"
+    )
+    bulk_parser.add_argument("input", help="JSONL file, one text item by line")
+    bulk_parser.add_argument("output", help="JSONL file, one translation by line")
+    bulk_parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="write the translations as soon as they complete",
+    )
+    bulk_parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=1000,
+        help="max number of texts read and not yet written",
+    )
+    bulk_parser.add_argument(
+        "--offset",
+        type=int,
+        default=0,
+        help=(
+            "resume an interrupted run from the logged next offset: skip the first "
+            "lines and append to output. With --unordered, the lines after the "
+            "offset already in output are not translated again"
+        ),
+    )
+    bulk_parser.add_argument("--priority", type=int, default=1)
+    bulk_parser.add_argument("--source-lang", help="default source language")
+    bulk_parser.add_argument("--target-lang", help="default target language")
+    bulk_parser.add_argument(
+        "--translator", choices=["bing", "deepl"], help="default translator"
+    )
+    bulk_parser.add_argument(
+        "--fake", action="store_true", help="fake mode by default, no translator call"
+    )
+    bulk_parser.add_argument(
+        "--report-interval",
+        type=float,
+        default=10.0,
+        help="seconds between two progress logs",
+    )
+    bulk_parser.add_argument(
+        "--uvloop", action="store_true", help="run the event loop with uvloop"
+    )
+    bulk_parser.set_defaults(run=bulk)
+
+    # Cache
+    cache_parser = commands.add_parser("cache", help="manage the translation cache")
+    cache_commands = cache_parser.add_subparsers(dest="cache_command", required=True)
+
+    import_parser = cache_commands.add_parser(
+        "import", help="load a TMX or JSONL translation memory in the cache"
+    )
+    import_parser.add_argument("input", help="TMX or JSONL file")
+    import_parser.add_argument(
+        "--format", choices=["tmx", "jsonl"], help="format, from the suffix by default"
+    )
+    import_parser.add_argument(
+        "--translator",
+        choices=["bing", "deepl"],
+        help="translator whose cache keys are used (not needed for exported caches)",
+    )
+    import_parser.add_argument("--source-lang", help="source language")
+    import_parser.add_argument("--target-lang", help="target language")
+    import_parser.add_argument(
+        "--html-mode", action="store_true", help="the texts are html"
+    )
+    import_parser.add_argument(
+        "--batch-size", type=int, default=1000, help="translations by transaction"
+    )
+    import_parser.set_defaults(run=cache_import)
+
+    export_parser = cache_commands.add_parser(
+        "export", help="stream the cache to a JSONL file"
+    )
+    export_parser.add_argument("output", help="JSONL file")
+    export_parser.set_defaults(run=cache_export)
+
+    compact_parser = cache_commands.add_parser(
+        "compact",
+        help="rewrite the cache in the current value format and vacuum it (offline)",
+    )
+    compact_parser.add_argument(
+        "--batch-size", type=int, default=1000, help="values by transaction"
+    )
+    compact_parser.add_argument(
+        "--no-vacuum", action="store_true", help="don't vacuum the SQLite database"
+    )
+    compact_parser.set_defaults(run=cache_compact)
+
+    args = parser.parse_args()
+
+    # Logger
+    logger_default_policy(logging.getLogger(), file=args.log)
+
+    # Event loop
+    if getattr(args, "uvloop", False):
+        if uvloop is None:
+            parser.error("uvloop is not installed")
+        uvloop.install()
+
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,55 @@
+import re
+import sys
+from collections import defaultdict
+from html.entities import html5 as html5_entities
 from typing import List, Tuple, Dict
-from itertools import groupby
-from typing import Optional, Set
+from typing import Iterator, Optional, Set, Union
 from lxml import etree
 from lxml.html import html5parser
 from itertools import chain
-import functools
-import operator
 from translation_tower.annotation import Annotation
 
+# Annotations ids (in ascending order) by tag id, and annotation labels by id.
+# Tuples rather than sets: unpickled sets may iterate in another order.
+AnnotationRebuild = Tuple[Dict[str, Tuple[int, ...]], Dict[int, str]]
+
+# Same chars as str.isspace
+_SPACES = re.compile(r"\s+")
+
+# Tags of `annotated_text_to_html`
+_TAG = re.compile(
+    r"""<b[ \t\n]+id[ \t\n]*=[ \t\n]*(?:"([^"&]*)"|'([^'&]*)'|([^ \t\n"'=<>`&/]+))"""
+    r"""[ \t\n]*>|</b[ \t\n]*>""",
+    re.IGNORECASE,
+)
+_CHAR_REFERENCE = re.compile(
+    r"&(?:([a-zA-Z][a-zA-Z0-9]*)|#([0-9]+)|#[xX]([0-9a-fA-F]+));"
+)
+
+# Chars that the html5 parser replaces or drops
+_UNSAFE_CHARS = re.compile("[\x00-\x08\x0b-\x1f\x7f-\x9f\ud800-\udfff\ufffe\uffff]")
+
+# `<p>` of `annotated_text_to_html`, as a translator returns it
+_PARAGRAPH = re.compile(r"\s*<p[ \t\n]*>(.*)</p[ \t\n]*>\s*", re.IGNORECASE | re.DOTALL)
+
 
 def annotated_text_to_html(
     text: str,
     annotations: List[Annotation],
-) -> Tuple[str, Tuple[Dict[str, Set[int]], Dict[int, str]]]:
+) -> Tuple[str, AnnotationRebuild]:
     """
     :param text:
     :param annotations:
     :return: (xml, rebuild)
     """
-    #  For each char of the text, get the set of annotations that the char belong to
-    chars: List[
-        Tuple[int, str, Optional[Set[int]]]
-    ] = list()  # (char index, char, set of annotations (a set of annotations ids))
-    for i, c in enumerate(text):
-        if not c.isspace():
-            annotations_set = set()
-            for annotation_id, annotation in enumerate(annotations):
-                if annotation.start <= i < annotation.stop:
-                    annotations_set.add(annotation_id)
-            if annotations_set:
-                chars.append((i, c, annotations_set))
-            else:
-                chars.append((i, c, None))
-        else:
-            chars.append((i, c, None))
-
     tag_id = 0
     root = etree.Element("p")
-    tag_id_to_annotations_set = dict()
+    tag_id_to_annotations_ids = dict()
 
-    #  Group the consecutive chars that share a same set of annotations
-    for set_of_annotations, chars in groupby(chars, key=lambda ch: ch[2]):
-        chars = list(chars)
-        text_part = text[chars[0][0] : chars[-1][0] + 1]
-        if set_of_annotations:
+    #  Consecutive chars that share a same set of annotations
+    for annotations_ids, start, stop in _annotated_parts(text, annotations):
+        text_part = text[start:stop]
+        if annotations_ids:
             # Create a child element
             tag = etree.Element("b")
             tag.set("id", str(tag_id))
@@ -51,7 +57,7 @@ def annotated_text_to_html(
             root.append(tag)
 
             # Save relation between tag id and annotations
-            tag_id_to_annotations_set[str(tag_id)] = set_of_annotations
+            tag_id_to_annotations_ids[str(tag_id)] = annotations_ids
 
             tag_id += 1
         else:
@@ -69,66 +75,274 @@ def annotated_text_to_html(
     return (
         str(etree.tostring(root, encoding="unicode")),
         (
-            tag_id_to_annotations_set,
+            tag_id_to_annotations_ids,
             annotation_id_to_label,
         ),
     )
 
 
+def _annotated_parts(
+    text: str, annotations: List[Annotation]
+) -> Iterator[Tuple[Optional[Tuple[int, ...]], int, int]]:
+    """
+    Split a text in parts of consecutive chars that share a same set of
+    annotations. Whitespace belongs to no annotation.
+
+    The set of annotations only changes at the boundaries of the annotations:
+    they are swept in order, and the text between two boundaries is only split
+    at whitespace.
+
+    :param text:
+    :param annotations:
+    :return: (annotations ids or None, start, stop) for each part
+    """
+    # Annotations starting and stopping at each boundary
+    starts = defaultdict(list)
+    stops = defaultdict(list)
+    for annotation_id, annotation in enumerate(annotations):
+        start = max(0, annotation.start)
+        stop = min(len(text), annotation.stop)
+        if start < stop:
+            starts[start].append(annotation_id)
+            stops[stop].append(annotation_id)
+    boundaries = sorted(set(chain([0, len(text)], starts, stops)))
+
+    part = None
+    active = set()
+    for boundary, next_boundary in zip(boundaries, boundaries[1:]):
+        active.difference_update(stops.get(boundary, ()))
+        active.update(starts.get(boundary, ()))
+
+        if not active:
+            runs = [(None, boundary, next_boundary)]
+        else:
+            annotations_ids = tuple(sorted(active))
+            runs = list()
+            position = boundary
+            for space in _SPACES.finditer(text, boundary, next_boundary):
+                if space.start() > position:
+                    runs.append((annotations_ids, position, space.start()))
+                runs.append((None, space.start(), space.end()))
+                position = space.end()
+            if position < next_boundary:
+                runs.append((annotations_ids, position, next_boundary))
+
+        for run in runs:
+            if part is not None and part[0] == run[0]:
+                part = (part[0], part[1], run[2])
+            else:
+                if part is not None:
+                    yield part
+                part = run
+
+    if part is not None:
+        yield part
+
+
 def html_to_annotated_text(
-    html: str, rebuild: Tuple[Dict[str, Set[int]], Dict[int, str]]
+    html: str, rebuild: AnnotationRebuild
 ) -> Tuple[str, List[Annotation]]:
+    """
+    :param html: translated html of `annotated_text_to_html`
+    :param rebuild:
+    :return: (text, annotations)
+    """
     # Create useful objects to rebuild annotations
-    element_id_to_annotation_set, annotation_id_to_label = rebuild
+    element_id_to_annotations_ids, annotation_id_to_label = rebuild
+
+    # The html5 parser is only needed when the translator changed the markup
+    text_parts = _tokenize_html(html)
+    if text_parts is None:
+        text_parts = _parse_html(html)
 
-    chars = list()
     char_index = 0
     all_annotations_ids = set()
+    # Consecutive non space chars of each annotation: (start, stop) by id
+    open_runs: Dict[int, List[int]] = dict()
+    runs: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
 
-    root = html5parser.fragment_fromstring(html, create_parent=True)
-    for element in root.iter():
-        for text, is_text in [(element.text, True), (element.tail, False)]:
-            if text:
-                element_ids = _get_ancestors_ids(element, include_element=is_text)
-                annotations_ids = set()
-                for element_id in element_ids:
-                    if element_id in element_id_to_annotation_set:
-                        annotations_ids = annotations_ids.union(
-                            element_id_to_annotation_set[element_id]
-                        )
-                all_annotations_ids = all_annotations_ids.union(annotations_ids)
-                for char in text:
-                    if char.isspace():
-                        chars.append((char_index, char, set()))
-                    else:
-                        chars.append((char_index, char, annotations_ids))
-                    char_index += 1
+    for text, element_ids in text_parts:
+        annotations_ids = set()
+        for element_id in element_ids:
+            if element_id in element_id_to_annotations_ids:
+                annotations_ids = annotations_ids.union(
+                    set(element_id_to_annotations_ids[element_id])
+                )
+        # The annotations are ordered as this set iterates
+        all_annotations_ids = all_annotations_ids.union(annotations_ids)
+
+        # Spaces neither belong to an annotation nor interrupt it
+        stripped = text.lstrip()
+        if stripped:
+            first = char_index + len(text) - len(stripped)
+            stop = char_index + len(text.rstrip())
+            for index in [i for i in open_runs if i not in annotations_ids]:
+                runs[index].append(tuple(open_runs.pop(index)))
+            for index in annotations_ids:
+                if index in open_runs:
+                    open_runs[index][1] = stop
+                else:
+                    open_runs[index] = [first, stop]
+        char_index += len(text)
+
+    for index, run in open_runs.items():
+        runs[index].append(tuple(run))
 
     # Extract text
-    text = functools.reduce(operator.add, map(lambda c: c[1], chars))
+    text = "".join(part for part, _ in text_parts)
 
     # Extract annotations
     annotations = list()
-    non_space_chars = list(filter(lambda c: not c[1].isspace(), chars))
-
     for index in all_annotations_ids:
-        for is_char_involved_in_annotation, chars in groupby(
-            non_space_chars, key=lambda c: True if index in c[2] else False
-        ):
-            if is_char_involved_in_annotation:
-                chars = list(chars)
-                annotations.append(
-                    Annotation(
-                        label=annotation_id_to_label[index],
-                        start=chars[0][0],
-                        stop=chars[-1][0] + 1,
-                        origin=index,
-                    )
+        for start, stop in runs[index]:
+            annotations.append(
+                Annotation(
+                    label=annotation_id_to_label[index],
+                    start=start,
+                    stop=stop,
+                    origin=index,
                 )
+            )
 
     return text, annotations
 
 
+def unwrap_paragraph(html: str) -> str:
+    """
+    :param html: html of `annotated_text_to_html`, or its translation
+    :return: the content of its `<p>`, or the html itself if it isn't wrapped
+    """
+    match = _PARAGRAPH.fullmatch(html)
+    return match.group(1) if match is not None else html
+
+
+def annotated_texts_to_html(
+    texts: List[Tuple[str, List[Annotation]]]
+) -> List[Tuple[str, AnnotationRebuild]]:
+    """
+    `annotated_text_to_html` of several texts, in a single call of a process pool
+    :param texts: (text, annotations)
+    :return: (xml, rebuild) of each text
+    """
+    return [annotated_text_to_html(text, annotations) for text, annotations in texts]
+
+
+def htmls_to_annotated_texts(
+    htmls: List[Tuple[str, AnnotationRebuild]]
+) -> List[Union[Tuple[str, List[Annotation]], Exception]]:
+    """
+    `html_to_annotated_text` of several htmls, in a single call of a process pool
+    :param htmls: (html, rebuild)
+    :return: (text, annotations) of each html, or the exception raised by its
+    conversion
+    """
+    annotated_texts = list()
+    for html, rebuild in htmls:
+        try:
+            annotated_texts.append(html_to_annotated_text(html, rebuild))
+        except Exception as e:
+            annotated_texts.append(e)
+    return annotated_texts
+
+
+def _tokenize_html(html: str) -> Optional[List[Tuple[str, Set[str]]]]:
+    """
+    Read the markup of `annotated_text_to_html`: a `<p>` holding text and
+    `<b id>` elements that only hold text, as the html5 parser would
+    :param html:
+    :return: the text parts with the ids of their element, None if the markup is
+    anything else
+    """
+    if html[:3].lower() != "<p>" or html[-4:].lower() != "</p>":
+        return None
+    if _UNSAFE_CHARS.search(html):
+        return None
+
+    text_parts = list()
+    element_id = None
+    position = 3
+    end = len(html) - 4
+    for tag in _TAG.finditer(html, position, end):
+        if not _add_text_part(text_parts, html[position : tag.start()], element_id):
+            return None
+        if tag.lastindex is None:
+            # </b>
+            if element_id is None:
+                return None
+            element_id = None
+        else:
+            if element_id is not None:
+                return None
+            element_id = tag.group(tag.lastindex)
+        position = tag.end()
+
+    if element_id is not None:
+        return None
+    if not _add_text_part(text_parts, html[position:end], element_id):
+        return None
+    return text_parts
+
+
+def _add_text_part(
+    text_parts: List[Tuple[str, Set[str]]], text: str, element_id: Optional[str]
+) -> bool:
+    if not text:
+        return True
+    if "<" in text:
+        return False
+    text = _unescape(text)
+    if text is None:
+        return False
+    text_parts.append((text, set() if element_id is None else {element_id}))
+    return True
+
+
+def _unescape(text: str) -> Optional[str]:
+    """
+    Replace the character references that the html5 parser replaces the same way
+    :param text:
+    :return: None if the text has another reference or a bare "&"
+    """
+    if "&" not in text:
+        return text
+    parts = list()
+    position = 0
+    for reference in _CHAR_REFERENCE.finditer(text):
+        if "&" in text[position : reference.start()]:
+            return None
+        name, decimal, hexadecimal = reference.groups()
+        if name is not None:
+            char = html5_entities.get(name + ";")
+        else:
+            code = int(decimal) if decimal is not None else int(hexadecimal, 16)
+            char = chr(code) if code <= sys.maxunicode else None
+        if char is None or _UNSAFE_CHARS.search(char):
+            return None
+        parts.append(text[position : reference.start()])
+        parts.append(char)
+        position = reference.end()
+    if "&" in text[position:]:
+        return None
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def _parse_html(html: str) -> List[Tuple[str, Set[str]]]:
+    """
+    Parse any html with the html5 parser
+    :param html:
+    :return: the text parts with the ids of their element and its ancestors
+    """
+    text_parts = list()
+    root = html5parser.fragment_fromstring(html, create_parent=True)
+    for element in root.iter():
+        for text, is_text in [(element.text, True), (element.tail, False)]:
+            if text:
+                element_ids = _get_ancestors_ids(element, include_element=is_text)
+                text_parts.append((text, element_ids))
+    return text_parts
+
+
 def _get_ancestors_ids(element, include_element: bool = False) -> Set[str]:
     ids = set()
     for ancestor in chain(
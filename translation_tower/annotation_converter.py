@@ -0,0 +1,114 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple, TypeVar, Union
+from translation_tower.annotation import Annotation
+from translation_tower.annotated_text_to_html import (
+    AnnotationRebuild,
+    annotated_texts_to_html,
+    htmls_to_annotated_texts,
+)
+from translation_tower.metrics import Metrics
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+
+class AnnotationConverter:
+    """
+    Convert annotated texts to html and back.
+
+    The conversions are CPU bound: those of the large requests run in a process
+    pool, by chunks of `chunk_size` texts, so that they don't block the event loop.
+    Requests of less than `offload_chars` chars are converted inline, which is
+    faster than a round trip to the pool. 0 `processes` disables the pool.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        offload_chars: int,
+        chunk_size: int,
+        metrics: Metrics,
+    ):
+        self._processes = processes
+        self._offload_chars = offload_chars
+        self._chunk_size = max(1, chunk_size)
+        self._metrics = metrics
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        if self._processes and self._executor is None:
+            # The server workers run threads and an event loop: don't fork them
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def to_html(
+        self, texts: List[Tuple[str, List[Annotation]]]
+    ) -> List[Tuple[str, AnnotationRebuild]]:
+        """
+        :param texts: (text, annotations) of a request
+        :return: (xml, rebuild) of each text
+        """
+        chars = sum(len(text) for text, _ in texts)
+        chunks = await self._convert(annotated_texts_to_html, texts, chars)
+        for chunk in chunks:
+            if isinstance(chunk, BaseException):
+                raise chunk
+        return [html for chunk in chunks for html in chunk]
+
+    async def from_html(
+        self, htmls: List[Tuple[str, AnnotationRebuild]]
+    ) -> List[Union[Tuple[str, List[Annotation]], BaseException]]:
+        """
+        :param htmls: (html, rebuild) of a request
+        :return: (text, annotations) of each html, or the exception raised by its
+        conversion
+        """
+        chars = sum(len(html or "") for html, _ in htmls)
+        chunks = await self._convert(htmls_to_annotated_texts, htmls, chars)
+        annotated_texts = list()
+        for chunk in chunks:
+            if isinstance(chunk, BaseException):
+                # The pool failed: the whole chunk is lost
+                lost = min(self._chunk_size, len(htmls) - len(annotated_texts))
+                chunk = [chunk] * lost
+            annotated_texts.extend(chunk)
+        return annotated_texts
+
+    async def _convert(
+        self,
+        convert: Callable[[List[Item]], List[Result]],
+        items: List[Item],
+        chars: int,
+    ) -> List[Union[List[Result], BaseException]]:
+        """
+        :param convert: picklable conversion of a chunk of items
+        :param items:
+        :param chars: size of the items
+        :return: the converted chunks, or the exception raised by the pool
+        """
+        if not items:
+            return list()
+        if self._executor is None or chars < self._offload_chars:
+            self._metrics.increment("annotation_conversions/inline", len(items))
+            return [convert(items)]
+
+        self._metrics.increment("annotation_conversions/offloaded", len(items))
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    self._executor, convert, items[start : start + self._chunk_size]
+                )
+                for start in range(0, len(items), self._chunk_size)
+            ],
+            return_exceptions=True,
+        )
@@ -0,0 +1,223 @@
+import asyncio
+from asyncio import FIRST_COMPLETED
+import json
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Optional, Set
+from translation_tower.translation_app import TranslationApp
+from translation_tower.translation_job import TranslationJob, translation_job_to_dict
+from translation_tower.logger import logger
+
+# Defaults of the optional fields of a text item, as in the OpenAPI schema
+TEXT_ITEM_DEFAULTS = dict(
+    translator_html_mode=False,
+    translator_fake_mode=False,
+    use_cache=True,
+)
+
+
+class BulkTranslationStats:
+    def __init__(self, offset: int):
+        self.start = time.monotonic()
+        self.texts = 0
+        self.chars = 0
+        self.errors = 0
+        # Line from which a new run resumes: all the lines before it are written
+        self.next_offset = offset
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.texts / max(self.elapsed, 1e-9)
+
+    @property
+    def chars_per_second(self) -> float:
+        return self.chars / max(self.elapsed, 1e-9)
+
+    def __str__(self):
+        return (
+            f"{self.texts} texts ({self.errors} errors), {self.chars} chars "
+            f"in {round(self.elapsed, 1)}s: "
+            f"{round(self.texts_per_second, 1)} texts/s, "
+            f"{round(self.chars_per_second, 1)} chars/s, "
+            f"next offset {self.next_offset}"
+        )
+
+
+async def bulk_translate(
+    app: TranslationApp,
+    input_path: Path,
+    output_path: Path,
+    ordered: bool = True,
+    max_in_flight: int = 1000,
+    offset: int = 0,
+    priority: int = 1,
+    defaults: Optional[Dict] = None,
+    report_interval: float = 10.0,
+) -> BulkTranslationStats:
+    """
+    Translate a JSONL file of text items (one `/translate` text item by line) and
+    write one JSONL translation by line, with its `line` in the input file.
+
+    The input is streamed: at most `max_in_flight` texts are read and not yet
+    written, and the translation queues apply back-pressure on the reader, so the
+    memory doesn't depend on the size of the corpus.
+
+    When resuming an unordered run, lines after the offset may already be
+    written: those found in the output are not translated again.
+
+    :param app: a started translation app
+    :param input_path:
+    :param output_path: truncated, or appended to when resuming from an offset
+    :param ordered: write the translations in the input order, else as completed
+    :param max_in_flight: max number of texts read and not yet written
+    :param offset: number of input lines to skip, to resume an interrupted run
+    :param priority:
+    :param defaults: values of the fields missing in the text items
+    :param report_interval: seconds between two progress logs
+    :return:
+    """
+    defaults = dict(TEXT_ITEM_DEFAULTS, **(defaults or dict()))
+    stats = BulkTranslationStats(offset)
+    # Lines after the offset written by the interrupted run
+    written = _written_lines(output_path, offset) if offset else set()
+    skipped = frozenset(written)
+    request_id = f"bulk-{app.create_request_id()}"
+    in_flight = asyncio.Semaphore(max_in_flight)
+    finished = asyncio.Queue()
+    watchers = set()
+
+    async def watch(line: int, job: TranslationJob):
+        try:
+            await app.wait_job(job)
+            await app.finish_jobs([job])
+            with_annotations = job.source.annotations is not None
+            finished.put_nowait((line, translation_job_to_dict(job, with_annotations)))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            finished.put_nowait((line, dict(error=str(e))))
+
+    async def read():
+        with input_path.open(encoding="utf-8") as f:
+            for line, json_line in enumerate(islice(f, offset, None), start=offset):
+                if line in skipped:
+                    continue
+                await in_flight.acquire()
+                try:
+                    text_item = dict(defaults, **json.loads(json_line))
+                    job = app.create_job_from_json(
+                        request_id, line, text_item, priority
+                    )
+                    await app.submit_jobs([job])
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    finished.put_nowait((line, dict(error=str(e))))
+                    continue
+                watcher = asyncio.ensure_future(watch(line, job))
+                watchers.add(watcher)
+                watcher.add_done_callback(watchers.discard)
+
+        await asyncio.gather(*watchers)
+        finished.put_nowait(None)
+
+    def write(f, line: int, translation: Dict):
+        translation["line"] = line
+        f.write(json.dumps(translation, ensure_ascii=False) + "\n")
+        in_flight.release()
+        stats.texts += 1
+        stats.chars += len(translation.get("text") or "")
+        if "error" in translation:
+            stats.errors += 1
+
+    reader = asyncio.ensure_future(read())
+    mode = "a" if offset else "w"
+    try:
+        with output_path.open(mode, encoding="utf-8") as f:
+            # Translations waiting for the previous lines to be written, by line
+            pending: Dict[int, Dict] = dict()
+            last_report = time.monotonic()
+
+            def advance():
+                # Lines written, in order from the next offset
+                while True:
+                    if stats.next_offset in written:
+                        written.remove(stats.next_offset)
+                    elif ordered and stats.next_offset in pending:
+                        write(f, stats.next_offset, pending.pop(stats.next_offset))
+                    else:
+                        break
+                    stats.next_offset += 1
+
+            advance()
+
+            while True:
+                if reader.done():
+                    item = await finished.get()
+                else:
+                    get = asyncio.ensure_future(finished.get())
+                    await asyncio.wait({get, reader}, return_when=FIRST_COMPLETED)
+                    if not get.done():
+                        get.cancel()
+                        # Raise the error of the reader, if any
+                        reader.result()
+                        continue
+                    item = get.result()
+                if item is None:
+                    break
+
+                line, translation = item
+                if ordered:
+                    pending[line] = translation
+                else:
+                    write(f, line, translation)
+                    written.add(line)
+                advance()
+
+                if time.monotonic() - last_report >= report_interval:
+                    f.flush()
+                    logger.info(f"Bulk translation: {stats}")
+                    last_report = time.monotonic()
+
+        await reader
+        logger.info(f"Finish bulk translation: {stats}")
+        return stats
+
+    except asyncio.CancelledError:
+        logger.info(f"Bulk translation interrupted: {stats}")
+        raise
+
+    finally:
+        reader.cancel()
+        for watcher in list(watchers):
+            watcher.cancel()
+
+
+def _written_lines(output_path: Path, offset: int) -> Set[int]:
+    """
+    Lines from `offset` written to the output of an interrupted run. A last line
+    cut by the interruption is removed from the output.
+    :param output_path:
+    :param offset:
+    :return:
+    """
+    lines = set()
+    if not output_path.exists():
+        return lines
+    with output_path.open("r+", encoding="utf-8") as f:
+        end = 0
+        for json_line in iter(f.readline, ""):
+            if not json_line.endswith("\n"):
+                f.seek(end)
+                f.truncate()
+                break
+            end = f.tell()
+            line = json.loads(json_line).get("line")
+            if line is not None and line >= offset:
+                lines.add(line)
+    return lines
@@ -0,0 +1,74 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class CacheBackend(ABC):
+    """
+    Key-value store behind the translation cache. Keys are strings, values are
+    bytes (or objects pickled by previous versions of the cache).
+
+    A backend must be safe to use from several threads, and from several
+    processes when it is shared by workers. `get_many` and `set_many` are the
+    bulk operations: a backend should run them in as few round trips or
+    transactions as it can.
+    """
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> bool:
+        """
+        :return: True if the value is written
+        """
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        :param keys:
+        :return: the values found, by key
+        """
+        found = dict()
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set_many(self, entries: Dict[str, Any]) -> int:
+        """
+        :param entries:
+        :return: number of values written
+        """
+        return sum(self.set(key, value) for key, value in entries.items())
+
+    @abstractmethod
+    def incr(self, key: str, delta: int = 1, default: int = 0) -> int:
+        """
+        Atomically increment a counter
+        """
+
+    @abstractmethod
+    def iterkeys(self) -> Iterator[str]:
+        pass
+
+    def cull(self) -> int:
+        """
+        Evict entries until the backend is below its size limit
+        :return: number of evicted entries
+        """
+        return 0
+
+    def volume(self) -> Optional[int]:
+        """
+        :return: size of the backend in bytes, None when it is unknown
+        """
+        return None
+
+    def vacuum(self):
+        """
+        Release the space left by deleted and rewritten entries
+        """
+
+    def close(self):
+        pass
@@ -0,0 +1,21 @@
+from translation_tower.translation_cache_config import TranslationCacheConfig
+from translation_tower.cache_backend.cache_backend import CacheBackend
+from translation_tower.cache_backend.disk_cache_backend import DiskCacheBackend
+from translation_tower.cache_backend.fanout_cache_backend import FanoutCacheBackend
+from translation_tower.cache_backend.memory_cache_backend import MemoryCacheBackend
+
+
+def create_cache_backend(config: TranslationCacheConfig) -> CacheBackend:
+    """
+    Create the backend selected by the cache config
+    :param config:
+    :return:
+    """
+    if config.backend == "disk":
+        return DiskCacheBackend(config.path, config.size_limit)
+    elif config.backend == "fanout":
+        return FanoutCacheBackend(config.path, config.size_limit, config.shards)
+    elif config.backend == "memory":
+        return MemoryCacheBackend()
+    else:
+        raise ValueError(f"Invalid cache backend {config.backend}")
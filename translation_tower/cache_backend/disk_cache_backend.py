@@ -0,0 +1,52 @@
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator
+from diskcache import Cache
+from diskcache.core import DBNAME
+from translation_tower.cache_backend.cache_backend import CacheBackend
+
+
+class DiskCacheBackend(CacheBackend):
+    """
+    Single diskcache (SQLite) store: one write lock for every process. Bulk
+    writes run in one transaction. Bulk reads don't: a diskcache transaction
+    takes the write lock, reads are plain lookups that never wait for it.
+    """
+
+    def __init__(self, path: str, size_limit: int):
+        self._path = path
+        # Culled by the translation cache, to count evictions
+        self._cache = Cache(path, size_limit=size_limit, cull_limit=0)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._cache.get(key, default)
+
+    def set(self, key: str, value: Any) -> bool:
+        return self._cache.set(key, value)
+
+    def set_many(self, entries: Dict[str, Any]) -> int:
+        with self._cache.transact():
+            return super().set_many(entries)
+
+    def incr(self, key: str, delta: int = 1, default: int = 0) -> int:
+        return self._cache.incr(key, delta, default)
+
+    def iterkeys(self) -> Iterator[str]:
+        return self._cache.iterkeys()
+
+    def cull(self) -> int:
+        return self._cache.cull()
+
+    def volume(self) -> int:
+        return self._cache.volume()
+
+    def vacuum(self):
+        self._cache.close()
+        connection = sqlite3.connect(str(Path(self._path) / DBNAME))
+        try:
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+
+    def close(self):
+        self._cache.close()
@@ -0,0 +1,72 @@
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator
+from diskcache import FanoutCache
+from diskcache.core import DBNAME
+from translation_tower.cache_backend.cache_backend import CacheBackend
+
+
+class FanoutCacheBackend(CacheBackend):
+    """
+    diskcache store sharded in `shards` SQLite databases: writers of different
+    shards don't wait for each other. Bulk writes run in one transaction by shard,
+    not across shards.
+
+    diskcache drops a write that waits more than `timeout` seconds for the lock
+    of its shard: the writes are retried instead.
+    """
+
+    def __init__(self, path: str, size_limit: int, shards: int, timeout: float = 1.0):
+        self._path = path
+        self._shards = shards
+        # Culled by the translation cache, to count evictions
+        self._cache = FanoutCache(
+            path, shards=shards, timeout=timeout, size_limit=size_limit, cull_limit=0
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._cache.get(key, default)
+
+    def set(self, key: str, value: Any) -> bool:
+        return self._cache.set(key, value, retry=True)
+
+    def set_many(self, entries: Dict[str, Any]) -> int:
+        # Shard of a key, as `FanoutCache` computes it
+        shards = self._cache._shards
+        entries_by_shard = defaultdict(dict)
+        for key, value in entries.items():
+            shard = shards[self._cache._hash(key) % len(shards)]
+            entries_by_shard[shard][key] = value
+
+        written = 0
+        for shard, shard_entries in entries_by_shard.items():
+            with shard.transact(retry=True):
+                for key, value in shard_entries.items():
+                    written += shard.set(key, value)
+        return written
+
+    def incr(self, key: str, delta: int = 1, default: int = 0) -> int:
+        return self._cache.incr(key, delta, default, retry=True)
+
+    def iterkeys(self) -> Iterator[str]:
+        return iter(self._cache)
+
+    def cull(self) -> int:
+        return self._cache.cull()
+
+    def volume(self) -> int:
+        return self._cache.volume()
+
+    def vacuum(self):
+        self._cache.close()
+        for shard in range(self._shards):
+            path = Path(self._path) / f"{shard:03d}" / DBNAME
+            connection = sqlite3.connect(str(path))
+            try:
+                connection.execute("VACUUM")
+            finally:
+                connection.close()
+
+    def close(self):
+        self._cache.close()
@@ -0,0 +1,29 @@
+import threading
+from typing import Any, Dict, Iterator
+from translation_tower.cache_backend.cache_backend import CacheBackend
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Unbounded in-process store, for tests and benchmarks
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Any] = dict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def set(self, key: str, value: Any) -> bool:
+        self._values[key] = value
+        return True
+
+    def incr(self, key: str, delta: int = 1, default: int = 0) -> int:
+        with self._lock:
+            value = self._values.get(key, default) + delta
+            self._values[key] = value
+            return value
+
+    def iterkeys(self) -> Iterator[str]:
+        return iter(list(self._values))
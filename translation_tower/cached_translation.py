@@ -0,0 +1,149 @@
+import struct
+import zlib
+from typing import NamedTuple, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class CachedTranslation(NamedTuple):
+    text: str
+    translation: str
+    source_language: str
+    target_language: str
+    translator_name: str
+    translator_html_mode: bool
+    translator_fake_mode: bool
+
+
+# Value format
+#
+# header: version (B), flags (B), length of the translation in bytes (I)
+# body, compressed with zlib or zstd when flagged:
+#   translation (utf-8)
+#   when flagged SOURCE: lengths (IBBB) of the text, the source language, the
+#   target language and the translator name, then the four of them (utf-8)
+VERSION = 1
+HEADER = struct.Struct("<BBI")
+SOURCE_HEADER = struct.Struct("<IBBB")
+
+ZLIB = 1
+ZSTD = 2
+SOURCE = 4
+HTML_MODE = 8
+FAKE_MODE = 16
+NO_TRANSLATION = 32
+
+COMPRESSIONS = ("none", "zlib", "zstd")
+
+
+def encode_cached_translation(
+    cached_translation: CachedTranslation,
+    store_source: bool = True,
+    compression: str = "zlib",
+    compression_threshold: int = 256,
+) -> bytes:
+    """
+    Encode a cached translation in the compact value format
+    :param cached_translation:
+    :param store_source: store the text, languages and translator name, which are
+    not needed to serve the translation but are needed to export it
+    :param compression: none, zlib or zstd
+    :param compression_threshold: min size of the body to compress it
+    :return:
+    """
+    flags = 0
+    if cached_translation.translation is None:
+        flags |= NO_TRANSLATION
+        translation = b""
+    else:
+        translation = cached_translation.translation.encode("utf-8")
+    body = translation
+
+    if store_source and cached_translation.text is not None:
+        flags |= SOURCE
+        if cached_translation.translator_html_mode:
+            flags |= HTML_MODE
+        if cached_translation.translator_fake_mode:
+            flags |= FAKE_MODE
+        fields = [
+            cached_translation.text.encode("utf-8"),
+            cached_translation.source_language.encode("utf-8"),
+            cached_translation.target_language.encode("utf-8"),
+            cached_translation.translator_name.encode("utf-8"),
+        ]
+        body += SOURCE_HEADER.pack(*map(len, fields)) + b"".join(fields)
+
+    if len(body) >= compression_threshold:
+        if compression == "zlib":
+            flags |= ZLIB
+            body = zlib.compress(body)
+        elif compression == "zstd":
+            if zstandard is None:
+                raise ValueError("zstd compression requires the zstandard package")
+            flags |= ZSTD
+            body = zstandard.ZstdCompressor().compress(body)
+
+    return HEADER.pack(VERSION, flags, len(translation)) + body
+
+
+def decode_cached_translation(value) -> Optional[CachedTranslation]:
+    """
+    Decode a cache value: the compact value format, or a pickled cached
+    translation written by the previous versions
+    :param value:
+    :return: the cached translation, whose source fields are None when they are
+    not stored
+    """
+    if value is None:
+        return None
+    if not isinstance(value, bytes):
+        return CachedTranslation(*value)
+
+    version, flags, translation_length = HEADER.unpack_from(value)
+    if version != VERSION:
+        raise ValueError(f"Invalid cached translation version {version}")
+
+    body = value[HEADER.size :]
+    if flags & ZLIB:
+        body = zlib.decompress(body)
+    elif flags & ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        body = zstandard.ZstdDecompressor().decompress(body)
+
+    translation = None
+    if not flags & NO_TRANSLATION:
+        translation = body[:translation_length].decode("utf-8")
+
+    if not flags & SOURCE:
+        return CachedTranslation(
+            text=None,
+            translation=translation,
+            source_language=None,
+            target_language=None,
+            translator_name=None,
+            translator_html_mode=None,
+            translator_fake_mode=None,
+        )
+
+    offset = translation_length
+    lengths = SOURCE_HEADER.unpack_from(body, offset)
+    offset += SOURCE_HEADER.size
+    fields = list()
+    for length in lengths:
+        fields.append(body[offset : offset + length].decode("utf-8"))
+        offset += length
+    text, source_language, target_language, translator_name = fields
+
+    return CachedTranslation(
+        text=text,
+        translation=translation,
+        source_language=source_language,
+        target_language=target_language,
+        translator_name=translator_name,
+        translator_html_mode=bool(flags & HTML_MODE),
+        translator_fake_mode=bool(flags & FAKE_MODE),
+    )
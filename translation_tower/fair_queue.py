@@ -0,0 +1,137 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List
+from translation_tower.translation_job import TranslationJob
+
+
+class FairQueue:
+    """
+    Translation queue shared fairly between requests.
+
+    Jobs are grouped by request id and served with deficit round robin: on each
+    round, a request may take `quantum` x `priority` chars of jobs, so a small
+    request never waits behind more than a few quanta of a big one.
+    `maxsize` bounds the jobs queued by each request: a big request blocks on
+    `put` without blocking the others.
+    """
+
+    def __init__(self, maxsize: int = 20, quantum: int = 1000):
+        self._maxsize = maxsize
+        self._quantum = quantum
+
+        self._flows: Dict[str, Deque[TranslationJob]] = dict()
+        self._weights: Dict[str, int] = dict()
+        self._deficits: Dict[str, int] = dict()
+        self._active: Deque[str] = deque()
+        self._getters: Deque[asyncio.Future] = deque()
+        self._putters: Dict[str, Deque[asyncio.Future]] = dict()
+        self._size = 0
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    async def put(self, job: TranslationJob):
+        flow = job.request_id
+        while len(self._flows.get(flow, ())) >= self._maxsize:
+            putter = asyncio.get_running_loop().create_future()
+            putters = self._putters.setdefault(flow, deque())
+            putters.append(putter)
+            try:
+                await putter
+            except:  # noqa: E722
+                putter.cancel()
+                if putter in putters:
+                    putters.remove(putter)
+                if not putters:
+                    self._putters.pop(flow, None)
+                raise
+        if not self._putters.get(flow):
+            self._putters.pop(flow, None)
+        self.put_nowait(job)
+
+    def put_nowait(self, job: TranslationJob):
+        flow = job.request_id
+        if flow not in self._flows:
+            self._flows[flow] = deque()
+            self._deficits[flow] = 0
+            self._active.append(flow)
+        self._flows[flow].append(job)
+        self._weights[flow] = max(1, job.priority)
+        self._size += 1
+        self._wakeup_next(self._getters)
+
+    async def get(self) -> TranslationJob:
+        while self.empty():
+            getter = asyncio.get_running_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except:  # noqa: E722
+                getter.cancel()
+                if getter in self._getters:
+                    self._getters.remove(getter)
+                if not self.empty() and not getter.cancelled():
+                    self._wakeup_next(self._getters)
+                raise
+        return self.get_nowait()
+
+    def get_nowait(self) -> TranslationJob:
+        if self.empty():
+            raise asyncio.QueueEmpty()
+
+        while True:
+            flow = self._active[0]
+            jobs = self._flows[flow]
+            cost = max(1, len(jobs[0].to_translator))
+            if self._deficits[flow] >= cost:
+                self._deficits[flow] -= cost
+                job = jobs.popleft()
+                self._size -= 1
+                if not jobs:
+                    self._remove_flow(flow)
+                self._wakeup_next(self._putters.get(flow))
+                return job
+
+            # Next request
+            self._deficits[flow] += self._quantum * self._weights[flow]
+            self._active.rotate(-1)
+
+    def remove(self, request_id: str) -> List[TranslationJob]:
+        """
+        Remove the jobs of a request that are not wanted anymore
+        :param request_id:
+        :return: the removed jobs
+        """
+        jobs = self._flows.get(request_id)
+        if not jobs:
+            return []
+        removed = [job for job in jobs if not job.wanted]
+        if not removed:
+            return []
+
+        kept = deque(job for job in jobs if job.wanted)
+        self._size -= len(removed)
+        if kept:
+            self._flows[request_id] = kept
+        else:
+            self._remove_flow(request_id)
+        for _ in removed:
+            self._wakeup_next(self._putters.get(request_id))
+        return removed
+
+    def _remove_flow(self, flow: str):
+        self._active.remove(flow)
+        del self._flows[flow]
+        del self._deficits[flow]
+        del self._weights[flow]
+
+    @staticmethod
+    def _wakeup_next(waiters: Deque[asyncio.Future]):
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
@@ -27,4 +27,3 @@ def logger_default_policy(my_logger, file="log.log"):
     logging.getLogger("aiohttp").setLevel(logging.WARNING)
     logging.getLogger("openapi_spec_validator").setLevel(logging.WARNING)
     logging.getLogger("aiohttp_middlewares.cors").setLevel(logging.WARNING)
-    logging.getLogger("aiohttp_retry").setLevel(logging.ERROR)
\ No newline at end of file
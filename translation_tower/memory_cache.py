@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class MemoryCache:
+    """
+    In-process LRU cache bounded by a number of entries and a size in bytes, whose
+    entries expire `ttl` seconds after they are set.
+    A limit of 0 means unlimited, except `max_entries`: 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int = 0, ttl: float = 0):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        # Value, size and expiration time by key, from the least recently used
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, now: float) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, size, expires_at = entry
+        if self._ttl and now >= expires_at:
+            self._pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, size: int, now: float) -> int:
+        """
+        :param key:
+        :param value:
+        :param size: size of the value in bytes
+        :param now:
+        :return: number of evicted entries
+        """
+        if not self._max_entries:
+            return 0
+        if key in self._entries:
+            self._pop(key)
+        self._entries[key] = (value, size, now + self._ttl)
+        self._bytes += size
+
+        evictions = 0
+        while len(self._entries) > self._max_entries or (
+            self._max_bytes and self._bytes > self._max_bytes and len(self._entries) > 1
+        ):
+            self._pop(next(iter(self._entries)))
+            evictions += 1
+        return evictions
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def _pop(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
@@ -0,0 +1,46 @@
+from collections import Counter
+from typing import Dict
+
+
+class Metrics:
+    """
+    In-process counters, gauges and observations exposed by the /metrics endpoint
+    """
+
+    def __init__(self):
+        self._counters = Counter()
+        self._gauges = dict()
+        self._observations = dict()
+
+    def increment(self, name: str, value: float = 1):
+        self._counters[name] += value
+
+    def gauge(self, name: str, value: float):
+        self._gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        observation = self._observations.get(name)
+        if observation is None:
+            self._observations[name] = dict(
+                count=1, sum=value, min=value, max=value
+            )
+        else:
+            observation["count"] += 1
+            observation["sum"] += value
+            observation["min"] = min(observation["min"], value)
+            observation["max"] = max(observation["max"], value)
+
+    def to_dict(self) -> Dict:
+        return dict(
+            counters=dict(self._counters),
+            gauges=dict(self._gauges),
+            observations={
+                name: dict(
+                    count=o["count"],
+                    mean=o["sum"] / o["count"],
+                    min=o["min"],
+                    max=o["max"],
+                )
+                for name, o in self._observations.items()
+            },
+        )
@@ -3,14 +3,18 @@ from translation_tower.translation_app_name import TRANSLATION_APP_NAME
 from translation_tower.server_config import ServerConfig
 from translation_tower.translation_app import TranslationApp
 from translation_tower.server_handler.translate import translate
+from translation_tower.server_handler.metrics import metrics
+from translation_tower.server_handler.jobs import create_job, get_job, delete_job
 from rororo import OperationTableDef, setup_openapi
 
 
 class Server:
-    def __init__(self, config: ServerConfig, web_application: web.Application, site: web.TCPSite):
+    def __init__(self, config: ServerConfig, web_application: web.Application, site: web.TCPSite,
+                 runner: web.AppRunner = None):
         self._config = config
         self._web_application = web_application
         self._site = site
+        self._runner = runner
 
     @property
     def site(self):
@@ -20,8 +24,19 @@ class Server:
     def config(self):
         return self._config
 
+    async def stop(self):
+        # Shutdown handlers stop the app
+        await self._runner.cleanup()
+
     @staticmethod
-    async def create(config: ServerConfig, app: TranslationApp) -> "Server":
+    async def create(config: ServerConfig, app: TranslationApp,
+                     reuse_port: bool = False) -> "Server":
+        """
+        :param config:
+        :param app:
+        :param reuse_port: let worker processes listen on the same port (SO_REUSEPORT)
+        :return:
+        """
         # Server
         web_application = web.Application(client_max_size=config.client_max_size)
 
@@ -35,6 +50,10 @@ class Server:
         # OpenAPI
         operations = OperationTableDef()
         operations.register(translate)
+        operations.register(metrics)
+        operations.register(create_job)
+        operations.register(get_job)
+        operations.register(delete_job)
 
         # Register OpenAPI schema
         web_application = setup_openapi(
@@ -46,10 +65,11 @@ class Server:
         # Site
         runner = web.AppRunner(web_application)
         await runner.setup()
-        site = web.TCPSite(runner, config.host, config.port)
+        site = web.TCPSite(runner, config.host, config.port,
+                           reuse_port=reuse_port or None)
 
         # Create server
-        return Server(config, web_application, site)
+        return Server(config, web_application, site, runner)
 
     @staticmethod
     async def on_startup(web_application: web.Application):
@@ -0,0 +1,76 @@
+from typing import Dict
+from aiohttp import web
+from rororo import openapi_context
+from translation_tower.translation_app_name import TRANSLATION_APP_NAME
+from translation_tower.translation_app import TranslationApp
+from translation_tower.logger import logger
+import rororo
+
+
+async def create_job(request: web.Request) -> web.Response:
+    # Translation app
+    app: TranslationApp = request.app[TRANSLATION_APP_NAME]
+
+    # Read request params
+    with openapi_context(request) as context:
+        texts = [_text_item_to_dict(t) for t in context.data.texts]
+        priority = context.data.priority
+
+    # Validate texts before storing the job
+    app.create_jobs_from_json(texts, app.create_request_id(), priority)
+
+    job_id = app.create_stored_job(texts, priority)
+    logger.info(f"Create translation job {job_id} with {len(texts)} texts")
+
+    # Response
+    return web.json_response(
+        {"job_id": job_id, **app.job_store.get_state(job_id)}, status=202
+    )
+
+
+async def get_job(request: web.Request) -> web.Response:
+    # Translation app
+    app: TranslationApp = request.app[TRANSLATION_APP_NAME]
+
+    # Read request params
+    with openapi_context(request) as context:
+        job_id = context.parameters.path["job_id"]
+        offset = context.parameters.query.get("offset", 0)
+        limit = context.parameters.query.get("limit", 100)
+
+    state = app.job_store.get_state(job_id)
+    if state is None:
+        raise rororo.openapi.ObjectDoesNotExist(label="Job")
+
+    # Response
+    return web.json_response(
+        {
+            "job_id": job_id,
+            **state,
+            "translations": app.job_store.get_results(job_id, offset, limit),
+        }
+    )
+
+
+async def delete_job(request: web.Request) -> web.Response:
+    # Translation app
+    app: TranslationApp = request.app[TRANSLATION_APP_NAME]
+
+    # Read request params
+    with openapi_context(request) as context:
+        job_id = context.parameters.path["job_id"]
+
+    if not await app.delete_stored_job(job_id):
+        raise rororo.openapi.ObjectDoesNotExist(label="Job")
+    logger.info(f"Delete translation job {job_id}")
+
+    # Response
+    return web.Response(status=204)
+
+
+def _text_item_to_dict(text_item) -> Dict:
+    # Validated request data is read-only, the job store needs plain dicts
+    d = dict(text_item)
+    if d.get("annotations") is not None:
+        d["annotations"] = [dict(a) for a in d["annotations"]]
+    return d
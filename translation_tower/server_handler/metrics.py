@@ -0,0 +1,11 @@
+from aiohttp import web
+from translation_tower.translation_app_name import TRANSLATION_APP_NAME
+from translation_tower.translation_app import TranslationApp
+
+
+async def metrics(request: web.Request) -> web.Response:
+    # Translation app
+    app: TranslationApp = request.app[TRANSLATION_APP_NAME]
+
+    # Response
+    return web.json_response(app.metrics.to_dict())
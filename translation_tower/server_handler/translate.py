@@ -1,18 +1,22 @@
 from typing import List, Dict
 import asyncio
+import json
 from aiohttp import web
 from rororo import openapi_context
 from translation_tower.translation_app_name import TRANSLATION_APP_NAME
 from translation_tower.translation_app import TranslationApp
-from translation_tower.annotation import (
-    annotation_from_dict,
-    annotation_to_dict,
+from translation_tower.translation_job import (
+    TranslationJob,
+    has_annotations,
+    translation_job_to_dict,
+    translation_jobs_to_dicts,
 )
-from translation_tower.translation_job import TranslationJob
 from translation_tower.logger import logger
 from translation_tower.format_traceback import format_traceback
 import rororo
 
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
 
 async def translate(request: web.Request) -> web.Response:
     try:
@@ -28,22 +32,29 @@ async def translate(request: web.Request) -> web.Response:
         # Read request params and create jobs
         with openapi_context(request) as context:
             texts = context.data.texts
-        jobs = app.create_jobs_from_json(texts, request_id)
+            priority = context.data.priority
+            partial_errors = context.data.partial_errors
+        jobs = app.create_jobs_from_json(texts, request_id, priority)
+
+        # Stream translations as they complete
+        if NDJSON_CONTENT_TYPE in request.headers.get("Accept", ""):
+            return await _stream_translations(request, app, jobs)
 
         # Translate jobs
         await app.translate_jobs(jobs)
 
-        # Check error
-        for job in jobs:
-            if job.error:
-                raise rororo.openapi.ServerError(message=job.error_message)
+        # Check error (unless errors are reported by item)
+        if not partial_errors:
+            for job in jobs:
+                if job.error:
+                    raise rororo.openapi.ServerError(message=job.error_message)
 
         logger.info(f"Finish translation request nº{request_id}")
 
         # Response
         return web.json_response(
             {
-                "translations": _jobs_to_translations(jobs)
+                "translations": translation_jobs_to_dicts(jobs)
             }
         )
 
@@ -51,30 +62,29 @@ async def translate(request: web.Request) -> web.Response:
         raise
 
 
-def _jobs_to_translations(jobs):
-    has_annotations = True if list(filter(lambda j: j.source.annotations is not None, jobs)) else False
-
-    translations = list()
-    for job in jobs:
-        d = dict()
-        d["text"] = job.source.text
-        d["translation"] = job.target.text
-        d["source_lang"] = job.source.language
-        d["target_lang"] = job.target.language
-        if has_annotations:
-            if job.source.annotations is None:
-                d["source_annotations"] = []
-            else:
-                d["source_annotations"] = list(
-                    map(annotation_to_dict, job.source.annotations)
-                )
-            if job.target.annotations is None:
-                d["target_annotations"] = []
-            else:
-                d["target_annotations"] = list(
-                    map(annotation_to_dict, job.target.annotations)
-                )
-        d["translate"] = job.translator.name
-        d["from_cache"] = job.from_cache
-        translations.append(d)
-    return translations
+async def _stream_translations(
+    request: web.Request, app: TranslationApp, jobs: List[TranslationJob]
+) -> web.StreamResponse:
+    """
+    Write one JSON line by translation, with its index in the request, as soon as
+    it is translated. Errors are always reported by item.
+    """
+    with_annotations = has_annotations(jobs)
+
+    response = web.StreamResponse(headers={"Content-Type": NDJSON_CONTENT_TYPE})
+    await response.prepare(request)
+
+    # Closed explicitly: a failed write (client disconnected) must cancel the
+    # jobs that are still queued
+    translations = app.translate_jobs_as_completed(jobs)
+    try:
+        async for job in translations:
+            d = translation_job_to_dict(job, with_annotations)
+            d["index"] = job.index
+            await response.write(json.dumps(d).encode("utf-8") + b"\n")
+    finally:
+        await translations.aclose()
+
+    await response.write_eof()
+    logger.info(f"Finish translation request nº{jobs[0].request_id}")
+    return response
@@ -0,0 +1,145 @@
+import re
+from typing import List, Tuple
+
+_TAG = re.compile(r"<[^>]*>")
+_SPACES = re.compile(r"\s+")
+_SENTENCE_END = re.compile(r"[.!?…。！？][\"'”’»)\]]*$")
+# Full-width sentence end, followed by the next sentence without a space (CJK)
+_FULL_WIDTH_SENTENCE_END = re.compile(r"[。！？][」』”’）)\]]*(?=\S)")
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+# Boundary levels
+WORD = 0
+SENTENCE = 1
+PARAGRAPH = 2
+
+
+def split_text(
+    text: str, limit: int, html_mode: bool = False, level: int = WORD
+) -> List[Tuple[str, str]]:
+    """
+    Split a text in segments of at most `limit` chars, preferably at paragraph
+    boundaries, then at sentence boundaries, then between words.
+    In html mode, the text is only split outside of any element, so each
+    segment is well formed. A segment may be longer than `limit` when no
+    boundary is allowed.
+
+    :param text:
+    :param limit: max length of a segment, 0 to split at every boundary of `level`
+    :param html_mode:
+    :param level: lowest boundary level used to split the text
+    :return: [(segment, separator)], so that text == "".join(s + sep for s, sep)
+    """
+    boundaries = [b for b in _boundaries(text, html_mode) if b[2] >= level]
+
+    pieces = list()
+    start = 0
+    i = 0
+    while limit <= 0 or len(text) - start > limit:
+        # Boundaries ending a segment starting at `start`
+        while i < len(boundaries) and boundaries[i][0] <= start:
+            i += 1
+        if i == len(boundaries):
+            if limit <= 0 or html_mode:
+                break
+            boundary = None
+        elif limit <= 0:
+            boundary = boundaries[i]
+        else:
+            boundary = _best_boundary(boundaries, i, start + limit)
+
+        if boundary is None:
+            if html_mode:
+                # Oversized segment up to the next allowed boundary
+                boundary = boundaries[i]
+            else:
+                # Hard cut
+                end = start + limit
+                pieces.append((text[start:end], ""))
+                start = end
+                continue
+
+        ws_start, ws_stop, _ = boundary
+        pieces.append((text[start:ws_start], text[ws_start:ws_stop]))
+        start = ws_stop
+
+    pieces.append((text[start:], ""))
+    return pieces
+
+
+def _best_boundary(boundaries, i, stop):
+    """
+    The highest level boundary, and the last one for this level, between
+    boundaries[i] and the position `stop`
+    """
+    best = None
+    while i < len(boundaries) and boundaries[i][0] <= stop:
+        if best is None or boundaries[i][2] >= best[2]:
+            best = boundaries[i]
+        i += 1
+    return best
+
+
+def _boundaries(text: str, html_mode: bool) -> List[Tuple[int, int, int]]:
+    """
+    Whitespace runs where the text can be split, and the empty boundaries after
+    the full-width sentence ends
+    :return: [(start, stop, level)]
+    """
+    if html_mode:
+        spans = _top_level_text_spans(text)
+    else:
+        spans = [(0, len(text))]
+
+    boundaries = list()
+    for span_start, span_stop in spans:
+        for match in _SPACES.finditer(text, span_start, span_stop):
+            start, stop = match.span()
+            if start == 0 or stop == len(text):
+                continue
+            if "\n" in match.group():
+                level = PARAGRAPH
+            else:
+                before = text[max(0, start - 200) : start]
+                if html_mode:
+                    while before.endswith(">"):
+                        tag_start = before.rfind("<")
+                        if tag_start == -1:
+                            break
+                        before = before[:tag_start]
+                level = SENTENCE if _SENTENCE_END.search(before[-8:]) else WORD
+            boundaries.append((start, stop, level))
+        for match in _FULL_WIDTH_SENTENCE_END.finditer(text, span_start, span_stop):
+            boundaries.append((match.end(), match.end(), SENTENCE))
+    return sorted(boundaries)
+
+
+def _top_level_text_spans(html: str) -> List[Tuple[int, int]]:
+    """
+    Spans of text outside of any element
+    """
+    spans = list()
+    depth = 0
+    position = 0
+    for match in _TAG.finditer(html):
+        if depth == 0 and match.start() > position:
+            spans.append((position, match.start()))
+        position = match.end()
+
+        tag = match.group()
+        if tag.startswith("<!") or tag.startswith("<?") or tag.endswith("/>"):
+            continue
+        name = re.match(r"</?\s*([a-zA-Z0-9:_-]*)", tag).group(1).lower()
+        if name in _VOID_TAGS:
+            continue
+        if tag.startswith("</"):
+            depth = max(0, depth - 1)
+        else:
+            depth += 1
+
+    if depth == 0 and position < len(html):
+        spans.append((position, len(html)))
+    return spans
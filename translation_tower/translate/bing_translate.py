@@ -1,6 +1,6 @@
 from typing import List, Union, Tuple
 import uuid
-from aiohttp_retry import RetryClient
+from translation_tower.translate.retry_client import RetryClient
 from translation_tower.logger import logger
 from translation_tower.format_traceback import format_traceback
 from translation_tower.translate.error import TranslatorError
@@ -31,24 +31,24 @@ async def bing_translate(
             params.append(("textType", "html"))
         body = list(map(lambda t: {"text": t}, texts))
 
-        response = await retry_client.post(
+        async with retry_client.post(
             url,
             params=params,
             headers=headers,
             json=body,
-        )
-        if response.status == 200:
-            data = await response.json()
-            translations = list(map(lambda r: r["translations"][0]["text"], data))
-            return translations
-        else:
-            m = f'HTTP Error {response.status} from bing translator'
-            logger.warning(m)
-            raise TranslatorError(m)
+        ) as response:
+            if response.status == 200:
+                data = await response.json()
+                translations = list(map(lambda r: r["translations"][0]["text"], data))
+                return translations
+            else:
+                m = f'HTTP Error {response.status} from bing translator'
+                logger.warning(m)
+                raise TranslatorError(m, status=response.status)
+
+    except TranslatorError:
+        raise
 
     except Exception as e:
         logger.warning(format_traceback(e))
         raise TranslatorError(str(e))
-
-    finally:
-        await retry_client.close()
@@ -0,0 +1,69 @@
+import aiohttp
+from contextvars import ContextVar
+from types import SimpleNamespace
+from typing import Optional, NamedTuple
+from aiohttp import TraceConfig, TraceRequestStartParams, TraceRequestEndParams
+from translation_tower.logger import logger
+from translation_tower.translation_limiter import TranslationLimiter
+
+
+class BatchContext(NamedTuple):
+    batch_id: str
+    limiter: Optional[TranslationLimiter] = None
+
+
+# Batch of the requests sent from the current task
+batch_context: ContextVar[Optional[BatchContext]] = ContextVar(
+    "batch_context", default=None
+)
+
+
+async def before_translator_send_request(
+    session: aiohttp.ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: TraceRequestStartParams,
+) -> None:
+    context = batch_context.get()
+    trace_request_ctx = trace_config_ctx.trace_request_ctx or dict()
+    current_attempt = trace_request_ctx.get("current_attempt", 1)
+    if current_attempt > 1 and context is not None:
+        logger.warning(f"Retry to send batch {context.batch_id}")
+
+
+async def after_translator_send_request(
+    session: aiohttp.ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: TraceRequestEndParams,
+) -> None:
+    context = batch_context.get()
+    if params.response.status == 429 and context is not None:
+        retry_after = params.response.headers.get("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        logger.warning(
+            f"Batch {context.batch_id} throttled (Retry-After: {retry_after})"
+        )
+        if context.limiter is not None:
+            context.limiter.throttle(retry_after)
+
+
+def create_client_session(limit: int) -> aiohttp.ClientSession:
+    """
+    Create a long-lived session shared by every batch sent to a translator.
+    Batches identify themselves to the trace handlers through `batch_context`.
+    :param limit: max number of simultaneous connections
+    :return:
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        ttl_dns_cache=300,
+        keepalive_timeout=60,
+    )
+
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(before_translator_send_request)
+    trace_config.on_request_end.append(after_translator_send_request)
+
+    return aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
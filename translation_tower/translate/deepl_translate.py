@@ -1,5 +1,5 @@
 from typing import List, Union, Tuple
-from aiohttp_retry import RetryClient
+from translation_tower.translate.retry_client import RetryClient
 from translation_tower.logger import logger
 from translation_tower.format_traceback import format_traceback
 from translation_tower.translate.error import TranslatorError
@@ -28,26 +28,26 @@ async def deepl_translate(
         for text in texts:
             params.append(("text", text))
 
-        response = await retry_client.post(
+        async with retry_client.post(
             url,
             params=params,
-        )
-        if response.status == 200:
-            data = await response.json()
-            translations = [t['text'] for t in data["translations"]]
-            return translations
-        else:
-            m = f'HTTP Error {response.status} from deepl translator'
-            logger.warning(m)
-            raise TranslatorError(m)
+        ) as response:
+            if response.status == 200:
+                data = await response.json()
+                translations = [t['text'] for t in data["translations"]]
+                return translations
+            else:
+                m = f'HTTP Error {response.status} from deepl translator'
+                logger.warning(m)
+                raise TranslatorError(m, status=response.status)
+
+    except TranslatorError:
+        raise
 
     except Exception as e:
         logger.warning(format_traceback(e))
         raise TranslatorError(str(e))
 
-    finally:
-        await retry_client.close()
-
 
 
 
@@ -1,2 +1,20 @@
+from typing import Optional
+
+# HTTP statuses of the errors that may be caused by the translated texts (invalid
+# or too large request). The others (authentication, quota, throttling, server and
+# transport errors) don't depend on the texts
+_STATUSES_CAUSED_BY_TEXTS = {400, 413, 422}
+
+
 class TranslatorError(Exception):
-    pass
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def may_be_caused_by_texts(self) -> bool:
+        """
+        True if the error may be caused by some texts of the batch, so that
+        translating smaller groups of texts may succeed
+        """
+        return self.status in _STATUSES_CAUSED_BY_TEXTS
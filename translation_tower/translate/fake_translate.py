@@ -1,6 +1,6 @@
 from random import choices
 from typing import List, Union, Tuple
-from aiohttp_retry import RetryClient
+from translation_tower.translate.retry_client import RetryClient
 from translation_tower.logger import logger
 from translation_tower.format_traceback import format_traceback
 from translation_tower.translate.error import TranslatorError
@@ -27,23 +27,23 @@ async def fake_translate(
 
     ]
     try:
-        response = await retry_client.get(
+        async with retry_client.get(
             get_random_urls(),
             ssl=False,
-        )
-        if response.status == 200:
-            return [
-                f"[Fake {source_language}->{target_language}] {text}" for text in texts
-            ]
-        else:
-            m = f'HTTP Error {response.status} from fake translator'
-            logger.warning(m)
-            raise TranslatorError(m)
+        ) as response:
+            if response.status == 200:
+                return [
+                    f"[Fake {source_language}->{target_language}] {text}" for text in texts
+                ]
+            else:
+                m = f'HTTP Error {response.status} from fake translator'
+                logger.warning(m)
+                raise TranslatorError(m, status=response.status)
+
+    except TranslatorError:
+        raise
 
     except Exception as e:
         logger.warning(format_traceback(e))
         raise TranslatorError(str(e))
 
-    finally:
-        await retry_client.close()
-
@@ -0,0 +1,99 @@
+import asyncio
+from typing import Any, Collection, List, Optional, Sequence, Type, Union
+import aiohttp
+
+
+class RetryClient:
+    """
+    Send requests through a shared session, and retry them on the given statuses,
+    on server errors and on the given exceptions.
+    The client doesn't own the session: closing the session is up to its creator.
+    """
+
+    def __init__(
+        self,
+        client_session: aiohttp.ClientSession,
+        timeouts: Sequence[float],
+        statuses: Collection[int],
+        exceptions: Collection[Type[Exception]],
+    ):
+        """
+        :param client_session:
+        :param timeouts: seconds to wait before each retry, whose number sets the
+        number of attempts
+        :param statuses: statuses to retry, besides the server errors
+        :param exceptions: exceptions to retry
+        """
+        self._client_session = client_session
+        self._timeouts = list(timeouts)
+        self._statuses = set(statuses)
+        self._exceptions = tuple(exceptions)
+
+    @property
+    def attempts(self) -> int:
+        return max(1, len(self._timeouts))
+
+    def get(self, url: Union[str, List[str]], **kwargs) -> "RetryRequest":
+        return RetryRequest(self, "GET", url, kwargs)
+
+    def post(self, url: Union[str, List[str]], **kwargs) -> "RetryRequest":
+        return RetryRequest(self, "POST", url, kwargs)
+
+    async def request(
+        self, method: str, url: Union[str, List[str]], **kwargs
+    ) -> aiohttp.ClientResponse:
+        """
+        :param method:
+        :param url: the url, or the url of each attempt (the last one is used for
+        the remaining attempts)
+        :param kwargs: arguments of `ClientSession.request`
+        :return: the response of the last attempt
+        """
+        urls = [url] if isinstance(url, str) else list(url)
+        trace_request_ctx = kwargs.pop("trace_request_ctx", None) or dict()
+        attempt = 1
+        while True:
+            try:
+                response = await self._client_session.request(
+                    method,
+                    urls[min(attempt, len(urls)) - 1],
+                    trace_request_ctx=dict(trace_request_ctx, current_attempt=attempt),
+                    **kwargs,
+                )
+            except self._exceptions:
+                if attempt >= self.attempts:
+                    raise
+            else:
+                if not self._should_retry(response.status) or attempt >= self.attempts:
+                    return response
+                response.release()
+
+            await asyncio.sleep(self._timeouts[attempt - 1])
+            attempt += 1
+
+    def _should_retry(self, status: int) -> bool:
+        return status in self._statuses or status >= 500
+
+
+class RetryRequest:
+    """
+    Request of a retry client, used as `async with retry_client.post(...)`: the
+    response is released on exit
+    """
+
+    def __init__(self, client: RetryClient, method: str, url, kwargs: dict):
+        self._client = client
+        self._method = method
+        self._url = url
+        self._kwargs = kwargs
+        self._response: Optional[aiohttp.ClientResponse] = None
+
+    async def __aenter__(self) -> aiohttp.ClientResponse:
+        self._response = await self._client.request(
+            self._method, self._url, **self._kwargs
+        )
+        return self._response
+
+    async def __aexit__(self, *exc_info: Any):
+        if self._response is not None:
+            self._response.release()
@@ -1,27 +1,52 @@
 import asyncio
-from asyncio import Event
-from typing import List, Dict
+from asyncio import Event, FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Optional, Callable, AsyncIterator
 from pathlib import Path
 from collections import Counter
-from asyncio.queues import Queue
-from translation_tower.translation_cache import TranslationCache
+from translation_tower.translation_cache import TranslationCache, CachedTranslation
 from translation_tower.translation_cache_config import TranslationCacheConfig
 from translation_tower.secret_config import SecretConfig
-from translation_tower.translation_job import TranslationJob
+from translation_tower.translation_job import (
+    TranslationJob,
+    has_annotations,
+    translation_job_to_dict,
+)
+from translation_tower.translation_job_store import (
+    TranslationJobStore,
+    RUNNING,
+    DONE,
+    FAILED,
+)
 from translation_tower.translation_app_config import TranslationAppConfig
-from translation_tower.logger import logger
-from translation_tower.annotated_text_to_html import (
-    annotated_text_to_html,
-    html_to_annotated_text,
+from translation_tower.translation_batcher import TranslationBatcher
+from translation_tower.translation_inflight import TranslationInflight
+from translation_tower.metrics import Metrics
+from translation_tower.translation_limiter import (
+    TranslationLimiter,
+    SharedLimiterState,
 )
+from translation_tower.translation_hedger import TranslationHedger
+from translation_tower.fair_queue import FairQueue
+from translation_tower.translation_queue_pool import TranslationQueuePool
+from translation_tower.logger import logger
+from translation_tower.annotation_converter import AnnotationConverter
+from translation_tower.annotated_text_to_html import unwrap_paragraph
 from translation_tower.language import Language
 from translation_tower.translator import Translator, translator_to_string
 from translation_tower.translate.create_retry_client import create_retry_client
+from translation_tower.translate.create_client_session import (
+    create_client_session,
+    batch_context,
+    BatchContext,
+)
 from translation_tower.translate.bing_translate import bing_translate
 from translation_tower.translate.deepl_translate import deepl_translate
 from translation_tower.translate.fake_translate import fake_translate
+from translation_tower.translate.error import TranslatorError
 from translation_tower.format_traceback import format_traceback
 from translation_tower.annotation import annotation_from_dict
+from translation_tower.split_text import split_text, SENTENCE
 from itertools import zip_longest
 import rororo
 from dkpro_cassis_tools import load_cas_from_zip_file, dump_cas_to_zip_file
@@ -36,25 +61,82 @@ class TranslationApp:
         translation_app_config: Path,
         language_config: Path,
         secret_config: Path,
+        shared_limiter_states: Optional[Dict[str, SharedLimiterState]] = None,
+        resume_stored_jobs: bool = True,
     ):
-        self._cache = TranslationCache(TranslationCacheConfig.load(cache_config))
+        """
+        :param cache_config:
+        :param translation_app_config:
+        :param language_config:
+        :param secret_config:
+        :param shared_limiter_states: limiter states shared with the other worker
+        processes, by translator
+        :param resume_stored_jobs: resume the unfinished stored jobs at start (a
+        single worker must resume them)
+        """
+        shared_limiter_states = shared_limiter_states or dict()
+        self._metrics = Metrics()
+        cache_config = TranslationCacheConfig.load(cache_config)
+        self._cache = TranslationCache(cache_config, self._metrics)
+        self._job_store = TranslationJobStore(
+            cache_config.job_store_path, cache_config.job_store_retention
+        )
+        # Job store writes run in a single thread, in order
+        self._job_store_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="translation_job_store"
+        )
+        self._stored_jobs: Dict[str, asyncio.Task] = dict()
+        self._resume_stored_jobs = resume_stored_jobs
         self._config = TranslationAppConfig.load(translation_app_config)
         self._secret_config = SecretConfig.load(secret_config)
         self._language = Language(language_config)
         self._request_id = 0
         self._batch_id = 0
 
-        self._translation_queues = dict()
-        self._translation_queue_readers = dict()
+        self._translation_queues = TranslationQueuePool(
+            create_batcher=self.create_translation_batcher,
+            max_queues=self._config.limit_translation_queues,
+            metrics=self._metrics,
+        )
+        self._inflight = TranslationInflight()
+        self._client_sessions = dict()
+        self._hedger = TranslationHedger(
+            percentile=self._config.hedge_percentile,
+            budget=self._config.hedge_budget,
+            metrics=self._metrics,
+        )
+        self._annotation_converter = AnnotationConverter(
+            processes=self._config.annotation_processes,
+            offload_chars=self._config.annotation_offload_chars,
+            chunk_size=self._config.annotation_chunk_size,
+            metrics=self._metrics,
+        )
 
-        self._max_concurrent_requests_by_translator = dict(
-            bing=asyncio.BoundedSemaphore(self._config.bing_limit_concurrent_request),
-            deepl=asyncio.BoundedSemaphore(self._config.deepl_limit_concurrent_request),
+        self._limiters = dict(
+            bing=TranslationLimiter(
+                name="bing",
+                max_concurrent_requests=self._config.bing_limit_concurrent_request,
+                chars_per_second=self._config.bing_limit_chars_per_second,
+                requests_per_second=self._config.bing_limit_requests_per_second,
+                max_chars_per_request=self._config.bing_limit_chars_per_request,
+                metrics=self._metrics,
+                shared_state=shared_limiter_states.get("bing"),
+            ),
+            deepl=TranslationLimiter(
+                name="deepl",
+                max_concurrent_requests=self._config.deepl_limit_concurrent_request,
+                chars_per_second=self._config.deepl_limit_chars_per_second,
+                requests_per_second=self._config.deepl_limit_requests_per_second,
+                max_chars_per_request=self._config.deepl_limit_chars_per_request,
+                metrics=self._metrics,
+                shared_state=shared_limiter_states.get("deepl"),
+            ),
         )
 
-    def create_jobs_from_json(self, texts, request_id: str):
+    def create_jobs_from_json(self, texts, request_id: str, priority: int = 1):
         jobs = [
-            self.create_job_from_json(request_id, i, t) for i, t in enumerate(texts)
+            self.create_job_from_json(request_id, i, t, priority)
+            for i, t in enumerate(texts)
         ]
         return jobs
 
@@ -63,6 +145,7 @@ class TranslationApp:
         request_id,
         index,
         text_item: Dict,
+        priority: int = 1,
     ):
         try:
             text = text_item.get("text")
@@ -93,6 +176,7 @@ class TranslationApp:
             job.translator.html_mode = translator_html_mode
             job.translator.fake_mode = translator_fake_mode
             job.use_cache = use_cache
+            job.priority = priority
             return job
 
         except Exception as e:
@@ -115,12 +199,151 @@ class TranslationApp:
     def cache(self):
         return self._cache
 
+    @property
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    @property
+    def job_store(self) -> TranslationJobStore:
+        return self._job_store
+
     async def start(self):
-        pass
+        # Long-lived HTTP sessions, by translator
+        self._client_sessions = dict(
+            bing=create_client_session(self._config.bing_limit_concurrent_request),
+            deepl=create_client_session(self._config.deepl_limit_concurrent_request),
+            fake=create_client_session(
+                max(
+                    self._config.bing_limit_concurrent_request,
+                    self._config.deepl_limit_concurrent_request,
+                )
+            ),
+        )
+        self._annotation_converter.start()
+
+        # Resume the asynchronous jobs interrupted by the last stop
+        if self._resume_stored_jobs:
+            for job_id in await self.call_job_store(self._job_store.unfinished):
+                logger.info(f"Resume translation job {job_id}")
+                self.start_stored_job(job_id)
 
     async def stop(self):
-        for key in self._translation_queue_readers:
-            self._translation_queue_readers[key].cancel()
+        stored_jobs = list(self._stored_jobs.values())
+        for task in stored_jobs:
+            task.cancel()
+        await asyncio.gather(*stored_jobs, return_exceptions=True)
+        self._job_store_executor.shutdown(wait=True)
+        self._job_store.close()
+
+        await self._translation_queues.stop()
+        for client_session in self._client_sessions.values():
+            await client_session.close()
+        self._client_sessions = dict()
+
+        self._annotation_converter.stop()
+        await self._cache.close()
+
+    def create_stored_job(self, texts: List[Dict], priority: int = 1) -> str:
+        """
+        Store an asynchronous translation job and start it
+        :param texts: the text items of a translation request
+        :param priority:
+        :return: the job id
+        """
+        job_id = self._job_store.create(texts, priority)
+        self.start_stored_job(job_id)
+        return job_id
+
+    async def call_job_store(self, method: Callable[..., Any], *args) -> Any:
+        """
+        Call a method of the job store in its thread
+        :param method:
+        :param args:
+        :return: the result of the method
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._job_store_executor, method, *args
+        )
+
+    def start_stored_job(self, job_id: str):
+        self._stored_jobs[job_id] = asyncio.create_task(self.run_stored_job(job_id))
+
+    async def run_stored_job(self, job_id: str):
+        """
+        Translate the texts of a stored job that are not translated yet, and store
+        the translations as they complete: the translations completed during a
+        write are stored by the next one, in a single transaction
+        :param job_id:
+        :return:
+        """
+        store = self._job_store
+        try:
+            request = await self.call_job_store(store.get_request, job_id)
+            await self.call_job_store(store.set_status, job_id, RUNNING)
+
+            request_id = self.create_request_id()
+            logger.info(f"Handle translation job {job_id} as request nº{request_id}")
+            jobs = self.create_jobs_from_json(
+                request["texts"], request_id, request["priority"]
+            )
+            with_annotations = has_annotations(jobs)
+            completed = set(
+                await self.call_job_store(store.completed_indexes, job_id, len(jobs))
+            )
+            jobs = [job for job in jobs if job.index not in completed]
+
+            translations = dict()
+            write = None
+            if jobs:
+                async for job in self.translate_jobs_as_completed(jobs):
+                    translations[job.index] = translation_job_to_dict(
+                        job, with_annotations
+                    )
+                    if write is not None:
+                        if not write.done():
+                            continue
+                        if not write.result():
+                            break
+                    write = asyncio.ensure_future(
+                        self.call_job_store(store.add_results, job_id, translations)
+                    )
+                    translations = dict()
+
+            # Last translations
+            stored = write is None or await write
+            if stored and translations:
+                stored = await self.call_job_store(
+                    store.add_results, job_id, translations
+                )
+            if not stored:
+                # Deleted from another worker
+                logger.info(f"Translation job {job_id} deleted")
+                return
+
+            await self.call_job_store(store.set_status, job_id, DONE)
+            logger.info(f"Finish translation job {job_id}")
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.error(format_traceback(e))
+            await self.call_job_store(store.set_status, job_id, FAILED, str(e))
+
+        finally:
+            self._stored_jobs.pop(job_id, None)
+
+    async def delete_stored_job(self, job_id: str) -> bool:
+        """
+        Cancel a stored job and delete it with its translations
+        :param job_id:
+        :return: False if the job doesn't exist
+        """
+        task = self._stored_jobs.pop(job_id, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return await self.call_job_store(self._job_store.delete, job_id)
 
     @staticmethod
     def translation_queue_key(
@@ -139,24 +362,14 @@ class TranslationApp:
             f"{translator_to_string(translator)}/{text_language}/{translation_language}"
         )
 
-    def get_translation_queue(
+    async def get_translation_queue(
         self,
         source_language: str,
         target_language: str,
         translator: Translator,
     ):
         key = self.translation_queue_key(source_language, target_language, translator)
-        if key in self._translation_queues:
-            return self._translation_queues[key]
-        else:
-            self._translation_queues[key] = Queue(maxsize=20)
-            self._translation_queue_readers[key] = asyncio.create_task(
-                self.translate_from_queue(
-                    queue=self._translation_queues[key],
-                    translator=translator,
-                )
-            )
-            return self._translation_queues[key]
+        return await self._translation_queues.get(key, translator)
 
     async def translate_jobs(self, jobs: List[TranslationJob]):
         """
@@ -165,131 +378,412 @@ class TranslationApp:
         :param jobs:
         :return:
         """
+        submitted = list()
         try:
-            for i, job in enumerate(jobs):
-                job.to_translator = job.source.text
-                annotations = job.source.annotations
-
-                if annotations:
-                    html, rebuild = annotated_text_to_html(
-                        job.to_translator, annotations
-                    )
-                    job.to_translator = html
-                    job.annotation_rebuild = rebuild
-                    job.translator.html_mode = True
-
-                cached_translation = (
-                    self.cache.get(
-                        text=job.to_translator,
-                        source_language=job.source.language,
-                        target_language=job.target.language,
-                        translator=job.translator,
-                    )
-                    if job.use_cache
-                    else None
-                )
-
-                if cached_translation:
-                    job.from_cache = True
-                    job.from_translator = cached_translation.translation
-                else:
-                    job.done = Event()
-                    queue = self.get_translation_queue(
-                        job.source.language, job.target.language, job.translator
-                    )
-                    await queue.put(job)
-
-            # Non cached jobs
-            not_cached = list(filter(lambda j: j.from_cache is False, jobs))
+            await self.submit_jobs(jobs, submitted.append)
 
             # Wait
-            await asyncio.gather(*list(map(lambda j: j.done.wait(), not_cached)))
+            await asyncio.gather(*list(map(self.wait_job, jobs)))
 
-            for job in jobs:
-                if not job.error:
-                    if not job.source.annotations:
-                        job.target.text = job.from_translator
-                    else:
-                        text, annotations = html_to_annotated_text(
-                            job.from_translator, job.annotation_rebuild
-                        )
-                        job.target.text = text
-                        job.target.annotations = annotations
+            await self.finish_jobs(jobs)
 
             # Return translated job
             return jobs
 
         except asyncio.CancelledError:
-            processing_jobs = list(filter(lambda j: j.done is not None, jobs))
             logger.info(
                 f"Translation request nº{jobs[0].request_id} "
-                f"interrupted at {round(len(processing_jobs)*100/len(jobs), 2)}%"
+                f"interrupted at {round(len(submitted)*100/len(jobs), 2)}%"
             )
+            self.cancel_jobs(jobs)
             raise
 
-    async def translate_from_queue(self, queue: asyncio.Queue, translator: Translator):
+    async def translate_jobs_as_completed(
+        self, jobs: List[TranslationJob]
+    ) -> AsyncIterator[TranslationJob]:
+        """
+        Translate jobs and yield each job as soon as it is translated.
+        Cached jobs are yielded while the other jobs are still being submitted.
+
+        :param jobs:
+        :return:
+        """
+        finished = asyncio.Queue()
+        watchers = list()
+
+        async def watch(job: TranslationJob):
+            await self.wait_job(job)
+            await self.finish_jobs([job])
+            finished.put_nowait(job)
+
+        submit = asyncio.ensure_future(
+            self.submit_jobs(
+                jobs, lambda job: watchers.append(asyncio.ensure_future(watch(job)))
+            )
+        )
+        get = None
+        yielded = 0
+        try:
+            for _ in jobs:
+                get = asyncio.ensure_future(finished.get())
+                if not submit.done():
+                    await asyncio.wait({get, submit}, return_when=FIRST_COMPLETED)
+                # The jobs that were not submitted will never finish
+                if submit.done() and not get.done() and submit.exception() is not None:
+                    raise submit.exception()
+                yield await get
+                yielded += 1
+
+        finally:
+            # Interrupted: cancelled, closed by the consumer (client disconnected
+            # while a translation was written) or failed
+            if yielded < len(jobs):
+                logger.info(
+                    f"Translation request nº{jobs[0].request_id} "
+                    f"interrupted after {len(watchers)} submitted text(s)"
+                )
+                self.cancel_jobs(jobs)
+
+            if get is not None:
+                get.cancel()
+            submit.cancel()
+            for watcher in watchers:
+                watcher.cancel()
+
+    def cancel_jobs(self, jobs: List[TranslationJob]):
+        """
+        Cancel the jobs of an interrupted request. The jobs that are still in the
+        translation queues and that no other request waits for are removed, the
+        batchers drop those already read from the queues.
+
+        :param jobs:
+        :return:
+        """
+        keys = set()
+        for job in jobs:
+            for unit in job.segments or [job]:
+                unit.cancelled = True
+                if unit.queued_at is not None:
+                    keys.add(
+                        self.translation_queue_key(
+                            unit.source.language, unit.target.language, unit.translator
+                        )
+                    )
+
+        for key in keys:
+            queue = self._translation_queues.find(key)
+            if queue is not None:
+                self.drop_jobs(queue.remove(jobs[0].request_id))
+
+    def drop_jobs(self, jobs: List[TranslationJob]):
+        """
+        Finish cancelled jobs without sending them to the translator
+        :param jobs:
+        :return:
+        """
+        for job in jobs:
+            translator_name = translator_to_string(job.translator)
+            self._metrics.increment(f"cancelled_texts/{translator_name}")
+            self._metrics.increment(
+                f"cancelled_chars/{translator_name}", len(job.to_translator)
+            )
+            job.error = True
+            job.error_message = "Translation cancelled"
+            job.done.set()
+            self._inflight.resolve(job)
+
+    async def submit_jobs(
+        self,
+        jobs: List[TranslationJob],
+        submitted: Optional[Callable[[TranslationJob], None]] = None,
+    ):
+        """
+        Look up the cache for the jobs, and send the others to the translation queues
+
+        :param jobs:
+        :param submitted: called for each job once it is cached or queued
+        :return:
+        """
+        for job in jobs:
+            job.to_translator = job.source.text
+
+        # Annotated texts are translated as html
+        annotated_jobs = [job for job in jobs if job.source.annotations]
+        htmls = await self._annotation_converter.to_html(
+            [(job.to_translator, job.source.annotations) for job in annotated_jobs]
+        )
+        for job, (html, rebuild) in zip(annotated_jobs, htmls):
+            job.to_translator = html
+            job.annotation_rebuild = rebuild
+            job.translator.html_mode = True
+
+        # Units to translate (the job or its segments), by job. Long texts are
+        # split in segments
+        units = [self.split_job(job) for job in jobs]
+
+        # One cache lookup for the whole request
+        keys = [
+            [
+                self.cache.key(
+                    text=unit.to_translator,
+                    source_language=unit.source.language,
+                    target_language=unit.target.language,
+                    translator=unit.translator,
+                )
+                for unit in job_units
+            ]
+            for job_units in units
+        ]
+        cached_translations = await self.cache.get_many(
+            [
+                key
+                for job_units, job_keys in zip(units, keys)
+                for unit, key in zip(job_units, job_keys)
+                if unit.use_cache
+            ]
+        )
+
+        first_jobs = dict()
+        for job, job_units, job_keys in zip(jobs, units, keys):
+            for unit, key in zip(job_units, job_keys):
+                cached_translation = (
+                    cached_translations.get(key) if unit.use_cache else None
+                )
+                await self.submit_unit(unit, key, cached_translation, first_jobs)
+
+            if submitted is not None:
+                submitted(job)
+
+    async def submit_unit(
+        self,
+        job: TranslationJob,
+        key: str,
+        cached_translation: Optional[CachedTranslation],
+        first_jobs: Dict[str, TranslationJob],
+    ):
+        """
+        Take the translation of a job from the cache, or send it to its translation
+        queue
+
+        :param job:
+        :param key: cache key of the job
+        :param cached_translation: the translation of the job in the cache, if any
+        :param first_jobs: first job of the request, by cache key
+        :return:
+        """
+        # Collapse the duplicates of the request into the first identical job
+        first_job = first_jobs.get(key)
+        if first_job is not None:
+            job.from_cache = True
+            if first_job.done is None:
+                job.from_translator = first_job.from_translator
+            else:
+                job.done = Event()
+                first_job.followers.append(job)
+            return
+        first_jobs[key] = job
+
+        if cached_translation:
+            job.from_cache = True
+            job.from_translator = cached_translation.translation
+            return
+
+        job.done = Event()
+
+        # Attach the job to an identical job already sent to the translator
+        if job.use_cache:
+            if self._inflight.attach(key, job):
+                return
+            self._inflight.register(key, job)
+
+        job.queued_at = asyncio.get_running_loop().time()
+        queue = await self.get_translation_queue(
+            job.source.language, job.target.language, job.translator
+        )
+        await queue.put(job)
+
+    @staticmethod
+    async def wait_job(job: TranslationJob):
+        units = job.segments if job.segments else [job]
+        await asyncio.gather(
+            *[unit.done.wait() for unit in units if unit.done is not None]
+        )
 
-        jobs = []
-        length = 0
+    async def finish_jobs(self, jobs: List[TranslationJob]):
+        """
+        Build the targets of translated jobs
+        :param jobs:
+        :return:
+        """
+        annotated_jobs = list()
+        for job in jobs:
+            if job.segments:
+                self.join_segments(job)
+            if job.error:
+                continue
+
+            if not job.source.annotations:
+                job.target.text = job.from_translator
+            else:
+                annotated_jobs.append(job)
+
+        annotated_texts = await self._annotation_converter.from_html(
+            [(job.from_translator, job.annotation_rebuild) for job in annotated_jobs]
+        )
+        for job, annotated_text in zip(annotated_jobs, annotated_texts):
+            if isinstance(annotated_text, BaseException):
+                logger.warning(format_traceback(annotated_text))
+                job.error = True
+                job.error_message = f"Invalid translated annotations: {annotated_text}"
+            else:
+                job.target.text, job.target.annotations = annotated_text
+
+    def split_job(self, job: TranslationJob) -> List[TranslationJob]:
+        """
+        Split a job whose text exceeds the translator limit in segment jobs.
+        In segment cache mode, a cached job is split in sentences, so that each
+        sentence is cached and translated on its own.
+        :param job:
+        :return: the jobs to send to the translator
+        """
+        if job.translator.name == "bing":
+            limit_chars_per_text = self._config.bing_limit_chars_per_text
+        elif job.translator.name == "deepl":
+            limit_chars_per_text = self._config.deepl_limit_chars_per_text
+        else:
+            raise ValueError(f"Invalid translator {job.translator.name}")
+
+        by_sentence = self._config.segment_cache and job.use_cache
+        if len(job.to_translator) <= limit_chars_per_text and not by_sentence:
+            return [job]
+
+        # Annotated texts are wrapped in a <p> element: split its content
+        wrapped = job.annotation_rebuild is not None
+        text = job.to_translator
+        if wrapped:
+            text = text[len("<p>") : -len("</p>")]
+        html_mode = job.translator.html_mode
+        if by_sentence:
+            pieces = list()
+            for sentence, separator in split_text(
+                text, 0, html_mode=html_mode, level=SENTENCE
+            ):
+                if len(sentence) <= limit_chars_per_text:
+                    pieces.append((sentence, separator))
+                    continue
+                sentence_pieces = split_text(
+                    sentence, limit_chars_per_text, html_mode=html_mode
+                )
+                sentence_pieces[-1] = (sentence_pieces[-1][0], separator)
+                pieces.extend(sentence_pieces)
+        else:
+            pieces = split_text(text, limit_chars_per_text, html_mode=html_mode)
+        if len(pieces) == 1:
+            return [job]
+
+        job.segments = list()
+        job.segment_separators = list()
+        for segment, separator in pieces:
+            segment_job = TranslationJob(job.request_id, job.index)
+            segment_job.source.language = job.source.language
+            segment_job.target.language = job.target.language
+            segment_job.translator = job.translator
+            segment_job.to_translator = f"<p>{segment}</p>" if wrapped else segment
+            segment_job.use_cache = job.use_cache
+            segment_job.priority = job.priority
+            job.segments.append(segment_job)
+            job.segment_separators.append(separator)
+        return job.segments
+
+    @staticmethod
+    def join_segments(job: TranslationJob):
+        """
+        Stitch the translations of the segments of a job
+        :param job:
+        :return:
+        """
+        for segment_job in job.segments:
+            if segment_job.error:
+                job.error = True
+                job.error_message = segment_job.error_message
+                return
+
+        # Annotated texts: the segments are wrapped in a <p> element each, the
+        # text in a single one
+        wrapped = job.annotation_rebuild is not None
+        from_translator = "".join(
+            (
+                unwrap_paragraph(segment_job.from_translator)
+                if wrapped
+                else segment_job.from_translator
+            )
+            + separator
+            for segment_job, separator in zip(job.segments, job.segment_separators)
+        )
+        job.from_translator = (
+            f"<p>{from_translator}</p>" if wrapped else from_translator
+        )
+        job.from_cache = all(map(lambda j: j.from_cache, job.segments))
+
+    def create_translation_batcher(
+        self, queue: FairQueue, translator: Translator
+    ) -> TranslationBatcher:
 
         if translator.name == "bing":
             limit_texts_per_request = self._config.bing_limit_texts_per_request
             limit_chars_per_request = self._config.bing_limit_chars_per_request
+            max_linger = self._config.bing_batch_max_linger
         elif translator.name == "deepl":
             limit_texts_per_request = self._config.deepl_limit_texts_per_request
             limit_chars_per_request = self._config.deepl_limit_chars_per_request
+            max_linger = self._config.deepl_batch_max_linger
         else:
             raise ValueError(f"Invalid translator {translator.name}")
-        while True:
-            try:
-                job = await asyncio.wait_for(queue.get(), 1.0)
-                if (
-                    len(jobs) + 1 > limit_texts_per_request
-                    or length + len(job.to_translator) > limit_chars_per_request
-                ):
-                    if jobs:
-                        await self.create_translation_task(
-                            jobs=jobs,
-                        )
-                    # todo
-                    jobs = [job]
-                    length = len(job.to_translator)
-
-                else:
-                    jobs.append(job)
-                    length += len(job.to_translator)
-            except asyncio.exceptions.TimeoutError:
-                if jobs:
-                    await self.create_translation_task(
-                        jobs=jobs,
-                    )
-                    jobs = list()
-                    length = 0
-            except Exception as e:
-                # TODO
-                print("ERROR:", e)
-                ...
+
+        return TranslationBatcher(
+            queue=queue,
+            limit_texts_per_request=limit_texts_per_request,
+            limit_chars_per_request=limit_chars_per_request,
+            max_linger=max_linger,
+            send=self.create_translation_task,
+            idle_timeout=self._config.translation_queue_idle_timeout,
+            drop=self.drop_jobs,
+        )
 
     async def create_translation_task(
         self,
         jobs: List[TranslationJob],
+        fill_ratio: float,
     ):
 
-        semaphore = self._max_concurrent_requests_by_translator[jobs[0].translator.name]
-        await semaphore.acquire()
+        limiter = self._limiters[jobs[0].translator.name]
+        await limiter.acquire(sum(map(lambda j: len(j.to_translator), jobs)))
+
+        # Jobs cancelled while waiting for the limiter
+        dropped = [job for job in jobs if not job.wanted]
+        if dropped:
+            self.drop_jobs(dropped)
+            jobs = [job for job in jobs if job.wanted]
+            if not jobs:
+                await limiter.release(False)
+                return
 
         asyncio.create_task(
             self.send_to_translator(
                 jobs,
-                semaphore,
+                limiter,
+                fill_ratio,
             )
         )
 
     async def send_to_translator(
         self,
         jobs: List[TranslationJob],
-        semaphore: asyncio.Semaphore,
+        limiter: TranslationLimiter,
+        fill_ratio: float,
     ):
+        # Released by `translate_batch`
+        acquired = True
         try:
             # batch Id
             batch_id = self.create_batch_id()
@@ -306,65 +800,242 @@ class TranslationApp:
             # logging
             requests = Counter(list(map(lambda j: j.request_id, jobs)))
             request_info = ", ".join([f"{k}: {v} text(s)" for k, v in requests.items()])
+            followers = [(j, f) for j in jobs for f in j.followers]
+            collapsed = len([f for j, f in followers if f.request_id == j.request_id])
+            coalesced = len(followers) - collapsed
             logger.info(
                 f"Send batch nº {batch_id} to {translator_to_string(translator)} "
                 f"{source_language}->{target_language} "
                 f"with {len(jobs)} text(s) "
-                f"proceeding from request {request_info}"
+                f"proceeding from request {request_info} "
+                f"({collapsed} duplicate(s) collapsed, {coalesced} coalesced text(s)) "
+                f"filled at {round(fill_ratio * 100, 2)}%"
             )
 
-            retry_client = create_retry_client(batch_id=batch_id)
-
-            if translator.fake_mode:
-                translations = await fake_translate(
-                    texts,
-                    source_language,
-                    target_language,
-                    retry_client,
-                )
-
-            # Bing
-            elif translator.name == "bing":
-                translations = await bing_translate(
-                    texts,
-                    self._language.get(source_language, "bing"),
-                    self._language.get(target_language, "bing", for_translation=True),
-                    translator.html_mode,
-                    self._secret_config.bing_apikey,
-                    retry_client,
-                )
-
-            # Deepl
-            elif translator.name == "deepl":
-                translations = await deepl_translate(
-                    texts,
-                    self._language.get(source_language, "deepl"),
-                    self._language.get(target_language, "deepl", for_translation=True),
-                    translator.html_mode,
-                    self._secret_config.deepl_apikey,
-                    retry_client,
-                )
+            # Metrics
+            translator_name = translator_to_string(translator)
+            self._metrics.increment(f"batches/{translator_name}")
+            self._metrics.increment(f"texts/{translator_name}", len(texts))
+            self._metrics.increment(
+                f"chars/{translator_name}", sum(map(len, texts))
+            )
+            self._metrics.observe(f"batch_fill_ratio/{translator_name}", fill_ratio)
 
-            for job, translation in zip_longest(jobs, translations):
-                job.from_translator = translation
-                if job.use_cache:
-                    self._cache.set(
-                        text=job.to_translator,
-                        translation=job.from_translator,
-                        source_language=job.source.language,
-                        target_language=job.target.language,
-                        translator=job.translator,
-                    )
+            acquired = False
+            await self.translate_batch(jobs, batch_id, limiter)
 
         except Exception as e:
+            logger.error(format_traceback(e))
             for job in jobs:
                 job.error = True
                 job.error_message = str(e)
 
         finally:
-            semaphore.release()
+            # Translations of cancelled jobs are only useful to the cache
+            wasted = [job for job in jobs if not job.wanted]
+            if wasted:
+                translator_name = translator_to_string(jobs[0].translator)
+                self._metrics.increment(
+                    f"wasted_chars/{translator_name}",
+                    sum(map(lambda j: len(j.to_translator), wasted)),
+                )
+
+            if acquired:
+                await limiter.release(False)
             for job in jobs:
                 job.done.set()
+                self._inflight.resolve(job)
+
+    async def translate_batch(
+        self,
+        jobs: List[TranslationJob],
+        batch_id: str,
+        limiter: TranslationLimiter,
+    ) -> bool:
+        """
+        Translate a batch and cache its translations. Slow requests are hedged.
+        When the translator rejects the batch because of its texts, the batch is
+        bisected and each half is translated again, so that only the offending
+        texts fail.
+        :param jobs:
+        :param batch_id:
+        :param limiter: acquired for the batch, released once the translator
+        answered
+        :return: True if at least one text has been translated
+        """
+        error = await self.call_batch(jobs, batch_id, limiter)
+        if error is None:
+            return True
+        return await self.bisect_batch(jobs, batch_id, limiter, error)
+
+    async def bisect_batch(
+        self,
+        jobs: List[TranslationJob],
+        batch_id: str,
+        limiter: TranslationLimiter,
+        error: TranslatorError,
+    ) -> bool:
+        """
+        Translate the halves of a rejected batch, each one as a request of the
+        limiter, and bisect again the halves that are rejected. When both halves
+        are rejected alike, the error isn't caused by some texts: the batch fails.
+        :param jobs:
+        :param batch_id:
+        :param limiter: not acquired
+        :param error: error of the batch
+        :return: True if at least one text has been translated
+        """
+        if len(jobs) == 1 or not error.may_be_caused_by_texts:
+            self.fail_jobs(jobs, error)
+            return False
+
+        logger.warning(f"Bisect batch nº {batch_id} after error: {error}")
+        self._metrics.increment(
+            f"batches_bisected/{translator_to_string(jobs[0].translator)}"
+        )
+        half = len(jobs) // 2
+        halves = [(jobs[:half], f"{batch_id}.1"), (jobs[half:], f"{batch_id}.2")]
+        errors = list()
+        for half_jobs, half_batch_id in halves:
+            await limiter.acquire(sum(map(lambda j: len(j.to_translator), half_jobs)))
+            errors.append(await self.call_batch(half_jobs, half_batch_id, limiter))
+
+        first, second = errors
+        if (
+            first is not None
+            and second is not None
+            and (first.status, str(first)) == (second.status, str(second))
+        ):
+            self.fail_jobs(jobs, first)
+            return False
+
+        translated = False
+        for (half_jobs, half_batch_id), half_error in zip(halves, errors):
+            if half_error is None:
+                translated = True
+            elif await self.bisect_batch(half_jobs, half_batch_id, limiter, half_error):
+                translated = True
+        return translated
+
+    async def call_batch(
+        self,
+        jobs: List[TranslationJob],
+        batch_id: str,
+        limiter: TranslationLimiter,
+    ) -> Optional[TranslatorError]:
+        """
+        Send a batch to the translator, hedged, and cache its translations
+        :param jobs:
+        :param batch_id:
+        :param limiter: acquired for the batch, released once the translator
+        answered
+        :return: the error of the translator, None if the batch is translated
+        """
+        success = False
+        try:
+            first_job = jobs[0]
+            translations = await self._hedger.call(
+                key=self.translation_queue_key(
+                    first_job.source.language,
+                    first_job.target.language,
+                    first_job.translator,
+                ),
+                chars=sum(map(lambda j: len(j.to_translator), jobs)),
+                call=lambda hedge: self.call_translator(
+                    jobs, f"{batch_id}.hedge" if hedge else batch_id, limiter
+                ),
+                limiter=limiter,
+            )
+            success = True
+
+        except TranslatorError as e:
+            return e
+
+        finally:
+            await limiter.release(success)
+
+        for job, translation in zip_longest(jobs, translations):
+            job.from_translator = translation
+
+        # One cache write for the whole batch
+        self._cache.set_many(
+            [
+                CachedTranslation(
+                    text=job.to_translator,
+                    translation=job.from_translator,
+                    source_language=job.source.language,
+                    target_language=job.target.language,
+                    translator_name=job.translator.name,
+                    translator_html_mode=job.translator.html_mode,
+                    translator_fake_mode=job.translator.fake_mode,
+                )
+                for job in jobs
+                if job.use_cache
+            ]
+        )
+        return None
+
+    @staticmethod
+    def fail_jobs(jobs: List[TranslationJob], error: TranslatorError):
+        for job in jobs:
+            job.error = True
+            job.error_message = str(error)
+
+    async def call_translator(
+        self,
+        jobs: List[TranslationJob],
+        batch_id: str,
+        limiter: TranslationLimiter,
+    ) -> List[str]:
+        # Extract relevant data from first job
+        first_job = jobs[0]
+        source_language = first_job.source.language
+        target_language = first_job.target.language
+        translator = first_job.translator
+
+        # Extracts texts
+        texts = [job.to_translator for job in jobs]
+
+        # Retry client on the translator session
+        batch_context.set(BatchContext(batch_id=batch_id, limiter=limiter))
+        retry_client = create_retry_client(
+            self._client_sessions["fake" if translator.fake_mode else translator.name]
+        )
+
+        if translator.fake_mode:
+            translations = await fake_translate(
+                texts,
+                source_language,
+                target_language,
+                retry_client,
+            )
+
+        # Bing
+        elif translator.name == "bing":
+            translations = await bing_translate(
+                texts,
+                self._language.get(source_language, "bing"),
+                self._language.get(target_language, "bing", for_translation=True),
+                translator.html_mode,
+                self._secret_config.bing_apikey,
+                retry_client,
+            )
+
+        # Deepl
+        elif translator.name == "deepl":
+            translations = await deepl_translate(
+                texts,
+                self._language.get(source_language, "deepl"),
+                self._language.get(target_language, "deepl", for_translation=True),
+                translator.html_mode,
+                self._secret_config.deepl_apikey,
+                retry_client,
+            )
+
+        else:
+            raise ValueError(f"Invalid translator {translator.name}")
+
+        return translations
 
     async def translate_xmi_file(
         self,
@@ -375,6 +1046,7 @@ class TranslationApp:
         translator: str,
         translator_fake_mode: True,
         use_cache=True,
+        priority: int = 1,
     ):
         request_id = self.create_request_id()
 
@@ -395,6 +1067,7 @@ class TranslationApp:
             job.translator.name = translator
             job.translator.fake_mode = translator_fake_mode
             job.use_cache = use_cache
+            job.priority = priority
             jobs.append(job)
 
         await self.translate_jobs(jobs)
@@ -406,6 +1079,3 @@ class TranslationApp:
         new_cas = deep_texts_to_cas([j.target for j in jobs], cas_type_system)
         with open(translated_xmi, 'wb') as f:
             dump_cas_to_zip_file(new_cas, f)
-
-
-
@@ -13,6 +13,20 @@ class TranslationAppConfig:
         deepl_limit_texts_per_request: int,
         deepl_limit_chars_per_request: int,
         deepl_limit_chars_per_text: int,
+        bing_batch_max_linger: float = 0.05,
+        deepl_batch_max_linger: float = 0.05,
+        bing_limit_chars_per_second: float = 0,
+        bing_limit_requests_per_second: float = 0,
+        deepl_limit_chars_per_second: float = 0,
+        deepl_limit_requests_per_second: float = 0,
+        translation_queue_idle_timeout: float = 300,
+        limit_translation_queues: int = 512,
+        hedge_percentile: float = 0,
+        hedge_budget: float = 0.05,
+        segment_cache: bool = False,
+        annotation_processes: int = 0,
+        annotation_offload_chars: int = 20000,
+        annotation_chunk_size: int = 50,
     ):
         self._bing_limit_concurrent_request = bing_limit_concurrent_request
         self._bing_limit_texts_per_request = bing_limit_texts_per_request
@@ -22,6 +36,20 @@ class TranslationAppConfig:
         self._deepl_limit_texts_per_request = deepl_limit_texts_per_request
         self._deepl_limit_chars_per_request = deepl_limit_chars_per_request
         self._deepl_limit_chars_per_text = deepl_limit_chars_per_text
+        self._bing_batch_max_linger = bing_batch_max_linger
+        self._deepl_batch_max_linger = deepl_batch_max_linger
+        self._bing_limit_chars_per_second = bing_limit_chars_per_second
+        self._bing_limit_requests_per_second = bing_limit_requests_per_second
+        self._deepl_limit_chars_per_second = deepl_limit_chars_per_second
+        self._deepl_limit_requests_per_second = deepl_limit_requests_per_second
+        self._translation_queue_idle_timeout = translation_queue_idle_timeout
+        self._limit_translation_queues = limit_translation_queues
+        self._hedge_percentile = hedge_percentile
+        self._hedge_budget = hedge_budget
+        self._segment_cache = segment_cache
+        self._annotation_processes = annotation_processes
+        self._annotation_offload_chars = annotation_offload_chars
+        self._annotation_chunk_size = annotation_chunk_size
 
     @property
     def bing_limit_concurrent_request(self) -> int:
@@ -55,6 +83,73 @@ class TranslationAppConfig:
     def deepl_limit_chars_per_text(self) -> int:
         return self._deepl_limit_chars_per_text
 
+    @property
+    def bing_batch_max_linger(self) -> float:
+        return self._bing_batch_max_linger
+
+    @property
+    def deepl_batch_max_linger(self) -> float:
+        return self._deepl_batch_max_linger
+
+    @property
+    def bing_limit_chars_per_second(self) -> float:
+        return self._bing_limit_chars_per_second
+
+    @property
+    def bing_limit_requests_per_second(self) -> float:
+        return self._bing_limit_requests_per_second
+
+    @property
+    def deepl_limit_chars_per_second(self) -> float:
+        return self._deepl_limit_chars_per_second
+
+    @property
+    def deepl_limit_requests_per_second(self) -> float:
+        return self._deepl_limit_requests_per_second
+
+    @property
+    def translation_queue_idle_timeout(self) -> float:
+        return self._translation_queue_idle_timeout
+
+    @property
+    def limit_translation_queues(self) -> int:
+        return self._limit_translation_queues
+
+    @property
+    def hedge_percentile(self) -> float:
+        return self._hedge_percentile
+
+    @property
+    def hedge_budget(self) -> float:
+        return self._hedge_budget
+
+    @property
+    def segment_cache(self) -> bool:
+        return self._segment_cache
+
+    @property
+    def annotation_processes(self) -> int:
+        """
+        Processes converting the annotated texts of the large requests, 0 to
+        convert them on the event loop
+        """
+        return self._annotation_processes
+
+    @property
+    def annotation_offload_chars(self) -> int:
+        """
+        Min number of chars of a request to convert its annotated texts in the
+        annotation processes
+        """
+        return self._annotation_offload_chars
+
+    @property
+    def annotation_chunk_size(self) -> int:
+        """
+        Number of annotated texts sent at once to an annotation process
+        """
+        return self._annotation_chunk_size
+
     @staticmethod
     def load(path: Path):
         with path.open(encoding="utf-8") as f:
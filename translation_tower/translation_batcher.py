@@ -0,0 +1,183 @@
+import asyncio
+from typing import List, Callable, Awaitable
+from translation_tower.translation_job import TranslationJob
+from translation_tower.fair_queue import FairQueue
+
+
+class TranslationBatcher:
+    """
+    Read jobs from a translation queue and pack them in batches.
+
+    Jobs are held in a pending window of up to `window_factor` batches. When the
+    window is full, the pending jobs are packed first-fit-decreasing against
+    `limit_texts_per_request` and `limit_chars_per_request`: every batch is sent
+    except the least filled one, which stays in the window to be topped up.
+    When the oldest pending job has waited `max_linger` seconds in the window
+    (the time spent in the queue doesn't count), every batch is sent. With
+    `max_linger` set to 0, batches are sent as soon as the queue drains.
+    `run` returns once the queue has been empty for `idle_timeout` seconds.
+    Jobs that are not wanted anymore (cancelled requests) are dropped instead of
+    being sent.
+    """
+
+    def __init__(
+        self,
+        queue: FairQueue,
+        limit_texts_per_request: int,
+        limit_chars_per_request: int,
+        max_linger: float,
+        send: Callable[[List[TranslationJob], float], Awaitable[None]],
+        idle_timeout: float,
+        drop: Callable[[List[TranslationJob]], None],
+        window_factor: int = 2,
+    ):
+        self._queue = queue
+        self._limit_texts_per_request = limit_texts_per_request
+        self._limit_chars_per_request = limit_chars_per_request
+        self._max_linger = max_linger
+        self._send = send
+        self._drop = drop
+        self._idle_timeout = idle_timeout
+        self._window_texts = window_factor * limit_texts_per_request
+        self._window_chars = window_factor * limit_chars_per_request
+
+        self._jobs = list()
+        self._length = 0
+        self._sending = False
+
+    @property
+    def idle(self) -> bool:
+        """
+        True when the batcher holds no job
+        """
+        return not self._jobs and not self._sending
+
+    async def run(self):
+        """
+        Read the queue until it stays empty for `idle_timeout` seconds
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._jobs:
+                # Empty window: wait for the next job until the idle timeout
+                try:
+                    job = await asyncio.wait_for(self._queue.get(), self._idle_timeout)
+                except asyncio.TimeoutError:
+                    if self._queue.empty():
+                        return
+                    continue
+
+            elif not self._queue.empty():
+                # Jobs already waiting in the queue
+                job = self._queue.get_nowait()
+
+            else:
+                # Wait for more jobs until the deadline of the oldest job
+                batched_at = min(map(lambda j: j.batched_at, self._jobs))
+                timeout = batched_at + self._max_linger - loop.time()
+                try:
+                    if timeout <= 0:
+                        raise asyncio.TimeoutError()
+                    job = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    await self._flush(keep_least_filled=False)
+                    continue
+
+            if not job.wanted:
+                self._drop([job])
+                continue
+
+            if job.queued_at is None:
+                job.queued_at = loop.time()
+            job.batched_at = loop.time()
+            self._jobs.append(job)
+            self._length += len(job.to_translator)
+
+            # The window is full
+            if (
+                len(self._jobs) >= self._window_texts
+                or self._length >= self._window_chars
+            ):
+                await self._flush(keep_least_filled=True)
+
+    async def _flush(self, keep_least_filled: bool):
+        dropped = [job for job in self._jobs if not job.wanted]
+        if dropped:
+            self._jobs = [job for job in self._jobs if job.wanted]
+            self._length = sum(map(lambda j: len(j.to_translator), self._jobs))
+            self._drop(dropped)
+
+        batches = self.pack(
+            self._jobs, self._limit_texts_per_request, self._limit_chars_per_request
+        )
+        fill_ratios = list(map(self.fill_ratio, batches))
+
+        kept = list()
+        if keep_least_filled and len(batches) > 1:
+            least_filled = fill_ratios.index(min(fill_ratios))
+            kept = batches.pop(least_filled)
+            fill_ratios.pop(least_filled)
+
+        self._jobs = sorted(kept, key=lambda j: j.queued_at)
+        self._length = sum(map(lambda j: len(j.to_translator), self._jobs))
+
+        self._sending = True
+        try:
+            while batches:
+                await self._send(batches[0], fill_ratios[0])
+                batches.pop(0)
+                fill_ratios.pop(0)
+        finally:
+            self._sending = False
+
+            # Batches not sent go back to the window
+            if batches:
+                for batch in batches:
+                    self._jobs.extend(batch)
+                self._jobs.sort(key=lambda j: j.queued_at)
+                self._length = sum(map(lambda j: len(j.to_translator), self._jobs))
+
+    def fill_ratio(self, jobs: List[TranslationJob]) -> float:
+        """
+        Fill ratio of a batch: the most used of the texts and chars budgets
+        :param jobs:
+        :return:
+        """
+        return max(
+            len(jobs) / self._limit_texts_per_request,
+            sum(map(lambda j: len(j.to_translator), jobs))
+            / self._limit_chars_per_request,
+        )
+
+    @staticmethod
+    def pack(
+        jobs: List[TranslationJob],
+        limit_texts_per_request: int,
+        limit_chars_per_request: int,
+    ) -> List[List[TranslationJob]]:
+        """
+        Pack jobs in batches with the first-fit-decreasing heuristic.
+        A job longer than `limit_chars_per_request` gets its own batch.
+        :param jobs:
+        :param limit_texts_per_request:
+        :param limit_chars_per_request:
+        :return: batches, each one sorted by queue time
+        """
+        batches = list()
+        lengths = list()
+        for job in sorted(jobs, key=lambda j: len(j.to_translator), reverse=True):
+            length = len(job.to_translator)
+            for i, batch in enumerate(batches):
+                if (
+                    len(batch) < limit_texts_per_request
+                    and lengths[i] + length <= limit_chars_per_request
+                ):
+                    batch.append(job)
+                    lengths[i] += length
+                    break
+            else:
+                batches.append([job])
+                lengths.append(length)
+
+        return [sorted(batch, key=lambda j: j.queued_at) for batch in batches]
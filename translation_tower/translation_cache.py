@@ -1,26 +1,76 @@
-from diskcache import Cache
+import asyncio
+import pickle
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from translation_tower.translation_cache_config import TranslationCacheConfig
-from typing import NamedTuple
+from translation_tower.memory_cache import MemoryCache
+from translation_tower.cache_backend.create_cache_backend import create_cache_backend
+from translation_tower.cached_translation import (
+    CachedTranslation,
+    COMPRESSIONS,
+    encode_cached_translation,
+    decode_cached_translation,
+    zstandard,
+)
+from translation_tower.metrics import Metrics
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from hashlib import blake2b
 from translation_tower.logger import logger
 from translation_tower.format_traceback import format_traceback
 from translation_tower.translator import Translator, translator_to_string
 
 
-class CachedTranslation(NamedTuple):
-    text: str
-    translation: str
-    source_language: str
-    target_language: str
-    translator_name: str
-    translator_html_mode: bool
-    translator_fake_mode: bool
+# Key of the cache generation, incremented to invalidate the memory tiers
+GENERATION_KEY = "generation"
+
+# Number of sets between two culls of the disk cache
+CULL_INTERVAL = 100
 
 
 class TranslationCache:
-    def __init__(self, config: TranslationCacheConfig):
+    """
+    Translation cache stored by a backend (disk by default, see `CacheBackend`)
+    shared by the worker processes, with an LRU memory tier in front of it.
+    Writes go through to the backend.
+
+    The memory tiers of every worker are invalidated by incrementing the cache
+    generation (`invalidate`): each worker checks the generation every
+    `memory_generation_check_interval` seconds. Memory entries also expire after
+    `memory_ttl` seconds, which bounds how stale they can be.
+
+    `get_many` and `set_many` run the backend accesses in a thread pool, with the
+    bulk operations of the backend, so they don't block the event loop.
+    `set_many` writes behind: it returns once the memory tier is updated.
+    """
+
+    def __init__(
+        self, config: TranslationCacheConfig, metrics: Optional[Metrics] = None
+    ):
         self._config = config
-        self._cache = Cache(self._config.path, size_limit=self._config.size_limit)
+        self._metrics = metrics if metrics is not None else Metrics()
+        if self._config.compression not in COMPRESSIONS:
+            raise ValueError(f"Invalid cache compression {self._config.compression}")
+        if self._config.compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+
+        # Culled every `CULL_INTERVAL` sets, to count evictions. The sets are
+        # counted by the callers of the writes (event loop), not by the threads
+        self._cache = create_cache_backend(self._config)
+        self._sets = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._config.threads, thread_name_prefix="translation_cache"
+        )
+        self._writes: Set[asyncio.Future] = set()
+
+        self._memory = MemoryCache(
+            max_entries=self._config.memory_limit_entries,
+            max_bytes=self._config.memory_limit_bytes,
+            ttl=self._config.memory_ttl,
+        )
+        self._generation = self._cache.get(GENERATION_KEY, 0)
+        self._generation_checked_at = time.monotonic()
 
     @staticmethod
     def key(
@@ -33,15 +83,252 @@ class TranslationCache:
         h.update(bytes(translator_to_string(translator), encoding="utf-8"))
         return h.hexdigest()
 
+    @staticmethod
+    def key_of(cached_translation: CachedTranslation) -> str:
+        return TranslationCache.key(
+            cached_translation.text,
+            cached_translation.source_language,
+            cached_translation.target_language,
+            Translator(
+                name=cached_translation.translator_name,
+                html_mode=cached_translation.translator_html_mode,
+                fake_mode=cached_translation.translator_fake_mode,
+            ),
+        )
+
+    async def get_many(self, keys: List[str]) -> Dict[str, CachedTranslation]:
+        """
+        Look up keys in the memory tier, then the missing ones on disk in a single
+        transaction, off the event loop
+        :param keys:
+        :return: the cached translations found, by key
+        """
+        found = dict()
+        try:
+            keys = list(dict.fromkeys(keys))
+            now = time.monotonic()
+            self._check_generation(now)
+
+            # Memory tier
+            missing = list()
+            for key in keys:
+                cached_translation = self._memory.get(key, now)
+                if cached_translation is not None:
+                    found[key] = cached_translation
+                else:
+                    missing.append(key)
+            self._metrics.increment("cache/memory/hits", len(keys) - len(missing))
+            self._metrics.increment("cache/memory/misses", len(missing))
+            if not missing:
+                return found
+
+            # Disk tier
+            from_disk = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._get_many_from_disk, missing
+            )
+            self._metrics.increment("cache/disk/hits", len(from_disk))
+            self._metrics.increment("cache/disk/misses", len(missing) - len(from_disk))
+
+            now = time.monotonic()
+            for key, cached_translation in from_disk.items():
+                self._set_memory(key, cached_translation, now)
+            found.update(from_disk)
+
+        except Exception as e:
+            logger.error(format_traceback(e))
+        return found
+
+    def set_many(self, translations: List[CachedTranslation]):
+        """
+        Cache translations in the memory tier, and write them behind to disk in a
+        single transaction. Must be called from the event loop.
+        :param translations:
+        :return:
+        """
+        try:
+            now = time.monotonic()
+            entries = dict()
+            for cached_translation in translations:
+                key = self.key_of(cached_translation)
+                entries[key] = cached_translation
+                self._set_memory(key, cached_translation, now)
+
+            write = asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                self._set_many_on_disk,
+                entries,
+                self._count_sets(len(entries)),
+            )
+            self._writes.add(write)
+            write.add_done_callback(self._on_written)
+
+        except Exception as e:
+            logger.error(format_traceback(e))
+
+    async def flush(self):
+        """
+        Wait for the pending writes
+        :return:
+        """
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    async def close(self):
+        await self.flush()
+        self._executor.shutdown(wait=True)
+        self._cache.close()
+
+    def write_many(self, translations: List[CachedTranslation]) -> int:
+        """
+        Write translations to disk in a single transaction, bypassing the memory
+        tier (bulk imports)
+        :param translations:
+        :return: number of entries evicted from disk
+        """
+        evictions = self._set_many_on_disk(
+            {self.key_of(t): t for t in translations},
+            self._count_sets(len(translations)),
+        )
+        if evictions:
+            self._metrics.increment("cache/disk/evictions", evictions)
+        return evictions
+
+    def iter_translations(self) -> Iterator[CachedTranslation]:
+        """
+        Stream the translations stored on disk with their source
+        :return:
+        """
+        without_source = 0
+        for key in self._cache.iterkeys():
+            if key == GENERATION_KEY:
+                continue
+            cached_translation = decode_cached_translation(self._cache.get(key))
+            if cached_translation is None:
+                continue
+            if cached_translation.text is None:
+                without_source += 1
+                continue
+            yield cached_translation
+
+        if without_source:
+            logger.warning(
+                f"{without_source} cached translations stored without their source"
+            )
+
+    def compact(self, batch_size: int = 1000) -> Tuple[int, int, int]:
+        """
+        Rewrite the values of the disk cache in the current value format, one
+        transaction by batch
+        :param batch_size:
+        :return: number of rewritten values, size of the values before and after
+        """
+        rewritten = 0
+        size_before = 0
+        size_after = 0
+        keys = (key for key in self._cache.iterkeys() if key != GENERATION_KEY)
+        while True:
+            batch = list(islice(keys, batch_size))
+            if not batch:
+                break
+            new_values = dict()
+            for key, value in self._cache.get_many(batch).items():
+                new_value = self._encode(decode_cached_translation(value))
+                size_before += self._value_size(value)
+                size_after += len(new_value)
+                if new_value != value:
+                    new_values[key] = new_value
+            self._cache.set_many(new_values)
+            rewritten += len(new_values)
+            logger.info(f"{rewritten} cached translations rewritten")
+        return rewritten, size_before, size_after
+
+    def vacuum(self) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Release the space left by the rewritten values (SQLite VACUUM for the disk
+        backends). Run it offline: it locks the cache.
+        :return: volume of the cache before and after, None if unknown
+        """
+        volume_before = self._cache.volume()
+        self._cache.vacuum()
+        return volume_before, self._cache.volume()
+
+    def _encode(self, cached_translation: CachedTranslation) -> bytes:
+        return encode_cached_translation(
+            cached_translation,
+            store_source=self._config.store_source,
+            compression=self._config.compression,
+            compression_threshold=self._config.compression_threshold,
+        )
+
+    @staticmethod
+    def _value_size(value) -> int:
+        if isinstance(value, bytes):
+            return len(value)
+        return len(pickle.dumps(tuple(value), protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _get_many_from_disk(self, keys: List[str]) -> Dict[str, CachedTranslation]:
+        return {
+            key: decode_cached_translation(value)
+            for key, value in self._cache.get_many(keys).items()
+        }
+
+    def _count_sets(self, sets: int) -> bool:
+        """
+        :param sets:
+        :return: True if the disk cache must be culled after these sets
+        """
+        self._sets += sets
+        if self._sets >= CULL_INTERVAL:
+            self._sets = 0
+            return True
+        return False
+
+    def _set_many_on_disk(
+        self, entries: Dict[str, CachedTranslation], cull: bool
+    ) -> int:
+        """
+        :param entries:
+        :param cull: cull the disk cache after the writes
+        :return: number of entries evicted from disk
+        """
+        self._cache.set_many(
+            {key: self._encode(t) for key, t in entries.items()}
+        )
+        return self._cache.cull() if cull else 0
+
+    def _on_written(self, write: asyncio.Future):
+        self._writes.discard(write)
+        if write.cancelled():
+            return
+        if write.exception() is not None:
+            logger.error(format_traceback(write.exception()))
+        elif write.result():
+            self._metrics.increment("cache/disk/evictions", write.result())
+
     def get(
         self, text, source_language: str, target_language: str, translator: Translator
-    ):
+    ) -> Optional[CachedTranslation]:
         try:
             key = self.key(text, source_language, target_language, translator)
-            if key not in self._cache:
+            now = time.monotonic()
+            self._check_generation(now)
+
+            # Memory tier
+            cached_translation = self._memory.get(key, now)
+            if cached_translation is not None:
+                self._metrics.increment("cache/memory/hits")
+                return cached_translation
+            self._metrics.increment("cache/memory/misses")
+
+            # Disk tier
+            cached_translation = decode_cached_translation(self._cache.get(key))
+            if cached_translation is None:
+                self._metrics.increment("cache/disk/misses")
                 return None
-            else:
-                return self._cache.get(key)
+            self._metrics.increment("cache/disk/hits")
+
+            self._set_memory(key, cached_translation, now)
+            return cached_translation
 
         except Exception as e:
             logger.error(format_traceback(e))
@@ -62,18 +349,62 @@ class TranslationCache:
                 target_language,
                 translator,
             )
-            self._cache.set(
-                key,
-                CachedTranslation(
-                    text=text,
-                    translation=translation,
-                    source_language=source_language,
-                    target_language=target_language,
-                    translator_name=translator.name,
-                    translator_html_mode=translator.html_mode,
-                    translator_fake_mode=translator.fake_mode,
-                ),
+            cached_translation = CachedTranslation(
+                text=text,
+                translation=translation,
+                source_language=source_language,
+                target_language=target_language,
+                translator_name=translator.name,
+                translator_html_mode=translator.html_mode,
+                translator_fake_mode=translator.fake_mode,
             )
+            self._cache.set(key, self._encode(cached_translation))
+            self._set_memory(key, cached_translation, time.monotonic())
+
+            if self._count_sets(1):
+                self._cull()
 
         except Exception as e:
             logger.error(format_traceback(e))
+
+    def invalidate(self):
+        """
+        Invalidate the memory tiers of all the workers, after the disk cache is
+        modified by another way than `set`
+        :return:
+        """
+        self._generation = self._cache.incr(GENERATION_KEY)
+        self._memory.clear()
+        self._update_memory_metrics()
+
+    def _check_generation(self, now: float):
+        if (
+            now - self._generation_checked_at
+            < self._config.memory_generation_check_interval
+        ):
+            return
+        self._generation_checked_at = now
+        generation = self._cache.get(GENERATION_KEY, 0)
+        if generation != self._generation:
+            logger.info("Translation cache generation changed, clear memory tier")
+            self._generation = generation
+            self._memory.clear()
+            self._update_memory_metrics()
+
+    def _set_memory(self, key: str, cached_translation: CachedTranslation, now: float):
+        size = sys.getsizeof(cached_translation.text) + sys.getsizeof(
+            cached_translation.translation
+        )
+        evictions = self._memory.set(key, cached_translation, size, now)
+        if evictions:
+            self._metrics.increment("cache/memory/evictions", evictions)
+        self._update_memory_metrics()
+
+    def _update_memory_metrics(self):
+        self._metrics.gauge("cache/memory/entries", len(self._memory))
+        self._metrics.gauge("cache/memory/bytes", self._memory.bytes)
+
+    def _cull(self):
+        evictions = self._cache.cull()
+        if evictions:
+            self._metrics.increment("cache/disk/evictions", evictions)
@@ -1,13 +1,38 @@
 from pathlib import Path
+from typing import Optional
 import yaml
 
 
 class TranslationCacheConfig:
     def __init__(self,
                  path: str,
-                 size_limit: int):
+                 size_limit: int,
+                 job_store_path: Optional[str] = None,
+                 job_store_retention: float = 7 * 24 * 3600,
+                 memory_limit_entries: int = 100000,
+                 memory_limit_bytes: int = 0,
+                 memory_ttl: float = 300,
+                 memory_generation_check_interval: float = 1.0,
+                 threads: int = 4,
+                 store_source: bool = True,
+                 compression: str = "zlib",
+                 compression_threshold: int = 256,
+                 backend: str = "disk",
+                 shards: int = 8):
         self._path = path
         self._size_limit = size_limit
+        self._job_store_path = job_store_path
+        self._job_store_retention = job_store_retention
+        self._memory_limit_entries = memory_limit_entries
+        self._memory_limit_bytes = memory_limit_bytes
+        self._memory_ttl = memory_ttl
+        self._memory_generation_check_interval = memory_generation_check_interval
+        self._threads = threads
+        self._store_source = store_source
+        self._compression = compression
+        self._compression_threshold = compression_threshold
+        self._backend = backend
+        self._shards = shards
 
     @property
     def path(self) -> str:
@@ -17,6 +42,86 @@ class TranslationCacheConfig:
     def size_limit(self) -> int:
         return self._size_limit
 
+    @property
+    def job_store_path(self) -> str:
+        """
+        Directory of the asynchronous jobs store, next to the cache by default
+        """
+        if self._job_store_path is not None:
+            return self._job_store_path
+        return str(Path(self._path).parent / "translation_jobs")
+
+    @property
+    def job_store_retention(self) -> float:
+        """
+        Seconds to keep a finished asynchronous job, 0 to keep it forever
+        """
+        return self._job_store_retention
+
+    @property
+    def memory_limit_entries(self) -> int:
+        """
+        Max entries of the memory tier, 0 to disable it
+        """
+        return self._memory_limit_entries
+
+    @property
+    def memory_limit_bytes(self) -> int:
+        """
+        Max size of the memory tier, 0 for no limit
+        """
+        return self._memory_limit_bytes
+
+    @property
+    def memory_ttl(self) -> float:
+        return self._memory_ttl
+
+    @property
+    def memory_generation_check_interval(self) -> float:
+        return self._memory_generation_check_interval
+
+    @property
+    def threads(self) -> int:
+        """
+        Threads accessing the disk cache for `get_many` and `set_many`
+        """
+        return self._threads
+
+    @property
+    def store_source(self) -> bool:
+        """
+        Store the source text of the translations, needed to export the cache
+        """
+        return self._store_source
+
+    @property
+    def compression(self) -> str:
+        """
+        Compression of the cached values: none, zlib or zstd
+        """
+        return self._compression
+
+    @property
+    def compression_threshold(self) -> int:
+        """
+        Min size in bytes of a cached value to compress it
+        """
+        return self._compression_threshold
+
+    @property
+    def backend(self) -> str:
+        """
+        Cache backend: disk (diskcache), fanout (sharded diskcache) or memory
+        """
+        return self._backend
+
+    @property
+    def shards(self) -> int:
+        """
+        Shards of the fanout backend
+        """
+        return self._shards
+
     @staticmethod
     def load(path: Path):
         with path.open(encoding='utf-8') as f:
@@ -0,0 +1,120 @@
+import asyncio
+import math
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+from translation_tower.metrics import Metrics
+from translation_tower.translation_limiter import TranslationLimiter
+from translation_tower.logger import logger
+
+
+class TranslationHedger:
+    """
+    Hedge slow translator requests.
+
+    The latencies of the last requests are recorded by queue key (translator and
+    language pair). When a request hasn't returned after the `percentile` of the
+    recent latencies, a duplicate request is sent and the first success is kept.
+    Hedged chars are capped to `budget` times the chars sent to the translators.
+    A hedge is a request of the limiter like any other: it is only sent if the
+    limiter lets it go without waiting. A `percentile` of 0 disables hedging.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        budget: float,
+        metrics: Metrics,
+        min_samples: int = 20,
+        max_samples: int = 200,
+    ):
+        self._percentile = percentile
+        self._budget = budget
+        self._metrics = metrics
+        self._min_samples = min_samples
+        self._latencies: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=max_samples)
+        )
+        self._sent_chars = 0
+        self._hedged_chars = 0
+
+    def delay(self, key: str) -> Optional[float]:
+        """
+        :param key:
+        :return: seconds to wait before hedging a request, None to not hedge
+        """
+        latencies = self._latencies[key]
+        if not self._percentile or len(latencies) < self._min_samples:
+            return None
+        ordered = sorted(latencies)
+        index = math.ceil(self._percentile / 100 * len(ordered)) - 1
+        return ordered[min(len(ordered) - 1, max(0, index))]
+
+    async def call(
+        self,
+        key: str,
+        chars: int,
+        call: Callable[[bool], Awaitable[List[str]]],
+        limiter: TranslationLimiter,
+    ) -> List[str]:
+        """
+        Call a translator, hedging the call if it is slow
+        :param key: queue key of the batch
+        :param chars: chars of the batch
+        :param call: send the batch, its argument tells if the call is a hedge
+        :param limiter: limiter of the translator, already acquired for the call
+        :return: the translations
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self._sent_chars += chars
+
+        delay = self.delay(key)
+        primary = asyncio.ensure_future(call(False))
+        tasks = [primary]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done:
+                    if self._hedged_chars + chars > self._budget * self._sent_chars:
+                        self._metrics.increment(f"hedges_over_budget/{key}")
+                    elif not limiter.acquire_nowait(chars):
+                        self._metrics.increment(f"hedges_limited/{key}")
+                    else:
+                        logger.info(f"Hedge {key} request after {round(delay, 3)}s")
+                        self._hedged_chars += chars
+                        self._sent_chars += chars
+                        self._metrics.increment(f"hedges_fired/{key}")
+                        tasks.append(asyncio.ensure_future(self._hedge(call, limiter)))
+
+            # First success, or last error
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._metrics.increment(f"hedges_won/{key}")
+                        self._latencies[key].append(loop.time() - start)
+                        return task.result()
+                    error = task.exception()
+            raise error
+
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    @staticmethod
+    async def _hedge(
+        call: Callable[[bool], Awaitable[List[str]]], limiter: TranslationLimiter
+    ) -> List[str]:
+        success = False
+        try:
+            translations = await call(True)
+            success = True
+            return translations
+        finally:
+            await limiter.release(success)
@@ -0,0 +1,52 @@
+from typing import Dict
+from translation_tower.translation_job import TranslationJob
+
+
+class TranslationInflight:
+    """
+    Registry of the jobs waiting for a translator, keyed like the cache.
+
+    A job whose key is already registered attaches to the registered job (the leader)
+    instead of being sent again, and receives the leader translation when it is resolved.
+    """
+
+    def __init__(self):
+        self._leaders: Dict[str, TranslationJob] = dict()
+
+    def __len__(self):
+        return len(self._leaders)
+
+    def attach(self, key: str, job: TranslationJob) -> bool:
+        """
+        Attach a job to the in-flight job with the same key
+        :param key:
+        :param job:
+        :return: False if no job with this key is in flight
+        """
+        leader = self._leaders.get(key)
+        if leader is None:
+            return False
+        leader.followers.append(job)
+        return True
+
+    def register(self, key: str, job: TranslationJob):
+        job.inflight_key = key
+        self._leaders[key] = job
+
+    def resolve(self, job: TranslationJob):
+        """
+        Unregister a job and copy its result to the jobs attached to it
+        :param job:
+        :return:
+        """
+        if job.inflight_key is not None and self._leaders.get(job.inflight_key) is job:
+            del self._leaders[job.inflight_key]
+
+        for follower in job.followers:
+            follower.from_translator = job.from_translator
+            follower.error = job.error
+            follower.error_message = job.error_message
+            follower.done.set()
+
+            # Duplicates of the follower in its own request
+            self.resolve(follower)
@@ -1,7 +1,8 @@
 from asyncio import Event
-from typing import Optional
+from typing import Optional, List, Dict
 from translation_tower.translator import Translator
 from translation_tower.deep_text import DeepText
+from translation_tower.annotation import annotation_to_dict
 from dataclasses import dataclass, field
 
 
@@ -27,6 +28,9 @@ class TranslationJob:
     # Text received from the translate
     from_translator: str = None
 
+    # Weight of the request in the translation queues
+    priority: int = 1
+
     # Use cache
     use_cache = False
 
@@ -36,8 +40,71 @@ class TranslationJob:
     # Metadata to rebuild translated annotations
     annotation_rebuild = None
 
+    # Loop time at which the job was put in a translation queue
+    queued_at: Optional[float] = None
+
+    # Loop time at which a batcher took the job off its translation queue
+    batched_at: Optional[float] = None
+
     # Event to notify that the job translation has completed
     done: Optional[Event] = None
 
+    # Key of the job in the in-flight registry
+    inflight_key: Optional[str] = None
+
+    # Identical jobs waiting for the translation of this job
+    followers: List["TranslationJob"] = field(default_factory=list)
+
+    # Jobs translating the segments of a text too long for the translator
+    segments: Optional[List["TranslationJob"]] = None
+
+    # Whitespace between the segments
+    segment_separators: Optional[List[str]] = None
+
+    # The request of the job was cancelled
+    cancelled: bool = False
+
     error: bool = False
     error_message: str = ""
+
+    @property
+    def wanted(self) -> bool:
+        """
+        False when the job and all the jobs waiting for it are cancelled
+        """
+        return not self.cancelled or any(f.wanted for f in self.followers)
+
+
+def has_annotations(jobs: List[TranslationJob]) -> bool:
+    return True if list(filter(lambda j: j.source.annotations is not None, jobs)) else False
+
+
+def translation_jobs_to_dicts(jobs: List[TranslationJob]) -> List[Dict]:
+    with_annotations = has_annotations(jobs)
+    return [translation_job_to_dict(job, with_annotations) for job in jobs]
+
+
+def translation_job_to_dict(job: TranslationJob, with_annotations: bool) -> Dict:
+    d = dict()
+    d["text"] = job.source.text
+    d["translation"] = job.target.text
+    d["source_lang"] = job.source.language
+    d["target_lang"] = job.target.language
+    if with_annotations:
+        if job.source.annotations is None:
+            d["source_annotations"] = []
+        else:
+            d["source_annotations"] = list(
+                map(annotation_to_dict, job.source.annotations)
+            )
+        if job.target.annotations is None:
+            d["target_annotations"] = []
+        else:
+            d["target_annotations"] = list(
+                map(annotation_to_dict, job.target.annotations)
+            )
+    d["translate"] = job.translator.name
+    d["from_cache"] = job.from_cache
+    if job.error:
+        d["error"] = job.error_message
+    return d
@@ -0,0 +1,146 @@
+import time
+import uuid
+from typing import Dict, List, Optional, Set
+from diskcache import Cache
+
+# Status of a stored job
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class TranslationJobStore:
+    """
+    On-disk store of the asynchronous translation jobs.
+
+    For each job, the store keeps the request (`request/<id>`), its state
+    (`state/<id>`) and one entry by translated text (`result/<id>/<index>`),
+    so the job survives a restart of the server and its finished translations
+    are not lost. The ids of the pending and running jobs are kept in
+    `unfinished`.
+
+    Nothing is evicted for size: a finished job expires `retention` seconds
+    after it finished.
+
+    The calls are blocking: the event loop runs them in a thread.
+    """
+
+    def __init__(self, path: str, retention: float):
+        """
+        :param path:
+        :param retention: seconds to keep a finished job, 0 to keep it forever
+        """
+        self._cache = Cache(path, eviction_policy="none")
+        self._retention = retention
+
+    def create(self, texts: List[Dict], priority: int) -> str:
+        job_id = uuid.uuid4().hex
+        with self._cache.transact():
+            self._cache.set(
+                f"request/{job_id}",
+                dict(texts=texts, priority=priority, created=time.time()),
+            )
+            self._cache.set(
+                f"state/{job_id}",
+                dict(status=PENDING, total=len(texts), completed=0, errors=0),
+            )
+            self._cache.set("unfinished", self._unfinished() | {job_id})
+        return job_id
+
+    def get_request(self, job_id: str) -> Optional[Dict]:
+        return self._cache.get(f"request/{job_id}")
+
+    def get_state(self, job_id: str) -> Optional[Dict]:
+        return self._cache.get(f"state/{job_id}")
+
+    def set_status(self, job_id: str, status: str, detail: Optional[str] = None):
+        with self._cache.transact():
+            state = self._cache.get(f"state/{job_id}")
+            if state is None:
+                return
+            state["status"] = status
+            if detail is not None:
+                state["detail"] = detail
+            self._cache.set(f"state/{job_id}", state)
+
+            if status not in (PENDING, RUNNING):
+                self._cache.set("unfinished", self._unfinished() - {job_id})
+                if self._retention:
+                    for key in self._keys(job_id, state["total"]):
+                        self._cache.touch(key, expire=self._retention)
+
+    def add_results(self, job_id: str, translations: Dict[int, Dict]) -> bool:
+        """
+        Store translated texts of a job in a single transaction
+        :param job_id:
+        :param translations: translation by text index
+        :return: False if the job doesn't exist anymore
+        """
+        with self._cache.transact():
+            state = self._cache.get(f"state/{job_id}")
+            if state is None:
+                return False
+            for index, translation in translations.items():
+                key = f"result/{job_id}/{index}"
+                if key not in self._cache:
+                    state["completed"] += 1
+                    if "error" in translation:
+                        state["errors"] += 1
+                self._cache.set(key, translation)
+            self._cache.set(f"state/{job_id}", state)
+        return True
+
+    def get_results(self, job_id: str, offset: int, limit: int) -> List[Dict]:
+        """
+        Translated texts of a job whose index is in [offset, offset + limit[
+        """
+        results = list()
+        for index in range(offset, offset + limit):
+            translation = self._cache.get(f"result/{job_id}/{index}")
+            if translation is not None:
+                results.append(dict(translation, index=index))
+        return results
+
+    def completed_indexes(self, job_id: str, total: int) -> List[int]:
+        return [i for i in range(total) if f"result/{job_id}/{i}" in self._cache]
+
+    def delete(self, job_id: str) -> bool:
+        state = self._cache.get(f"state/{job_id}")
+        if state is None:
+            return False
+        with self._cache.transact():
+            for key in self._keys(job_id, state["total"]):
+                self._cache.delete(key)
+            self._cache.set("unfinished", self._unfinished() - {job_id})
+        return True
+
+    def unfinished(self) -> List[str]:
+        """
+        Ids of the jobs that were pending or running. The expired jobs are
+        removed meanwhile.
+        """
+        self._cache.expire()
+        return sorted(self._unfinished())
+
+    def _unfinished(self) -> Set[str]:
+        job_ids = self._cache.get("unfinished")
+        if job_ids is None:
+            # Store written without the index of the unfinished jobs
+            job_ids = set()
+            for key in self._cache.iterkeys():
+                if key.startswith("state/"):
+                    state = self._cache.get(key)
+                    if state is not None and state["status"] in (PENDING, RUNNING):
+                        job_ids.add(key[len("state/") :])
+        return job_ids
+
+    @staticmethod
+    def _keys(job_id: str, total: int) -> List[str]:
+        return [f"result/{job_id}/{index}" for index in range(total)] + [
+            f"request/{job_id}",
+            f"state/{job_id}",
+        ]
+
+    def close(self):
+        self._cache.close()
@@ -0,0 +1,262 @@
+import asyncio
+import ctypes
+import math
+import multiprocessing
+import time
+from contextlib import nullcontext
+from typing import Any, NamedTuple, Optional
+from translation_tower.metrics import Metrics
+
+
+class TokenBucketState(ctypes.Structure):
+    _fields_ = [("tokens", ctypes.c_double), ("last", ctypes.c_double)]
+
+
+class TranslationLimiterState(ctypes.Structure):
+    """
+    State of a translation limiter. A zeroed state is initialized by the first
+    limiter using it, so the state can be shared by processes (see
+    `create_shared_limiter_state`).
+    """
+
+    _fields_ = [
+        ("initialized", ctypes.c_bool),
+        ("window", ctypes.c_double),
+        ("in_flight", ctypes.c_long),
+        ("blocked_until", ctypes.c_double),
+        ("last_decrease", ctypes.c_double),
+        ("chars", TokenBucketState),
+        ("requests", TokenBucketState),
+    ]
+
+
+class SharedLimiterState(NamedTuple):
+    state: TranslationLimiterState
+    lock: Any
+
+
+def create_shared_limiter_state() -> SharedLimiterState:
+    """
+    Create a limiter state in shared memory, to be inherited by forked workers
+    :return:
+    """
+    context = multiprocessing.get_context("fork")
+    return SharedLimiterState(
+        state=context.RawValue(TranslationLimiterState), lock=context.Lock()
+    )
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second. A rate of 0 means unlimited.
+    A request bigger than the bucket capacity is allowed when the bucket is full,
+    and leaves the bucket in debt.
+    """
+
+    def __init__(
+        self, rate: float, capacity: float, state: Optional[TokenBucketState] = None
+    ):
+        self._rate = rate
+        self._capacity = max(rate, capacity)
+        if state is None:
+            state = TokenBucketState()
+            state.tokens = self._capacity
+        self._state = state
+
+    def reset(self):
+        self._state.tokens = self._capacity
+        self._state.last = 0.0
+
+    def _refill(self, now: float):
+        if self._state.last:
+            self._state.tokens = min(
+                self._capacity,
+                self._state.tokens + (now - self._state.last) * self._rate,
+            )
+        self._state.last = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """
+        :param amount:
+        :param now:
+        :return: seconds to wait before `amount` tokens can be taken
+        """
+        if not self._rate:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self._capacity) - self._state.tokens
+        return max(0.0, missing / self._rate)
+
+    def take(self, amount: float, now: float):
+        if self._rate:
+            self._refill(now)
+            self._state.tokens -= amount
+
+
+class TranslationLimiter:
+    """
+    Limit the requests sent to a translator.
+
+    Requests are limited by a chars/second and a requests/second token bucket,
+    and by a concurrency window adjusted with AIMD: the window grows by one
+    request per window of successful requests, up to `max_concurrent_requests`,
+    and is halved when the translator throttles (HTTP 429). A `Retry-After`
+    delay blocks every new request until it expires.
+
+    With a shared state, the limits apply to all the processes sharing it. The
+    releases of the other processes are not notified, so a waiting request polls
+    the state every `poll_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent_requests: int,
+        chars_per_second: float,
+        requests_per_second: float,
+        max_chars_per_request: int,
+        metrics: Metrics,
+        decrease_cooldown: float = 1.0,
+        shared_state: Optional[SharedLimiterState] = None,
+        poll_interval: float = 0.05,
+    ):
+        self._name = name
+        self._max_concurrent_requests = max_concurrent_requests
+        self._metrics = metrics
+        self._decrease_cooldown = decrease_cooldown
+
+        if shared_state is None:
+            self._state = TranslationLimiterState()
+            self._lock = nullcontext()
+            self._poll_interval = None
+        else:
+            self._state = shared_state.state
+            self._lock = shared_state.lock
+            self._poll_interval = poll_interval
+        self._chars = TokenBucket(
+            chars_per_second, max_chars_per_request, self._state.chars
+        )
+        self._requests = TokenBucket(requests_per_second, 1, self._state.requests)
+        self._condition = asyncio.Condition()
+        self._waiting = 0
+
+        with self._lock:
+            if not self._state.initialized:
+                self._state.window = float(max_concurrent_requests)
+                self._chars.reset()
+                self._requests.reset()
+                self._state.initialized = True
+
+    @property
+    def window(self) -> int:
+        return int(self._state.window)
+
+    @property
+    def in_flight(self) -> int:
+        return self._state.in_flight
+
+    async def acquire(self, chars: int):
+        """
+        Wait until a request of `chars` characters can be sent
+        :param chars:
+        :return:
+        """
+        async with self._condition:
+            self._waiting += 1
+            try:
+                while True:
+                    with self._lock:
+                        delay = self._try_acquire(chars, time.monotonic())
+                    if not delay:
+                        self._update_metrics()
+                        return
+
+                    if self._poll_interval is not None:
+                        delay = min(delay, self._poll_interval)
+                    try:
+                        await asyncio.wait_for(
+                            self._condition.wait(),
+                            None if math.isinf(delay) else delay,
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiting -= 1
+
+    def acquire_nowait(self, chars: int) -> bool:
+        """
+        Acquire a request of `chars` characters only if it can be sent now, and
+        no other request of this process waits for the limiter
+        :param chars:
+        :return: True if the request is acquired
+        """
+        if self._waiting:
+            return False
+        with self._lock:
+            delay = self._try_acquire(chars, time.monotonic())
+        if delay:
+            return False
+        self._update_metrics()
+        return True
+
+    def _try_acquire(self, chars: int, now: float) -> float:
+        """
+        Take the tokens of a request if it can be sent now
+        :param chars:
+        :param now:
+        :return: 0 when the request is acquired, else seconds to wait (inf until a
+        request is released)
+        """
+        if self._state.in_flight >= self.window:
+            return math.inf
+
+        delay = max(
+            self._state.blocked_until - now,
+            self._chars.delay(chars, now),
+            self._requests.delay(1, now),
+        )
+        if delay > 0:
+            return delay
+
+        self._chars.take(chars, now)
+        self._requests.take(1, now)
+        self._state.in_flight += 1
+        return 0.0
+
+    async def release(self, success: bool):
+        async with self._condition:
+            with self._lock:
+                self._state.in_flight -= 1
+                if success:
+                    self._state.window = min(
+                        self._max_concurrent_requests,
+                        self._state.window + 1 / self._state.window,
+                    )
+            self._update_metrics()
+            self._condition.notify_all()
+
+    def throttle(self, retry_after: Optional[float] = None):
+        """
+        Called when the translator answers HTTP 429
+        :param retry_after: seconds from the Retry-After header
+        :return:
+        """
+        now = time.monotonic()
+        with self._lock:
+            if (
+                not self._state.last_decrease
+                or now - self._state.last_decrease >= self._decrease_cooldown
+            ):
+                self._state.window = max(1.0, self._state.window / 2)
+                self._state.last_decrease = now
+            if retry_after:
+                self._state.blocked_until = max(
+                    self._state.blocked_until, now + retry_after
+                )
+
+        self._metrics.increment(f"limiter/{self._name}/throttled")
+        self._update_metrics()
+
+    def _update_metrics(self):
+        self._metrics.gauge(f"limiter/{self._name}/window", self.window)
+        self._metrics.gauge(f"limiter/{self._name}/in_flight", self.in_flight)
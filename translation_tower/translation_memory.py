@@ -0,0 +1,149 @@
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+from lxml import etree
+from translation_tower.translation_cache import TranslationCache, CachedTranslation
+from translation_tower.translator import Translator
+from translation_tower.logger import logger
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+# Inline elements of a TMX segment holding native codes, not text
+TMX_CODE_TAGS = {"bpt", "ept", "it", "ph", "ut"}
+
+
+def read_tmx(
+    path: Path, source_lang: str, target_lang: str
+) -> Iterator[Tuple[str, str]]:
+    """
+    Stream the (text, translation) pairs of a TMX file.
+    A language matches a `xml:lang` attribute with or without its region
+    (`en` matches `en-GB`).
+
+    :param path:
+    :param source_lang:
+    :param target_lang:
+    :return:
+    """
+    for _, tu in etree.iterparse(str(path), tag="tu"):
+        segments = dict()
+        for tuv in tu.iterfind("tuv"):
+            lang = tuv.get(XML_LANG) or tuv.get("lang") or ""
+            seg = tuv.find("seg")
+            if seg is not None:
+                segments[lang.lower()] = _tmx_segment_text(seg)
+
+        text = _find_language(segments, source_lang)
+        translation = _find_language(segments, target_lang)
+        if text is not None and translation is not None:
+            yield text, translation
+
+        # Constant memory
+        tu.clear()
+        while tu.getprevious() is not None:
+            del tu.getparent()[0]
+
+
+def _tmx_segment_text(seg) -> str:
+    text = seg.text or ""
+    for child in seg:
+        if child.tag not in TMX_CODE_TAGS:
+            text += _tmx_segment_text(child)
+        text += child.tail or ""
+    return text
+
+
+def _find_language(segments, lang: str) -> Optional[str]:
+    lang = lang.lower()
+    if lang in segments:
+        return segments[lang]
+    for segment_lang, segment in segments.items():
+        if segment_lang.split("-")[0] == lang:
+            return segment
+    return None
+
+
+def read_jsonl(path: Path) -> Iterator[dict]:
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def import_translations(
+    cache: TranslationCache,
+    translations: Iterable[CachedTranslation],
+    batch_size: int = 1000,
+) -> int:
+    """
+    Write translations to the cache, one transaction by batch, then invalidate
+    the memory tiers of the running workers
+    :param cache:
+    :param translations:
+    :param batch_size:
+    :return: number of imported translations
+    """
+    translations = iter(translations)
+    count = 0
+    while True:
+        batch = list(islice(translations, batch_size))
+        if not batch:
+            break
+        cache.write_many(batch)
+        count += len(batch)
+        logger.info(f"{count} translations imported")
+
+    cache.invalidate()
+    return count
+
+
+def export_translations(cache: TranslationCache, path: Path) -> int:
+    """
+    Stream the cache to a JSONL file, one cached translation by line, that
+    `read_jsonl` and `cached_translation_from_dict` read back
+    :param cache:
+    :param path:
+    :return: number of exported translations
+    """
+    count = 0
+    with path.open("w", encoding="utf-8") as f:
+        for cached_translation in cache.iter_translations():
+            f.write(json.dumps(cached_translation._asdict(), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def cached_translation_from_dict(d: dict) -> CachedTranslation:
+    """
+    Cached translation of an exported line, whose languages are already those of
+    the translator
+    """
+    return CachedTranslation(**d)
+
+
+def create_cached_translation(
+    text: str,
+    translation: str,
+    source_language: str,
+    target_language: str,
+    translator: Translator,
+) -> CachedTranslation:
+    """
+    :param text:
+    :param translation:
+    :param source_language: language code of the translator
+    :param target_language: language code of the translator
+    :param translator:
+    :return:
+    """
+    return CachedTranslation(
+        text=text,
+        translation=translation,
+        source_language=source_language,
+        target_language=target_language,
+        translator_name=translator.name,
+        translator_html_mode=translator.html_mode,
+        translator_fake_mode=translator.fake_mode,
+    )
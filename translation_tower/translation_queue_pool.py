@@ -0,0 +1,153 @@
+import asyncio
+from collections import OrderedDict
+from typing import Callable, Optional
+from translation_tower.fair_queue import FairQueue
+from translation_tower.translation_batcher import TranslationBatcher
+from translation_tower.translator import Translator
+from translation_tower.metrics import Metrics
+from translation_tower.logger import logger
+from translation_tower.format_traceback import format_traceback
+
+
+class TranslationQueue:
+    def __init__(self, key: str, queue: FairQueue, batcher: TranslationBatcher):
+        self.key = key
+        self.queue = queue
+        self.batcher = batcher
+        self.reader: Optional[asyncio.Task] = None
+
+    @property
+    def idle(self) -> bool:
+        return self.queue.empty() and self.batcher.idle
+
+
+class TranslationQueuePool:
+    """
+    Translation queues and their readers, by queue key.
+
+    A reader is reaped once its queue has been idle for the batcher idle timeout,
+    and recreated on demand. At most `max_queues` queues are alive: when the limit
+    is reached, the least recently used idle queue is reaped, or the caller waits
+    until a queue is released. A queue becomes idle as soon as its batcher has
+    sent its last jobs, long before its reader exits: a waiting caller retries the
+    reaping every `reap_interval` seconds. A reader that crashes is restarted with
+    backoff.
+    """
+
+    def __init__(
+        self,
+        create_batcher: Callable[[FairQueue, Translator], TranslationBatcher],
+        max_queues: int,
+        metrics: Metrics,
+        max_restart_delay: float = 30.0,
+        reap_interval: float = 0.1,
+    ):
+        self._create_batcher = create_batcher
+        self._max_queues = max_queues
+        self._metrics = metrics
+        self._max_restart_delay = max_restart_delay
+        self._reap_interval = reap_interval
+        self._queues: "OrderedDict[str, TranslationQueue]" = OrderedDict()
+        self._released = asyncio.Condition()
+
+    def __len__(self):
+        return len(self._queues)
+
+    async def get(self, key: str, translator: Translator) -> FairQueue:
+        waiting = False
+        while key not in self._queues and len(self._queues) >= self._max_queues:
+            if not self._reap_least_recently_used():
+                if not waiting:
+                    logger.warning(
+                        f"{len(self._queues)} translation queues alive, "
+                        f"wait for a queue to be released before creating {key}"
+                    )
+                    waiting = True
+                async with self._released:
+                    try:
+                        await asyncio.wait_for(
+                            self._released.wait(), self._reap_interval
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+
+        translation_queue = self._queues.get(key)
+        if translation_queue is None:
+            queue = FairQueue(maxsize=20)
+            translation_queue = TranslationQueue(
+                key, queue, self._create_batcher(queue, translator)
+            )
+            translation_queue.reader = asyncio.create_task(
+                self._supervise(translation_queue)
+            )
+            self._queues[key] = translation_queue
+            self._metrics.gauge("translation_queues", len(self._queues))
+        else:
+            self._queues.move_to_end(key)
+
+        return translation_queue.queue
+
+    def find(self, key: str) -> Optional[FairQueue]:
+        """
+        :param key:
+        :return: the queue of a key if it is alive
+        """
+        translation_queue = self._queues.get(key)
+        return translation_queue.queue if translation_queue is not None else None
+
+    async def stop(self):
+        for translation_queue in list(self._queues.values()):
+            translation_queue.reader.cancel()
+        await asyncio.gather(
+            *[q.reader for q in self._queues.values()], return_exceptions=True
+        )
+        self._queues.clear()
+
+    async def _supervise(self, translation_queue: TranslationQueue):
+        restart_delay = 1.0
+        while True:
+            try:
+                await translation_queue.batcher.run()
+
+                # The queue is idle: reap the reader
+                if translation_queue.idle:
+                    logger.info(f"Reap idle translation queue {translation_queue.key}")
+                    self._metrics.increment("translation_queues_reaped")
+                    await self._release(translation_queue)
+                    return
+                restart_delay = 1.0
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.error(
+                    f"Translation queue reader {translation_queue.key} crashed, "
+                    f"restart in {restart_delay}s\n{format_traceback(e)}"
+                )
+                self._metrics.increment("translation_queue_restarts")
+                await asyncio.sleep(restart_delay)
+                restart_delay = min(self._max_restart_delay, restart_delay * 2)
+
+    def _reap_least_recently_used(self) -> bool:
+        for translation_queue in self._queues.values():
+            if translation_queue.idle:
+                logger.info(
+                    f"Reap least recently used translation queue "
+                    f"{translation_queue.key}"
+                )
+                self._metrics.increment("translation_queues_reaped")
+                translation_queue.reader.cancel()
+                self._remove(translation_queue)
+                return True
+        return False
+
+    async def _release(self, translation_queue: TranslationQueue):
+        self._remove(translation_queue)
+        async with self._released:
+            self._released.notify_all()
+
+    def _remove(self, translation_queue: TranslationQueue):
+        if self._queues.get(translation_queue.key) is translation_queue:
+            del self._queues[translation_queue.key]
+        self._metrics.gauge("translation_queues", len(self._queues))